@@ -0,0 +1,175 @@
+# aerp/ackpolicy.py
+# Copyright (C) 2025 Akita Engineering / www.akitaengineering.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+ACK policy for the Akita Emergency Response Plugin (AERP).
+
+Every listener used to answer every periodic emergency broadcast with a fresh
+unicast ACK. `AckPolicy` acknowledges an emergency once, then re-acknowledges
+only after `reack_interval` or when the sender signals it has not seen our ACK.
+ACKs are sent after a random delay so listeners that heard the same broadcast
+do not all transmit at once.
+
+The sender's signal is the `ack_filter` field of its broadcasts: a 32-bit Bloom
+filter of the node numbers it holds ACKs from (two bits per node). If either of
+our bits is clear, the sender has certainly not seen our ACK. If both are set it
+probably has; a false positive only delays the re-ACK until the interval.
+"""
+
+import random
+import threading
+import time
+
+# Reasons returned by AckPolicy.decide
+ACK_FIRST = "first"           # First ACK for this emergency
+ACK_REQUESTED = "requested"   # The sender's ack_filter shows it has not seen our ACK
+ACK_INTERVAL = "interval"     # reack_interval has passed since our last ACK
+
+
+def ack_filter_bits(node_num):
+    """
+    Returns the two filter bits of a node number.
+
+    Args:
+        node_num (int): The node number.
+
+    Returns:
+        int: A 32-bit mask with (up to) two bits set.
+    """
+    h = (int(node_num) * 2654435761) & 0xFFFFFFFF # Knuth multiplicative hash spreads sequential IDs
+    return (1 << (h >> 27)) | (1 << ((h >> 22) & 31))
+
+
+def build_ack_filter(node_nums):
+    """
+    Builds the `ack_filter` value advertising a set of acknowledging nodes.
+
+    Args:
+        node_nums (iterable): Node numbers we hold ACKs from.
+
+    Returns:
+        int: The 32-bit filter (0 if there are none).
+    """
+    ack_filter = 0
+    for node_num in node_nums:
+        ack_filter |= ack_filter_bits(node_num)
+    return ack_filter
+
+
+def ack_filter_contains(ack_filter, node_num):
+    """Returns True if `node_num` may be in the filter (False means certainly not)."""
+    bits = ack_filter_bits(node_num)
+    return ack_filter & bits == bits
+
+
+class _AckState:
+    """What we last acknowledged to one sender."""
+    __slots__ = ("emergency_id", "last_ack")
+
+    def __init__(self, emergency_id, last_ack):
+        self.emergency_id = emergency_id
+        self.last_ack = last_ack
+
+
+class AckPolicy:
+    """
+    Decides whether a received emergency broadcast should be acknowledged.
+
+    State is one small record per sender (its latest emergency ID and when we
+    last ACKed it), so memory is bounded by the number of tracked emergencies;
+    call `forget` when a sender's emergency is cleared or expires. Thread-safe.
+
+    Attributes:
+        reack_interval (float): Seconds after which an emergency is acknowledged again.
+        min_gap (float): Minimum seconds between two ACKs to the same sender, even
+                         when requested (our previous ACK may still be in flight).
+        max_jitter (float): Upper bound of the random delay before each ACK, in seconds.
+        counts (dict): ACKs decided per reason, and broadcasts left unacknowledged.
+    """
+
+    def __init__(self, reack_interval=240, min_gap=10, max_jitter=3.0, rng=None):
+        """
+        Initializes the policy with no senders.
+
+        Args:
+            reack_interval (float): Seconds after which an emergency is acknowledged again. Defaults to 240.
+            min_gap (float): Minimum seconds between ACKs to the same sender. Defaults to 10.
+            max_jitter (float): Upper bound of the random ACK delay in seconds. Defaults to 3.0.
+            rng (random.Random, optional): Random source for the jitter.
+        """
+        self.reack_interval = reack_interval
+        self.min_gap = min_gap
+        self.max_jitter = max_jitter
+        self._rng = rng or random.Random()
+        self._states = {} # sender node_num -> _AckState
+        self._lock = threading.Lock()
+        self.counts = {ACK_FIRST: 0, ACK_REQUESTED: 0, ACK_INTERVAL: 0, "suppressed": 0}
+
+    def decide(self, node_num, emergency_id, my_node_num, ack_filter=None, now=None):
+        """
+        Decides whether to acknowledge a broadcast, and records the ACK if so.
+
+        Args:
+            node_num (int): The sender.
+            emergency_id (str): The broadcast's emergency ID.
+            my_node_num (int): This node's number (looked up in the filter).
+            ack_filter (int, optional): The broadcast's `ack_filter`; None if the sender
+                                        does not advertise one (older AERP versions).
+            now (float, optional): Current time.monotonic(). Defaults to now.
+
+        Returns:
+            str | None: ACK_FIRST, ACK_REQUESTED or ACK_INTERVAL if an ACK should be
+                        sent, None if it should be suppressed.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            state = self._states.get(node_num)
+            if state is None or state.emergency_id != emergency_id:
+                reason = ACK_FIRST
+            elif now - state.last_ack < self.min_gap:
+                reason = None
+            elif isinstance(ack_filter, int) and not ack_filter_contains(ack_filter, my_node_num):
+                reason = ACK_REQUESTED
+            elif now - state.last_ack >= self.reack_interval:
+                reason = ACK_INTERVAL
+            else:
+                reason = None
+
+            if reason is None:
+                self.counts["suppressed"] += 1
+                return None
+            self.counts[reason] += 1
+            self._states[node_num] = _AckState(emergency_id, now)
+            return reason
+
+    def jitter(self):
+        """Returns a random ACK delay in [0, max_jitter] seconds."""
+        return self._rng.uniform(0, self.max_jitter) if self.max_jitter > 0 else 0.0
+
+    def forget(self, node_num):
+        """Drops what we acknowledged to a sender (no-op if unknown)."""
+        with self._lock:
+            self._states.pop(node_num, None)
+
+    def stats(self):
+        """
+        Returns ACK decision counters.
+
+        Returns:
+            dict: {senders, first, requested, interval, suppressed}
+        """
+        with self._lock:
+            return dict(self.counts, senders=len(self._states))
@@ -0,0 +1,401 @@
+# aerp/async_plugin.py
+# Copyright (C) 2025 Akita Engineering / www.akitaengineering.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+asyncio variant of the Akita Emergency Response Plugin (AERP) core.
+
+`AsyncAERP` runs the same protocol logic as `AERP`, but its broadcasts,
+housekeeping tasks and packet ingest are driven by an asyncio event loop
+instead of dedicated threads. Packets arriving on the Meshtastic reader thread
+are handed to the loop with `loop.call_soon_threadsafe`, so any number of
+AsyncAERP instances (and e.g. an HTTP status endpoint) can share one loop.
+Radio writes (`interface.sendData`) are the only blocking calls; they run on a
+per-instance send thread so a slow serial/TCP link never stalls the loop.
+"""
+
+import asyncio
+import concurrent.futures
+import inspect
+import logging
+import time
+
+from .constants import CONFIG_INGEST_QUEUE_SIZE, CONFIG_INGEST_DROP_POLICY, INGEST_DROP_OLDEST
+from .ingest import IngestQueue, PRIORITY_BULK
+from .plugin import AERP
+from .scheduling import ScheduledTask, _TaskTiming
+
+# Get a logger specific to this module
+logger = logging.getLogger(__name__)
+
+
+def _on_loop(loop):
+    """Returns True if the caller is running on `loop`'s thread."""
+    try:
+        return asyncio.get_running_loop() is loop
+    except RuntimeError:
+        return False
+
+
+class AsyncTaskScheduler:
+    """
+    Event-loop implementation of the `TaskScheduler` interface.
+
+    Tasks are loop timer callbacks (`loop.call_later`). A task callback may be a
+    plain function or return an awaitable; as with `TaskScheduler`, a numeric
+    result chooses the next delay, None uses the task's interval, and one-shot
+    tasks never repeat. All methods may be called from any thread.
+    """
+
+    def __init__(self, loop):
+        """
+        Initializes the scheduler.
+
+        Args:
+            loop (asyncio.AbstractEventLoop): The loop the tasks run on.
+        """
+        self._loop = loop
+        self._handles = {} # ScheduledTask -> pending asyncio.TimerHandle
+        self._timing = {} # task name -> _TaskTiming
+        self._stopped = False
+
+    def start(self):
+        """No-op: tasks run whenever the event loop runs."""
+
+    def stop(self, timeout=2.0):
+        """
+        Cancels all pending tasks. A task that is already running finishes.
+
+        Args:
+            timeout (float): Unused; present for interface compatibility with TaskScheduler.
+        """
+        self._stopped = True
+        if not self._loop.is_closed():
+            self._call(self._cancel_all)
+
+    def schedule(self, name, callback, delay=0.0, interval=None):
+        """
+        Registers a task.
+
+        Args:
+            name (str): Task name. Stats are aggregated over all tasks with the same name.
+            callback (callable): Called with no arguments on the event loop; may return an awaitable.
+            delay (float): Seconds until the first run. Defaults to 0 (as soon as possible).
+            interval (float, optional): Default seconds between runs; None for a one-shot task.
+
+        Returns:
+            ScheduledTask: Handle for `cancel` and `run_now`.
+        """
+        timing = self._timing.get(name)
+        if timing is None:
+            timing = self._timing[name] = _TaskTiming()
+        task = ScheduledTask(name, callback, interval, timing)
+        self._call(self._arm, task, delay)
+        return task
+
+    def cancel(self, task):
+        """Cancels a task. A run already in progress finishes; no further runs happen."""
+        if task is None:
+            return
+        task.cancelled = True
+        if not self._loop.is_closed():
+            self._call(self._disarm, task)
+
+    def run_now(self, task):
+        """
+        Moves a pending task's next run to now.
+
+        Returns:
+            bool: True if the task was rescheduled, False if it was cancelled or already finished.
+        """
+        if task is None or task.cancelled or self._stopped:
+            return False
+        self._call(self._arm, task, 0.0)
+        return True
+
+    def stats(self):
+        """
+        Returns per-task run counts and jitter (how late each run started).
+
+        Returns:
+            dict: {task_name: {runs, avg_late_ms, max_late_ms}}
+        """
+        return {name: timing.as_dict() for name, timing in list(self._timing.items())}
+
+    def _call(self, fn, *args):
+        """Runs fn(*args) now if on the loop thread, otherwise hands it to the loop."""
+        if _on_loop(self._loop):
+            fn(*args)
+        else:
+            self._loop.call_soon_threadsafe(fn, *args)
+
+    def _arm(self, task, delay):
+        """(Re)schedules `task` to run after `delay` seconds (loop thread only)."""
+        if task.cancelled or self._stopped:
+            return
+        self._disarm(task)
+        delay = max(0.0, delay)
+        task.due = self._loop.time() + delay
+        self._handles[task] = self._loop.call_later(delay, self._fire, task)
+
+    def _disarm(self, task):
+        """Cancels the pending timer of `task`, if any (loop thread only)."""
+        handle = self._handles.pop(task, None)
+        if handle is not None:
+            handle.cancel()
+
+    def _cancel_all(self):
+        for handle in self._handles.values():
+            handle.cancel()
+        self._handles.clear()
+
+    def _fire(self, task):
+        """Timer callback: runs the task and schedules its next run."""
+        self._handles.pop(task, None)
+        if task.cancelled:
+            return
+        lateness = self._loop.time() - task.due
+        task.due = float("inf") # Running; not pending until rescheduled
+        try:
+            result = task.callback()
+        except Exception as e:
+            # Keep the task scheduled no matter what a single run does
+            logger.exception(f"Error in scheduled task '{task.name}': {e}")
+            result = None
+        if inspect.isawaitable(result):
+            future = asyncio.ensure_future(result)
+            future.add_done_callback(lambda f: self._finished(task, lateness, self._result(task, f)))
+        else:
+            self._finished(task, lateness, result)
+
+    @staticmethod
+    def _result(task, future):
+        """Returns a finished coroutine task's result, logging (and discarding) its exception."""
+        if future.cancelled():
+            return None
+        if future.exception() is not None:
+            logger.error(f"Error in scheduled task '{task.name}': {future.exception()}")
+            return None
+        return future.result()
+
+    def _finished(self, task, lateness, next_delay):
+        """Records a completed run and schedules the next one (loop thread only)."""
+        task.timing.record(lateness)
+        if task.cancelled or task.due != float("inf"):
+            return # Cancelled, or run_now() was called while it ran
+        if next_delay is None:
+            next_delay = task.interval
+        if next_delay is None:
+            task.cancelled = True # One-shot task finished
+        else:
+            self._arm(task, next_delay)
+
+
+class AsyncIngestQueue(IngestQueue):
+    """
+    `IngestQueue` drained by a coroutine instead of a worker thread.
+
+    `put` still runs on the Meshtastic reader thread: it classifies the packet and
+    hands it to the loop with `loop.call_soon_threadsafe`. The overflow policy,
+    priority order, counters and latency metrics are those of `IngestQueue`.
+    The worker yields to the loop after every packet.
+    """
+
+    def __init__(self, handler, classify, loop, maxsize=256, drop_policy=INGEST_DROP_OLDEST, name="AERPAsyncIngest"):
+        """
+        Initializes the queue. Call `start()` to launch the worker coroutine.
+
+        Args:
+            handler (callable): Called as handler(packet, interface) on the event loop.
+            classify (callable): Called as classify(packet) on enqueue; returns one of
+                                 the PRIORITY_* classes.
+            loop (asyncio.AbstractEventLoop): The loop the worker runs on.
+            maxsize (int): Nominal queue bound. Defaults to 256.
+            drop_policy (str): Overflow policy, one of INGEST_DROP_POLICIES. Defaults to INGEST_DROP_OLDEST.
+            name (str): Worker name (for logs).
+        """
+        super().__init__(handler, classify, maxsize=maxsize, drop_policy=drop_policy, name=name)
+        self._loop = loop
+        self._wakeup = None # asyncio.Event, created on the loop
+        self._worker_task = None
+
+    def start(self):
+        """Starts the worker coroutine once the loop runs (no-op if already running)."""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._loop.call_soon_threadsafe(self._start_worker)
+
+    def stop(self, timeout=2.0):
+        """
+        Stops the worker after the packet it is currently handling. Queued packets are discarded.
+
+        Args:
+            timeout (float): Unused; present for interface compatibility with IngestQueue.
+        """
+        with self._cond:
+            self._running = False
+        if not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._stop_worker)
+
+    def put(self, packet, interface):
+        """
+        Classifies a packet and hands it to the event loop. Safe to call from the radio reader thread.
+
+        Args:
+            packet (dict): The received packet.
+            interface: The interface that received it.
+
+        Returns:
+            bool: True once the packet is handed over. An overflow drop happens on
+                  the loop and is only visible in `stats`.
+        """
+        priority = self._classify(packet)
+        if priority not in self._queues:
+            priority = PRIORITY_BULK
+        self._loop.call_soon_threadsafe(self._enqueue, priority, (time.monotonic(), packet, interface))
+        return True
+
+    def _enqueue(self, priority, entry):
+        """Loop callback: queues an entry and wakes the worker."""
+        with self._cond: # Counters are also read from other threads
+            admitted = self._admit(priority, entry)
+        if admitted and self._wakeup is not None:
+            self._wakeup.set()
+
+    def _start_worker(self):
+        if not self._running or self._worker_task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._worker_task = self._loop.create_task(self._worker())
+        logger.debug(f"{self._name} started (maxsize={self.maxsize}).")
+
+    def _stop_worker(self):
+        if self._worker_task is not None:
+            self._worker_task.cancel()
+            self._worker_task = None
+
+    async def _worker(self):
+        """Worker coroutine: dispatches the most urgent queued packet, one at a time."""
+        while self._running:
+            with self._cond:
+                entry = self._pop() if self._size else None
+            if entry is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            priority, (enqueued_at, packet, interface) = entry
+            dispatched_at = time.monotonic()
+            self.dispatching_since = enqueued_at
+            try:
+                self._handler(packet, interface)
+            except Exception as e:
+                # Keep the worker alive no matter what a single packet does
+                self.stats["errors"] += 1
+                logger.exception(f"Error handling queued packet: {e}")
+            self.dispatching_since = None
+            finished_at = time.monotonic()
+            with self._cond:
+                self._latency[priority].record(dispatched_at - enqueued_at, finished_at - enqueued_at)
+                self.stats["processed"] += 1
+            await asyncio.sleep(0) # Let broadcasts and other coroutines run between packets
+        logger.debug(f"{self._name} stopped.")
+
+
+class AsyncAERP(AERP):
+    """
+    AERP core whose broadcasts, housekeeping and ingest run on an asyncio event loop.
+
+    Behaves like `AERP` (same public methods, same status): scheduled tasks run as
+    loop timers and received packets are processed by a worker coroutine. Outgoing
+    messages are handed to a single send thread, so `interface.sendData` never blocks
+    the loop and messages still go out in order (a CLEAR never overtakes the last
+    broadcast). The broadcast and ACK retry tasks await their send before scheduling
+    what comes next, and a failed ACK is retried as with `AERP`. The public methods
+    may still be called from other threads, e.g. a CLI.
+
+    Usage, from inside a coroutine:
+
+        aerp = AsyncAERP(interface, config_manager)
+        pub.subscribe(lambda packet, interface: aerp.submit_incoming(packet, interface), "meshtastic.receive")
+
+    Attributes:
+        loop (asyncio.AbstractEventLoop): The event loop this instance runs on.
+    """
+
+    def __init__(self, interface, config_manager, loop=None):
+        """
+        Initializes the plugin on an event loop.
+
+        Args:
+            interface: The initialized Meshtastic interface object.
+            config_manager (ConfigManager): The configuration manager instance.
+            loop (asyncio.AbstractEventLoop, optional): The loop to run on. Defaults to the
+                running loop (so construct the instance inside a coroutine, or pass the loop).
+        """
+        self.loop = loop if loop is not None else asyncio.get_running_loop()
+        self._send_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="AERPAsyncSend")
+        self._send_waiters = set() # Pending _await_send tasks (the loop only keeps weak references)
+        super().__init__(interface, config_manager)
+
+    def _send_message(self, message_payload, label, **send_kwargs):
+        """
+        Queues an AERP message for the send thread. Safe to call from any thread.
+
+        Returns:
+            concurrent.futures.Future: Resolves to True if the message was handed to the
+                                       interface, False otherwise.
+        """
+        return self._send_executor.submit(super()._send_message, message_payload, label, **send_kwargs)
+
+    def _when_sent(self, sent, callback):
+        """
+        Calls callback(ok) on the loop once the send thread has finished the send.
+
+        Returns:
+            asyncio.Task | concurrent.futures.Future: Resolves to the callback's return
+                value. On the loop thread it is an asyncio task, so a scheduled task that
+                returns it is awaited before its next run.
+        """
+        coro = self._await_send(sent, callback)
+        if _on_loop(self.loop):
+            waiter = asyncio.ensure_future(coro)
+            self._send_waiters.add(waiter)
+            waiter.add_done_callback(self._send_waiters.discard)
+            return waiter
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    async def _await_send(self, sent, callback):
+        """Waits for a send future without blocking the loop, then runs the callback on the loop."""
+        try:
+            ok = await asyncio.wrap_future(sent)
+        except Exception as e:
+            logger.error(f"Send thread failed: {e}")
+            ok = False
+        return callback(ok)
+
+    def shutdown(self):
+        """Stops ingest and the scheduler, then lets the send thread finish queued messages."""
+        super().shutdown()
+        self._send_executor.shutdown(wait=False)
+
+    def _create_ingest(self):
+        return AsyncIngestQueue(self.handle_incoming, self._classify_packet, self.loop,
+                                maxsize=self.config.get(CONFIG_INGEST_QUEUE_SIZE),
+                                drop_policy=self.config.get(CONFIG_INGEST_DROP_POLICY))
+
+    def _create_scheduler(self):
+        return AsyncTaskScheduler(self.loop)
@@ -32,7 +32,6 @@ import argparse
 import sys
 import os
 import json # For printing status nicely
-from datetime import datetime # For formatting status timestamps
 
 # --- Logging Setup ---
 # Configure logging early, before importing other AERP modules that might log.
@@ -49,6 +48,8 @@ try:
     from .config import ConfigManager
     from .constants import CONFIG_ENABLED, CONFIG_PORT, CONFIG_INTERVAL
     from .utils import format_node_id
+    from .status import format_timestamp
+    from .logutil import enable_queue_logging, disable_queue_logging
 except ImportError as e:
      # Handle cases where the script might be run directly without proper installation
      logger.exception(f"ImportError: Failed to import AERP modules. Ensure the package structure is correct or run using 'python -m aerp.cli'. Error: {e}")
@@ -68,7 +69,8 @@ meshtastic_interface = None # Global reference to the interface for cleanup
 def onReceive(packet, interface):
     """
     Callback wrapper for Meshtastic 'meshtastic.receive' pubsub events.
-    Routes the received packet to the AERP instance for handling.
+    Queues the received packet on the AERP instance; processing happens on the
+    AERP ingest worker so this (radio reader) thread is never blocked.
 
     Args:
         packet (dict): The packet data dictionary from meshtastic-python.
@@ -78,10 +80,10 @@ def onReceive(packet, interface):
     # logger.debug(f"CLI onReceive: Packet received: {packet}") # Very verbose
     if aerp_instance:
         try:
-            aerp_instance.handle_incoming(packet, interface)
+            aerp_instance.submit_incoming(packet, interface)
         except Exception as e:
             # Prevent callback errors from crashing the CLI
-            logger.exception(f"Error in AERP handle_incoming callback: {e}")
+            logger.exception(f"Error in AERP submit_incoming callback: {e}")
     else:
         logger.warning("CLI onReceive: Received packet but AERP instance is not initialized.")
 
@@ -104,6 +106,22 @@ def onConnection(interface, connected):
     else:
         logger.warning("CLI onConnection: Status changed but AERP instance is not initialized.")
 
+def onNodeUpdated(node, interface):
+    """
+    Callback wrapper for Meshtastic 'meshtastic.node.updated' pubsub events.
+    Lets the AERP instance refresh its cached own position as soon as it changes.
+
+    Args:
+        node (dict): The updated node entry.
+        interface: The Meshtastic interface instance.
+    """
+    if aerp_instance:
+        try:
+            aerp_instance.on_node_updated(node)
+        except Exception as e:
+            # Prevent callback errors from crashing the CLI
+            logger.exception(f"Error in AERP on_node_updated callback: {e}")
+
 # --- Meshtastic Interface Setup ---
 
 def setup_meshtastic_interface(device_path=None, host=None, no_serial=False):
@@ -165,45 +183,89 @@ def setup_meshtastic_interface(device_path=None, host=None, no_serial=False):
 
 # --- CLI Command Handling ---
 
-def print_status(status_dict):
-    """Formats and prints the status dictionary to the console."""
+def print_status(status):
+    """
+    Formats and prints a structured status snapshot to the console.
+
+    Args:
+        status (StatusSnapshot): The snapshot returned by AERP.status().
+    """
     print("\n--- AERP Status ---")
-    print(f"  My Node ID:       {status_dict.get('my_node_id', 'Unknown')}")
-    print(f"  Emergency Active: {status_dict.get('emergency_active', False)}")
-    active_id = status_dict.get('last_emergency_id')
+    print(f"  My Node ID:       {status.my_node_id or 'Unknown'}")
+    print(f"  Emergency Active: {bool(status.emergency_active)}")
+    active_id = status.last_emergency_id
     print(f"  Last Emergency ID:{active_id if active_id else '(None Active)'}")
 
     print("  Acknowledgements (for last active emergency):")
-    acks = status_dict.get('active_acknowledgements', {})
+    acks = status.acknowledgements
     if active_id and acks:
-        for node_id, timestamp in acks.items():
-            print(f"    - {node_id} (at {timestamp})")
+        for node_num, timestamp in acks.items():
+            print(f"    - {format_node_id(node_num)} (at {format_timestamp(timestamp)})")
     elif active_id:
         print("    (None received for this ID yet)")
     else:
         print("    (No emergency active to receive ACKs for)")
 
     print("  Active Received Emergencies (from others):")
-    received = status_dict.get('active_received_emergencies', {})
+    received = status.received_emergencies
     if received:
-        for node_id, info in received.items():
+        for node_num, info in received.items():
             gps_str = "No GPS"
-            if info.get('gps') and 'latitude' in info['gps'] and 'longitude' in info['gps']:
-                 gps_str = f"Lat {info['gps']['latitude']:.5f}, Lon {info['gps']['longitude']:.5f}"
-            batt_str = f"{info.get('battery', 'N/A')}%" if info.get('battery') is not None else "N/A"
-            print(f"    - From: {node_id}")
-            print(f"        ID: {info.get('emergency_id', 'N/A')}")
-            print(f"        Msg: '{info.get('message', '')}'")
+            if info.latitude is not None and info.longitude is not None:
+                 gps_str = f"Lat {info.latitude:.5f}, Lon {info.longitude:.5f}"
+            batt_str = f"{info.battery}%" if info.battery is not None else "N/A"
+            print(f"    - From: {format_node_id(node_num)}")
+            print(f"        ID: {info.message_id or 'N/A'}")
+            print(f"        Msg: '{info.message or ''}'")
             print(f"        GPS: {gps_str}")
             print(f"        Battery: {batt_str}")
-            print(f"        Received At: {info.get('received_at', 'N/A')}")
-            print(f"        Last Seen: {info.get('last_seen', 'N/A')}")
+            print(f"        Received At: {format_timestamp(info.timestamp)}")
+            print(f"        Last Seen: {format_timestamp(info.last_seen)}")
     else:
         print("    (None)")
 
+    print("  Tracked Nodes (distance from me):")
+    distances = status.tracked_node_distances
+    if distances:
+        for node_num, distance in distances:
+            print(f"    - {format_node_id(node_num)}: {distance:.1f}m")
+    else:
+        print("    (None, or my position is unknown)")
+
+    ingest = status.ingest
+    if ingest:
+        print(f"  Ingest Queue:     {ingest.get('queued', 0)} queued, {ingest.get('processed', 0)} processed, "
+              f"{ingest.get('dropped', 0)} dropped, {ingest.get('critical_overflow', 0)} over bound")
+    latency = status.ingest_latency or {}
+    for class_name, stats in latency.items():
+        if stats.get('count'):
+            print(f"    {class_name:<11} n={stats['count']:<6} avg {stats['avg_total_ms']:.1f}ms, max {stats['max_total_ms']:.1f}ms "
+                  f"(queued avg {stats['avg_queue_ms']:.1f}ms)")
+    ack_store = status.ack_store
+    if ack_store:
+        print(f"  ACK Store:        {ack_store['sessions']}/{ack_store['max_sessions']} sessions, {ack_store['acks']} ACKs, "
+              f"{ack_store['evicted']} evicted, ~{ack_store['approx_bytes'] / 1024:.1f} KiB")
+    dedup = status.dedup
+    if dedup:
+        print(f"  Duplicates:       {dedup['duplicates']} of {dedup['lookups']} packets dropped "
+              f"({dedup['hit_rate']:.1%}), {dedup['size']}/{dedup['capacity']} remembered")
+    ack_policy = status.ack_policy
+    if ack_policy:
+        print(f"  ACKs Sent:        {ack_policy['first']} first, {ack_policy['requested']} requested, "
+              f"{ack_policy['interval']} periodic, {ack_policy['suppressed']} suppressed")
+    alerts = status.proximity_alerts
+    if alerts:
+        print(f"  Proximity Alerts: {alerts['inside']} inside radius, {alerts['alerts']} alerts, {alerts['exits']} exits, "
+              f"{alerts['suppressed_repeats']} repeats and {alerts['suppressed_reentries']} re-entries suppressed")
+    scheduler = status.scheduler or {}
+    if scheduler:
+        print("  Scheduled Tasks (start lateness):")
+        for task_name, stats in scheduler.items():
+            print(f"    {task_name:<15} runs={stats['runs']:<6} avg {stats['avg_late_ms']:.1f}ms, max {stats['max_late_ms']:.1f}ms")
+
     # Optionally print config - can be verbose
     # print("  Current Configuration:")
-    # print(json.dumps(status_dict.get('config', {}), indent=4))
+    # print(json.dumps(status.config, indent=4))
     print("-------------------\n")
 
 
@@ -250,10 +312,23 @@ def run_cli_loop():
                 else:
                     logger.error("AERP instance not ready.")
 
+            elif user_input == "now":
+                if aerp_instance:
+                    if aerp_instance.send_now():
+                        print("Emergency broadcast triggered.")
+                else:
+                    logger.error("AERP instance not ready.")
+
+            elif user_input == "reload":
+                if aerp_instance:
+                    aerp_instance.reconfigure()
+                    print("Configuration reloaded.")
+                else:
+                    logger.error("AERP instance not ready.")
+
             elif user_input == "status":
                 if aerp_instance:
-                    status = aerp_instance.get_status()
-                    print_status(status)
+                    print_status(aerp_instance.status())
                 else:
                     logger.error("AERP instance not ready.")
 
@@ -266,6 +341,8 @@ def run_cli_loop():
                 print("  start   - Start broadcasting emergency messages.")
                 print("  stop    - Stop broadcasting and send 'All Clear'.")
                 print("  clear   - Manually send 'All Clear' for the last emergency.")
+                print("  now     - Send the next emergency broadcast immediately.")
+                print("  reload  - Reload the configuration file.")
                 print("  status  - Show current status, ACKs, and received alerts.")
                 print("  help    - Show this help message.")
                 print("  exit    - Quit the plugin (stops broadcast first).")
@@ -303,6 +380,7 @@ def main():
     # Configuration and Logging
     parser.add_argument("--config", default="config/aerp_config.json", help="Path to the AERP JSON configuration file.")
     parser.add_argument("--debug", action="store_true", help="Enable debug logging for detailed output.")
+    parser.add_argument("--queue-logging", action="store_true", help="Write log output from a background thread, so console/file I/O never blocks the radio thread.")
     args = parser.parse_args()
 
     # --- Configure Logging Level ---
@@ -336,12 +414,16 @@ def main():
     # Pass the connected interface and loaded config
     aerp_instance = AERP(interface, config_manager)
 
+    # Optionally move log handler I/O off the radio thread before packets start arriving
+    log_listener = enable_queue_logging() if args.queue_logging else None
+
     # 4. Register Meshtastic Callbacks using PubSub
     # It's generally recommended to subscribe *after* the interface is up.
     logger.info("Registering Meshtastic pubsub callbacks...")
     try:
         pub.subscribe(onReceive, "meshtastic.receive")
         pub.subscribe(onConnection, "meshtastic.connection")
+        pub.subscribe(onNodeUpdated, "meshtastic.node.updated")
         # Note: If using older meshtastic versions, these might be needed instead/as well:
         # interface.addReceiveCallback(onReceive)
         # interface.addConnectionCallback(onConnection)
@@ -350,6 +432,7 @@ def main():
          logger.exception(f"Error subscribing to Meshtastic pubsub topics: {e}")
          # Decide if this is fatal or if the app can proceed without event handling
          interface.close()
+         disable_queue_logging(log_listener)
          sys.exit(1)
 
 
@@ -376,6 +459,7 @@ def main():
             logger.debug("Stopping emergency broadcast (if active)...")
             # Stop without sending clear, as we are exiting anyway
             aerp_instance.stop_emergency(send_clear=False)
+            aerp_instance.shutdown()
 
         # Close the Meshtastic interface gracefully
         if meshtastic_interface: # Use the global reference
@@ -386,6 +470,7 @@ def main():
                  logger.error(f"Error closing Meshtastic interface: {e}")
 
         logger.info("--- AERP Shutdown Complete ---")
+        disable_queue_logging(log_listener) # Flush queued log records before exiting
 
 if __name__ == '__main__':
     # This allows running the CLI using: python -m aerp.cli
@@ -25,8 +25,14 @@ import os
 from .constants import (
     DEFAULT_INTERVAL, DEFAULT_EMERGENCY_PORT, DEFAULT_EMERGENCY_MESSAGE,
     DEFAULT_ALERT_RADIUS, DEFAULT_ACK_TIMEOUT, DEFAULT_ENABLED_BY_DEFAULT,
+    DEFAULT_INGEST_QUEUE_SIZE, DEFAULT_INGEST_DROP_POLICY, DEFAULT_WIRE_FORMAT, DEFAULT_EMERGENCY_ID_MODE,
+    DEFAULT_DELTA_BROADCASTS, DEFAULT_ADAPTIVE_INTERVAL, DEFAULT_MIN_INTERVAL, DEFAULT_MAX_INTERVAL,
+    DEFAULT_MAX_ACK_SESSIONS, DEFAULT_ACK_SESSION_MAX_AGE, DEFAULT_ALERT_COOLDOWN, DEFAULT_REACK_INTERVAL,
     CONFIG_INTERVAL, CONFIG_PORT, CONFIG_MESSAGE, CONFIG_RADIUS,
-    CONFIG_ACK_TIMEOUT, CONFIG_ENABLED
+    CONFIG_ACK_TIMEOUT, CONFIG_ENABLED, CONFIG_INGEST_QUEUE_SIZE, CONFIG_INGEST_DROP_POLICY,
+    INGEST_DROP_POLICIES, CONFIG_WIRE_FORMAT, WIRE_FORMATS, CONFIG_EMERGENCY_ID_MODE, EMERGENCY_ID_MODES,
+    CONFIG_DELTA_BROADCASTS, CONFIG_ADAPTIVE_INTERVAL, CONFIG_MIN_INTERVAL, CONFIG_MAX_INTERVAL,
+    CONFIG_MAX_ACK_SESSIONS, CONFIG_ACK_SESSION_MAX_AGE, CONFIG_ALERT_COOLDOWN, CONFIG_REACK_INTERVAL
 )
 
 # Get a logger specific to this module
@@ -67,6 +73,18 @@ class ConfigManager:
             CONFIG_RADIUS: DEFAULT_ALERT_RADIUS,
             CONFIG_ACK_TIMEOUT: DEFAULT_ACK_TIMEOUT,
             CONFIG_ENABLED: DEFAULT_ENABLED_BY_DEFAULT,
+            CONFIG_INGEST_QUEUE_SIZE: DEFAULT_INGEST_QUEUE_SIZE,
+            CONFIG_INGEST_DROP_POLICY: DEFAULT_INGEST_DROP_POLICY,
+            CONFIG_WIRE_FORMAT: DEFAULT_WIRE_FORMAT,
+            CONFIG_EMERGENCY_ID_MODE: DEFAULT_EMERGENCY_ID_MODE,
+            CONFIG_DELTA_BROADCASTS: DEFAULT_DELTA_BROADCASTS,
+            CONFIG_ADAPTIVE_INTERVAL: DEFAULT_ADAPTIVE_INTERVAL,
+            CONFIG_MIN_INTERVAL: DEFAULT_MIN_INTERVAL,
+            CONFIG_MAX_INTERVAL: DEFAULT_MAX_INTERVAL,
+            CONFIG_MAX_ACK_SESSIONS: DEFAULT_MAX_ACK_SESSIONS,
+            CONFIG_ACK_SESSION_MAX_AGE: DEFAULT_ACK_SESSION_MAX_AGE,
+            CONFIG_ALERT_COOLDOWN: DEFAULT_ALERT_COOLDOWN,
+            CONFIG_REACK_INTERVAL: DEFAULT_REACK_INTERVAL,
         }
 
     def _validate_config(self, loaded_config):
@@ -113,6 +131,27 @@ class ConfigManager:
                     elif key == CONFIG_MESSAGE and not value: # Check for empty string
                          valid = False
                          error_msg = f"'{key}' cannot be an empty string."
+                    elif key in (CONFIG_MIN_INTERVAL, CONFIG_MAX_INTERVAL) and value <= 0:
+                        valid = False
+                        error_msg = f"'{key}' must be a positive integer."
+                    elif key in (CONFIG_MAX_ACK_SESSIONS, CONFIG_ACK_SESSION_MAX_AGE, CONFIG_REACK_INTERVAL) and value <= 0:
+                        valid = False
+                        error_msg = f"'{key}' must be a positive integer."
+                    elif key == CONFIG_ALERT_COOLDOWN and value < 0:
+                        valid = False
+                        error_msg = f"'{key}' cannot be negative (use 0 to alert on every entry)."
+                    elif key == CONFIG_INGEST_QUEUE_SIZE and value <= 0:
+                        valid = False
+                        error_msg = f"'{key}' must be a positive integer."
+                    elif key == CONFIG_INGEST_DROP_POLICY and value not in INGEST_DROP_POLICIES:
+                        valid = False
+                        error_msg = f"'{key}' must be one of {', '.join(INGEST_DROP_POLICIES)}."
+                    elif key == CONFIG_WIRE_FORMAT and value not in WIRE_FORMATS:
+                        valid = False
+                        error_msg = f"'{key}' must be one of {', '.join(WIRE_FORMATS)}."
+                    elif key == CONFIG_EMERGENCY_ID_MODE and value not in EMERGENCY_ID_MODES:
+                        valid = False
+                        error_msg = f"'{key}' must be one of {', '.join(EMERGENCY_ID_MODES)}."
 
                     if valid:
                         validated_config[key] = value # Assign the valid value from the file
@@ -127,6 +166,14 @@ class ConfigManager:
                 # Key missing from loaded_config, default is already set in validated_config
                 validation_errors.append(f"Config key '{key}' missing. Using default: {default_value}.")
 
+        # Cross-key checks (each key above was validated on its own)
+        min_interval, max_interval = validated_config[CONFIG_MIN_INTERVAL], validated_config[CONFIG_MAX_INTERVAL]
+        if min_interval > max_interval:
+            validation_errors.append(f"Invalid values for '{CONFIG_MIN_INTERVAL}' ({min_interval}) and '{CONFIG_MAX_INTERVAL}' ({max_interval}). "
+                                     f"'{CONFIG_MIN_INTERVAL}' cannot exceed '{CONFIG_MAX_INTERVAL}'. Using defaults: {DEFAULT_MIN_INTERVAL} and {DEFAULT_MAX_INTERVAL}.")
+            validated_config[CONFIG_MIN_INTERVAL] = DEFAULT_MIN_INTERVAL
+            validated_config[CONFIG_MAX_INTERVAL] = DEFAULT_MAX_INTERVAL
+
         # Log all validation errors together
         if validation_errors:
             logger.warning("Configuration validation issues found:")
@@ -44,6 +44,18 @@ DEFAULT_EMERGENCY_MESSAGE = "SOS! Emergency situation detected." # Default text
 DEFAULT_ALERT_RADIUS = 1000         # Default proximity alert radius in meters (0 to disable)
 DEFAULT_ACK_TIMEOUT = 300           # Default time in seconds before an ACK is considered stale
 DEFAULT_ENABLED_BY_DEFAULT = False  # Default setting for auto-starting on launch
+DEFAULT_INGEST_QUEUE_SIZE = 256     # Default bound of the received-packet queue
+DEFAULT_INGEST_DROP_POLICY = "oldest" # Default overflow policy of the received-packet queue
+DEFAULT_WIRE_FORMAT = "json"        # Default encoding of outgoing AERP messages
+DEFAULT_EMERGENCY_ID_MODE = "uuid"  # Default scheme for new emergency IDs
+DEFAULT_DELTA_BROADCASTS = False    # Default setting for sending only changed fields in repeat broadcasts
+DEFAULT_ADAPTIVE_INTERVAL = False   # Default setting for ACK/movement/channel-load driven broadcast pacing
+DEFAULT_MIN_INTERVAL = 10           # Default floor for the adaptive broadcast interval in seconds
+DEFAULT_MAX_INTERVAL = 600          # Default ceiling for the adaptive broadcast interval in seconds
+DEFAULT_MAX_ACK_SESSIONS = 16       # Default number of own emergency sessions whose ACKs are kept
+DEFAULT_ACK_SESSION_MAX_AGE = 86400 # Default seconds an inactive session's ACK record is kept
+DEFAULT_ALERT_COOLDOWN = 300        # Default minimum seconds between proximity alerts for the same node
+DEFAULT_REACK_INTERVAL = 240        # Default seconds before a received emergency is acknowledged again
 
 # --- Configuration File Keys ---
 # These strings are the expected keys within the `aerp_config.json` file.
@@ -53,6 +65,67 @@ CONFIG_MESSAGE = "emergency_message"
 CONFIG_RADIUS = "alert_radius"
 CONFIG_ACK_TIMEOUT = "ack_timeout"
 CONFIG_ENABLED = "plugin_enabled_by_default"
+CONFIG_INGEST_QUEUE_SIZE = "ingest_queue_size"
+CONFIG_INGEST_DROP_POLICY = "ingest_drop_policy"
+CONFIG_WIRE_FORMAT = "wire_format"
+CONFIG_EMERGENCY_ID_MODE = "emergency_id_mode"
+CONFIG_DELTA_BROADCASTS = "delta_broadcasts"
+CONFIG_ADAPTIVE_INTERVAL = "adaptive_interval"
+CONFIG_MIN_INTERVAL = "min_interval"
+CONFIG_MAX_INTERVAL = "max_interval"
+CONFIG_MAX_ACK_SESSIONS = "max_ack_sessions"
+CONFIG_ACK_SESSION_MAX_AGE = "ack_session_max_age"
+CONFIG_ALERT_COOLDOWN = "alert_cooldown"
+CONFIG_REACK_INTERVAL = "reack_interval"
+
+# --- Wire Formats ---
+# Values accepted for CONFIG_WIRE_FORMAT. Both forms are always accepted on receive.
+WIRE_FORMAT_JSON = "json"           # Human-readable, compatible with all AERP versions
+WIRE_FORMAT_BINARY = "binary"       # Compact struct-packed encoding (see aerp/wire.py)
+WIRE_FORMATS = (WIRE_FORMAT_JSON, WIRE_FORMAT_BINARY)
+
+# --- Ingest Drop Policies ---
+# Values accepted for CONFIG_INGEST_DROP_POLICY. Only non-emergency/ACK/CLEAR packets are ever dropped.
+INGEST_DROP_OLDEST = "oldest"       # On overflow, discard the oldest queued droppable packet to make room
+INGEST_DROP_NEWEST = "newest"       # On overflow, discard the arriving droppable packet
+INGEST_DROP_POLICIES = (INGEST_DROP_OLDEST, INGEST_DROP_NEWEST)
+
+# --- Emergency ID Modes ---
+# Values accepted for CONFIG_EMERGENCY_ID_MODE. Both ID forms are always accepted on receive.
+EMERGENCY_ID_MODE_UUID = "uuid"     # 36-character uuid4 string
+EMERGENCY_ID_MODE_SHORT = "short"   # 16 hex characters (8 random bytes)
+EMERGENCY_ID_MODES = (EMERGENCY_ID_MODE_UUID, EMERGENCY_ID_MODE_SHORT)
+SHORT_ID_BYTES = 8                  # Random bytes in a short emergency ID
+
+# --- Delta Broadcasts ---
+DELTA_FULL_EVERY = 10               # With delta broadcasts on, every Nth broadcast is sent in full (resync for late joiners)
+DELTA_FIELDS = ("message", "gps", "battery") # Emergency fields omitted from a delta when unchanged
+
+# --- Thread Control ---
+BROADCAST_STOP_TIMEOUT = 5          # Seconds stop_emergency waits for an in-flight broadcast to finish
+
+# --- Scheduled Tasks ---
+ACK_RETRY_DELAY = 5                 # Seconds before retrying a failed ACK send (multiplied by the attempt number)
+ACK_MAX_RETRIES = 3                 # Retries for a failed ACK send before giving up
+ACK_JITTER_MAX = 3.0                # Upper bound of the random delay before sending an ACK (spreads listeners' ACKs)
+REACK_MIN_GAP = 10                  # Minimum seconds between two ACKs to the same sender, even when it asks again
+STATUS_SNAPSHOT_INTERVAL = 60       # Seconds between periodic status snapshots
+STATUS_SNAPSHOT_MAX_AGE = 0.5       # Seconds a cached get_status() result is served while state is unchanged
+
+# --- Adaptive Broadcast Interval ---
+ADAPTIVE_FAST_BROADCASTS = 3        # Broadcasts sent at the floor interval before settling at 'interval' (no ACKs yet)
+ADAPTIVE_MOVE_THRESHOLD_METERS = 100 # Movement between broadcasts that resets to the fast cadence
+ADAPTIVE_BUSY_CHANNEL_PERCENT = 25  # Channel utilization (%) above which the interval is doubled
+
+# --- Duplicate Suppression ---
+DEDUP_CACHE_SIZE = 1024             # Received (from, packet id) keys remembered to drop rebroadcast copies
+DEDUP_TTL = 600                     # Seconds a received packet key is remembered
+
+# --- Proximity Alerts ---
+ALERT_HYSTERESIS = 0.1              # A node inside the alert radius must move beyond radius * (1 + this) to leave it
 
 # --- GPS Constants ---
 EARTH_RADIUS_METERS = 6371000       # Approximate radius of the Earth in meters for distance calculations
+METERS_PER_DEGREE = 111194.93       # Meters per degree of latitude (pi * EARTH_RADIUS_METERS / 180)
+FAST_DISTANCE_MAX_APPROX_METERS = 20000 # Thresholds up to this use the equirectangular approximation (<0.01% error)
+FAST_DISTANCE_EXACT_BAND = 0.005    # Approximations within +/-0.5% of the threshold are re-checked with Haversine
@@ -0,0 +1,112 @@
+# aerp/expiry.py
+# Copyright (C) 2025 Akita Engineering / www.akitaengineering.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Expiry-ordered index for the Akita Emergency Response Plugin (AERP).
+
+Tracks a deadline per key in a min-heap so stale acknowledgements and received
+emergencies can be expired in O(expired · log n) at their real deadline,
+instead of scanning every entry on a fixed timer.
+"""
+
+import heapq
+import itertools
+import threading
+
+
+class ExpiryIndex:
+    """
+    Min-heap of (deadline, key) with lazy deletion.
+
+    Each key has at most one current deadline. Refreshing or discarding a key
+    leaves its old heap entry in place; such stale entries are skipped when they
+    reach the top, and the heap is rebuilt if they come to dominate it.
+    All methods are thread-safe.
+    """
+
+    def __init__(self):
+        self._heap = [] # (deadline, counter, key)
+        self._deadlines = {} # key -> current deadline
+        self._counter = itertools.count() # Tie-breaker so keys are never compared
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def __contains__(self, key):
+        return key in self._deadlines
+
+    def touch(self, key, deadline):
+        """
+        Sets (or moves) the deadline of a key.
+
+        Args:
+            key: Any hashable key.
+            deadline (float): Expiry time (same clock as the `now` passed to `pop_expired`).
+        """
+        with self._lock:
+            self._deadlines[key] = deadline
+            heapq.heappush(self._heap, (deadline, next(self._counter), key))
+            if len(self._heap) > 2 * len(self._deadlines) + 64:
+                self._compact()
+
+    def discard(self, key):
+        """Removes a key (no-op if absent)."""
+        with self._lock:
+            self._deadlines.pop(key, None)
+
+    def next_deadline(self):
+        """
+        Returns the earliest current deadline.
+
+        Returns:
+            float | None: The deadline, or None if the index is empty.
+        """
+        with self._lock:
+            self._drop_stale_top()
+            return self._heap[0][0] if self._heap else None
+
+    def pop_expired(self, now):
+        """
+        Removes and returns every key whose deadline is at or before `now`.
+
+        Args:
+            now (float): The current time.
+
+        Returns:
+            list: The expired keys, earliest deadline first.
+        """
+        expired = []
+        with self._lock:
+            while self._heap:
+                self._drop_stale_top()
+                if not self._heap or self._heap[0][0] > now:
+                    break
+                _, _, key = heapq.heappop(self._heap)
+                del self._deadlines[key]
+                expired.append(key)
+        return expired
+
+    def _drop_stale_top(self):
+        """Pops heap entries that no longer match their key's current deadline (caller holds the lock)."""
+        heap, deadlines = self._heap, self._deadlines
+        while heap and deadlines.get(heap[0][2]) != heap[0][0]:
+            heapq.heappop(heap)
+
+    def _compact(self):
+        """Rebuilds the heap from the current deadlines (caller holds the lock)."""
+        self._heap = [(deadline, next(self._counter), key) for key, deadline in self._deadlines.items()]
+        heapq.heapify(self._heap)
@@ -0,0 +1,276 @@
+# aerp/ingest.py
+# Copyright (C) 2025 Akita Engineering / www.akitaengineering.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Asynchronous, priority-aware packet ingest for the Akita Emergency Response Plugin (AERP).
+
+The Meshtastic receive callback runs on the radio reader thread. Handing each
+packet to a bounded queue drained by a dedicated worker keeps that thread free
+of JSON decoding, logging and outbound sends. Packets are dispatched by priority
+class so emergencies and all-clears are always handled before position chatter.
+"""
+
+import collections
+import logging
+import threading
+import time
+
+from .constants import INGEST_DROP_OLDEST, INGEST_DROP_POLICIES
+
+# Get a logger specific to this module
+logger = logging.getLogger(__name__)
+
+# --- Priority Classes ---
+# Lower value = dispatched first. Classes at or above PRIORITY_AERP may be dropped on overflow.
+PRIORITY_EMERGENCY = 0  # AERP_EMERGENCY and AERP_CLEAR
+PRIORITY_ACK = 1        # AERP_ACK
+PRIORITY_AERP = 2       # Anything else on the AERP port (shared PRIVATE_APP traffic)
+PRIORITY_BULK = 3       # Everything else (POSITION_APP, text, telemetry, ...)
+PRIORITY_NAMES = {
+    PRIORITY_EMERGENCY: "emergency",
+    PRIORITY_ACK: "ack",
+    PRIORITY_AERP: "aerp_other",
+    PRIORITY_BULK: "bulk",
+}
+
+
+class _LatencyStats:
+    """Running latency counters for one priority class (times in seconds)."""
+    __slots__ = ("count", "queue_total", "queue_max", "total_total", "total_max")
+
+    def __init__(self):
+        self.count = 0
+        self.queue_total = 0.0 # Sum of enqueue -> dispatch delays
+        self.queue_max = 0.0
+        self.total_total = 0.0 # Sum of enqueue -> handler finished delays
+        self.total_max = 0.0
+
+    def record(self, queue_delay, total_delay):
+        self.count += 1
+        self.queue_total += queue_delay
+        self.total_total += total_delay
+        if queue_delay > self.queue_max:
+            self.queue_max = queue_delay
+        if total_delay > self.total_max:
+            self.total_max = total_delay
+
+    def as_dict(self):
+        count = self.count or 1
+        return {
+            "count": self.count,
+            "avg_queue_ms": round(self.queue_total / count * 1000, 3),
+            "max_queue_ms": round(self.queue_max * 1000, 3),
+            "avg_total_ms": round(self.total_total / count * 1000, 3),
+            "max_total_ms": round(self.total_max * 1000, 3),
+        }
+
+
+class IngestQueue:
+    """
+    Bounded priority queue of received packets, drained by a dedicated worker thread.
+
+    Each packet is classified on arrival into a priority class (see PRIORITY_*).
+    The worker always takes the oldest packet of the most urgent non-empty class.
+    Only EMERGENCY/CLEAR and ACK packets are never dropped; everything else
+    (including unrecognized traffic on the AERP port) is droppable. When the queue
+    is full, the drop policy decides what goes:
+
+    - INGEST_DROP_OLDEST: the oldest packet of the least urgent droppable class is
+      discarded to make room for the incoming packet.
+    - INGEST_DROP_NEWEST: an incoming droppable packet is discarded; an incoming
+      EMERGENCY/CLEAR/ACK still evicts the oldest droppable packet.
+
+    If only non-droppable packets are queued, an incoming droppable packet is dropped,
+    while an incoming non-droppable packet is still accepted (the bound is exceeded
+    and counted).
+
+    Attributes:
+        maxsize (int): Nominal queue bound.
+        drop_policy (str): One of INGEST_DROP_POLICIES.
+        stats (dict): Counters: enqueued, processed, dropped, critical_overflow, errors.
+    """
+
+    def __init__(self, handler, classify, maxsize=256, drop_policy=INGEST_DROP_OLDEST, name="AERPIngestThread"):
+        """
+        Initializes the queue. Call `start()` to launch the worker.
+
+        Args:
+            handler (callable): Called as handler(packet, interface) on the worker thread.
+            classify (callable): Called as classify(packet) on enqueue; returns one of
+                                 the PRIORITY_* classes.
+            maxsize (int): Nominal queue bound. Defaults to 256.
+            drop_policy (str): Overflow policy, one of INGEST_DROP_POLICIES. Defaults to INGEST_DROP_OLDEST.
+            name (str): Worker thread name.
+        """
+        self.maxsize = max(1, int(maxsize))
+        self.drop_policy = drop_policy if drop_policy in INGEST_DROP_POLICIES else INGEST_DROP_OLDEST
+        self._handler = handler
+        self._classify = classify
+        self._name = name
+        self._queues = {priority: collections.deque() for priority in PRIORITY_NAMES}
+        self._priorities = sorted(PRIORITY_NAMES) # Most urgent first
+        self._droppable = [p for p in reversed(self._priorities) if p >= PRIORITY_AERP] # Least urgent first
+        self._size = 0
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+        self._latency = {priority: _LatencyStats() for priority in PRIORITY_NAMES}
+        self._ack_latency = _LatencyStats() # ACK decided -> sent (queue), packet enqueued -> ACK sent (total)
+        self.dispatching_since = None # enqueued_at (monotonic) of the packet the handler is processing
+        self.stats = {"enqueued": 0, "processed": 0, "dropped": 0, "critical_overflow": 0, "errors": 0}
+
+    def __len__(self):
+        return self._size
+
+    def start(self):
+        """Starts the worker thread (no-op if already running)."""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._worker, daemon=True, name=self._name)
+        self._thread.start()
+        logger.debug(f"{self._name} started (maxsize={self.maxsize}).")
+
+    def stop(self, timeout=2.0):
+        """
+        Stops the worker after it finishes the packet it is currently handling.
+
+        Packets still queued are discarded.
+
+        Args:
+            timeout (float): Seconds to wait for the worker to exit.
+        """
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def put(self, packet, interface):
+        """
+        Enqueues a packet in O(1). Safe to call from the radio reader thread.
+
+        Args:
+            packet (dict): The received packet.
+            interface: The interface that received it.
+
+        Returns:
+            bool: True if the packet was queued, False if it was dropped.
+        """
+        priority = self._classify(packet)
+        if priority not in self._queues:
+            priority = PRIORITY_BULK
+        with self._cond:
+            if not self._admit(priority, (time.monotonic(), packet, interface)):
+                return False
+            self._cond.notify()
+        return True
+
+    def _admit(self, priority, entry):
+        """
+        Applies the overflow policy and appends `entry` to its class queue.
+
+        The caller must own the queue state (hold the lock, or be on the owning event loop).
+
+        Args:
+            priority (int): The entry's PRIORITY_* class.
+            entry (tuple): (enqueued_at, packet, interface).
+
+        Returns:
+            bool: True if the entry was queued, False if it was dropped.
+        """
+        if self._size >= self.maxsize:
+            droppable = priority >= PRIORITY_AERP
+            if droppable and self.drop_policy != INGEST_DROP_OLDEST:
+                self.stats["dropped"] += 1
+                return False
+            victim = next((p for p in self._droppable if self._queues[p]), None)
+            if victim is not None:
+                self._queues[victim].popleft() # Drop the oldest droppable packet to make room
+                self._size -= 1
+                self.stats["dropped"] += 1
+            elif droppable:
+                self.stats["dropped"] += 1
+                return False
+            else:
+                self.stats["critical_overflow"] += 1
+        self._queues[priority].append(entry)
+        self._size += 1
+        self.stats["enqueued"] += 1
+        return True
+
+    def _pop(self):
+        """Removes and returns (priority, entry) for the most urgent queued packet (caller owns the state)."""
+        priority = next(p for p in self._priorities if self._queues[p])
+        self._size -= 1
+        return priority, self._queues[priority].popleft()
+
+    def record_ack_sent(self, received_at, decided_at):
+        """
+        Records the latency of an ACK sent for a queued packet (reported as 'ack_sent').
+
+        ACKs are sent after a random delay, so they finish after their packet's handler.
+
+        Args:
+            received_at (float): `dispatching_since` of the packet being acknowledged.
+            decided_at (float): time.monotonic() when the ACK was scheduled.
+        """
+        sent_at = time.monotonic()
+        with self._cond:
+            self._ack_latency.record(sent_at - decided_at, sent_at - received_at)
+
+    def latency_stats(self):
+        """
+        Returns per-class latency metrics.
+
+        `queue` is the time a packet waited before dispatch; `total` also includes
+        the handler itself (for emergencies that is receipt to the ACK decision, since
+        the ACK is sent later). The 'ack_sent' entry covers the ACKs themselves: `queue`
+        is the delay between deciding and sending, `total` is receipt to ACK dispatch.
+
+        Returns:
+            dict: {class_name: {count, avg_queue_ms, max_queue_ms, avg_total_ms, max_total_ms}}
+        """
+        with self._cond:
+            stats = {PRIORITY_NAMES[p]: stats.as_dict() for p, stats in self._latency.items()}
+            stats["ack_sent"] = self._ack_latency.as_dict()
+            return stats
+
+    def _worker(self):
+        """Worker loop: dispatches the most urgent queued packet, one at a time."""
+        while True:
+            with self._cond:
+                while self._running and not self._size:
+                    self._cond.wait()
+                if not self._running:
+                    break
+                priority, (enqueued_at, packet, interface) = self._pop()
+            dispatched_at = time.monotonic()
+            self.dispatching_since = enqueued_at
+            try:
+                self._handler(packet, interface)
+            except Exception as e:
+                # Keep the worker alive no matter what a single packet does
+                self.stats["errors"] += 1
+                logger.exception(f"Error handling queued packet: {e}")
+            self.dispatching_since = None
+            finished_at = time.monotonic()
+            with self._cond:
+                self._latency[priority].record(dispatched_at - enqueued_at, finished_at - enqueued_at)
+                self.stats["processed"] += 1
+        logger.debug(f"{self._name} stopped.")
@@ -0,0 +1,128 @@
+# aerp/logutil.py
+# Copyright (C) 2025 Akita Engineering / www.akitaengineering.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Logging helpers for the Akita Emergency Response Plugin (AERP).
+
+Per-packet code logs with lazy %-style arguments, so nothing is formatted for
+disabled levels. `EmergencyReport` renders a received emergency as one
+multi-line record (with the fields also attached as structured data), and
+`enable_queue_logging` moves handler I/O to a background thread so console or
+file writes never run on the radio thread.
+"""
+
+import logging
+import logging.handlers
+import queue
+
+from .status import format_timestamp
+
+
+class EmergencyReport:
+    """
+    Lazily formatted report of a received emergency.
+
+    Passed as a logging argument: the text is only built if a handler emits the
+    record. `fields` is attached to the record as `record.aerp` for handlers that
+    want structured data (e.g. a JSON formatter).
+    """
+    __slots__ = ("fields",)
+
+    def __init__(self, **fields):
+        """
+        Initializes the report.
+
+        Args:
+            **fields: node_id, emergency_id, message, gps (dict or None), battery, timestamp.
+        """
+        self.fields = fields
+
+    def __str__(self):
+        f = self.fields
+        gps = f.get("gps")
+        if isinstance(gps, dict) and 'latitude' in gps and 'longitude' in gps:
+            gps_text = f"Lat {gps['latitude']:.5f}, Lon {gps['longitude']:.5f} (Alt: {gps.get('altitude', 'N/A')})"
+        else:
+            gps_text = "Not Available or Invalid Format"
+        battery = f.get("battery")
+        timestamp = format_timestamp(f.get("timestamp"))
+        if timestamp == "N/A":
+            timestamp = f"{f.get('timestamp')} (Could not format)"
+        return (f"*** EMERGENCY MESSAGE RECEIVED from {f.get('node_id')} (ID: {f.get('emergency_id')}) ***\n"
+                f"    Message: {f.get('message')}\n"
+                f"    GPS: {gps_text}\n"
+                f"    Battery: {battery if battery is not None else 'N/A'}%\n"
+                f"    Timestamp: {timestamp}")
+
+
+def log_emergency_report(log, report, level=logging.WARNING):
+    """
+    Emits an `EmergencyReport` as a single record.
+
+    Args:
+        log (logging.Logger): The logger to emit on.
+        report (EmergencyReport): The report.
+        level (int): Log level. Defaults to WARNING.
+    """
+    if log.isEnabledFor(level):
+        log.log(level, "%s", report, extra={"aerp": report.fields})
+
+
+def enable_queue_logging(target=None):
+    """
+    Routes a logger's records through a queue to a background listener thread.
+
+    The logger's current handlers are moved behind a `QueueListener`; the logger
+    itself gets a single `QueueHandler`, so emitting a record only enqueues it.
+    Handler levels are still respected.
+
+    Args:
+        target (logging.Logger, optional): The logger whose handlers to move. Defaults to the root logger.
+
+    Returns:
+        logging.handlers.QueueListener | None: The running listener (pass it to
+            `disable_queue_logging`), or None if the logger has no handlers.
+    """
+    target = target if target is not None else logging.getLogger()
+    handlers = list(target.handlers)
+    if not handlers:
+        return None
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    for handler in handlers:
+        target.removeHandler(handler)
+    target.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener.start()
+    return listener
+
+
+def disable_queue_logging(listener, target=None):
+    """
+    Flushes queued records and moves the handlers back onto the logger.
+
+    Args:
+        listener (logging.handlers.QueueListener | None): As returned by `enable_queue_logging`.
+        target (logging.Logger, optional): The same logger passed to `enable_queue_logging`.
+    """
+    if listener is None:
+        return
+    target = target if target is not None else logging.getLogger()
+    listener.stop() # Processes every record already queued
+    for handler in list(target.handlers):
+        if isinstance(handler, logging.handlers.QueueHandler) and handler.queue is listener.queue:
+            target.removeHandler(handler)
+    for handler in listener.handlers:
+        target.addHandler(handler)
@@ -0,0 +1,143 @@
+# aerp/packet.py
+# Copyright (C) 2025 Akita Engineering / www.akitaengineering.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Received-packet parsing for the Akita Emergency Response Plugin (AERP).
+
+`parse_packet` walks a meshtastic-python packet dictionary once and returns a
+`ParsedPacket`: sender, port, the decoded AERP message (JSON or binary) and
+the sender's location. Every stage of `AERP.handle_incoming` works from that
+record instead of re-reading the packet dictionary.
+"""
+
+import json
+import logging
+
+from .utils import format_node_id, get_location_from_payload, is_position_port
+from .wire import decode_message, is_binary_message, WireFormatError
+
+# Get a logger specific to this module
+logger = logging.getLogger(__name__)
+
+_TYPE_TAG_PREFIX = b'"AERP_' # Every AERP JSON message type value starts with this
+
+
+class ParsedPacket:
+    """
+    A received packet, normalized in one pass.
+
+    Attributes:
+        packet (dict): The original packet dictionary.
+        from_node_num (int | None): Sender node number.
+        port_num (int | str | None): Port number (int or string depending on source).
+        payload: The raw payload (bytes, or a dict if meshtastic-python decoded it).
+        is_aerp (bool): True if the packet arrived on the AERP port.
+        is_position (bool): True for POSITION_APP packets.
+        message (dict | None): The decoded AERP message, if the payload is one.
+        lat, lon (float | None): Sender location in decimal degrees, from a position
+                                 report or the 'gps' of a (possibly bytes-encoded) message.
+    """
+    __slots__ = ("packet", "from_node_num", "port_num", "payload", "is_aerp", "is_position",
+                 "message", "lat", "lon")
+
+    def __init__(self, packet, from_node_num, port_num, payload, is_aerp, is_position,
+                 message=None, lat=None, lon=None):
+        self.packet = packet
+        self.from_node_num = from_node_num
+        self.port_num = port_num
+        self.payload = payload
+        self.is_aerp = is_aerp
+        self.is_position = is_position
+        self.message = message
+        self.lat = lat
+        self.lon = lon
+
+    @property
+    def has_location(self):
+        """True if the sender's location is known."""
+        return self.lat is not None and self.lon is not None
+
+
+def parse_packet(packet, aerp_port, my_node_num=None):
+    """
+    Parses a received packet into a `ParsedPacket`.
+
+    Classification is by port number first: payloads on other ports are never
+    decoded (only dictionaries already decoded by meshtastic-python are checked
+    for a location). Payloads on the AERP port are peeked (binary magic byte,
+    JSON type tag) before being decoded. Our own packets are not decoded either;
+    only their position is extracted.
+
+    Args:
+        packet (dict): The packet dictionary received from meshtastic-python.
+        aerp_port (int): The configured AERP port number.
+        my_node_num (int, optional): This node's number.
+
+    Returns:
+        ParsedPacket | None: The parsed packet, or None if it has no decoded payload.
+    """
+    decoded_part = packet.get('decoded') if isinstance(packet, dict) else None
+    if not isinstance(decoded_part, dict) or 'payload' not in decoded_part:
+        return None
+
+    port_num = decoded_part.get('portNum')
+    payload = decoded_part['payload']
+    from_node_num = packet.get('from')
+    is_aerp = port_num == aerp_port
+    is_position = is_position_port(port_num)
+    parsed = ParsedPacket(packet, from_node_num, port_num, payload, is_aerp, is_position)
+
+    location_source = payload
+    if is_aerp and from_node_num != my_node_num:
+        parsed.message = location_source = decode_aerp_payload(payload, from_node_num)
+    if isinstance(location_source, dict): # Only decoded payloads can carry a location
+        parsed.lat, parsed.lon = get_location_from_payload(location_source, is_position)
+    return parsed
+
+
+def decode_aerp_payload(payload, from_node_num=None):
+    """
+    Decodes a payload received on the AERP port, peeking at it before a full decode.
+
+    Binary payloads are recognised by their magic byte. Bytes payloads are only
+    handed to the JSON decoder if they look like a JSON object carrying an AERP
+    type tag, so stray traffic on the port is rejected without decoding it.
+
+    Args:
+        payload: The raw packet payload (bytes, or a dict if already decoded).
+        from_node_num (int, optional): Sender node number (for logs).
+
+    Returns:
+        dict | None: The message dictionary, or None if the payload is not an AERP message.
+    """
+    if isinstance(payload, dict):
+        return payload # Already a dictionary
+    if is_binary_message(payload):
+        try:
+            return decode_message(payload)
+        except WireFormatError as e:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Payload from %s looked like binary AERP but failed to decode: %s", format_node_id(from_node_num), e)
+            return None
+    if isinstance(payload, bytes) and payload.lstrip()[:1] == b'{' and _TYPE_TAG_PREFIX in payload:
+        try:
+            message = json.loads(payload.decode('utf-8'))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Payload from %s is bytes but not valid JSON/UTF-8.", format_node_id(from_node_num))
+            return None
+        return message if isinstance(message, dict) else None
+    return None
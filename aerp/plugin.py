@@ -25,9 +25,7 @@ interaction with the Meshtastic network.
 import time
 import threading
 import logging
-import uuid
 import json # Needed for sending JSON payloads
-from datetime import datetime # For formatting timestamps
 
 # Import pubsub explicitly if direct subscription is needed, though meshtastic usually handles it
 # from pubsub import pub
@@ -35,14 +33,36 @@ from datetime import datetime # For formatting timestamps
 import meshtastic.util # For PortNum constants if needed
 from .constants import (
     MSG_TYPE_EMERGENCY, MSG_TYPE_ACK, MSG_TYPE_CLEAR,
-    CONFIG_INTERVAL, CONFIG_PORT, CONFIG_MESSAGE, CONFIG_RADIUS, CONFIG_ACK_TIMEOUT
+    CONFIG_INTERVAL, CONFIG_PORT, CONFIG_MESSAGE, CONFIG_RADIUS, CONFIG_ACK_TIMEOUT,
+    CONFIG_INGEST_QUEUE_SIZE, CONFIG_INGEST_DROP_POLICY, CONFIG_WIRE_FORMAT, WIRE_FORMAT_BINARY, CONFIG_EMERGENCY_ID_MODE,
+    CONFIG_DELTA_BROADCASTS, DELTA_FULL_EVERY, DELTA_FIELDS,
+    CONFIG_ADAPTIVE_INTERVAL, CONFIG_MIN_INTERVAL, CONFIG_MAX_INTERVAL, BROADCAST_STOP_TIMEOUT,
+    ACK_RETRY_DELAY, ACK_MAX_RETRIES, STATUS_SNAPSHOT_INTERVAL,
+    CONFIG_MAX_ACK_SESSIONS, CONFIG_ACK_SESSION_MAX_AGE, STATUS_SNAPSHOT_MAX_AGE,
+    CONFIG_ALERT_COOLDOWN, ALERT_HYSTERESIS, DEDUP_CACHE_SIZE, DEDUP_TTL,
+    CONFIG_REACK_INTERVAL, REACK_MIN_GAP, ACK_JITTER_MAX
 )
-from .utils import calculate_distance, get_location_from_packet, format_node_id
+from .utils import calculate_distance_fast, format_node_id, generate_emergency_id
+from .proximity import ProximityEngine, SelfPositionCache, ProximityAlertTracker, ALERT_ENTER, ALERT_EXIT
+from .wire import encode_message, is_binary_message, peek_message_type, WireFormatError
+from .packet import parse_packet
+from .scheduling import AdaptiveInterval, TaskScheduler
+from .expiry import ExpiryIndex
+from .store import AckStore, EmergencyTable, ReceivedEmergency, DuplicateCache
+from .status import StatusSnapshot, render_status
+from .logutil import EmergencyReport, log_emergency_report
+from .ackpolicy import AckPolicy, build_ack_filter
+from .ingest import IngestQueue, PRIORITY_EMERGENCY, PRIORITY_ACK, PRIORITY_AERP, PRIORITY_BULK
 from .config import ConfigManager # Type hinting
 
 # Get a logger specific to this module
 logger = logging.getLogger(__name__)
 
+# Byte forms of the message type tags, for peeking into undecoded payloads
+_EMERGENCY_TAG = MSG_TYPE_EMERGENCY.encode('utf-8')
+_ACK_TAG = MSG_TYPE_ACK.encode('utf-8')
+_CLEAR_TAG = MSG_TYPE_CLEAR.encode('utf-8')
+
 class AERP:
     """
     Akita Emergency Response Plugin Core Logic.
@@ -54,13 +74,18 @@ class AERP:
         interface: The Meshtastic interface object.
         config (ConfigManager): The configuration manager instance.
         emergency_active (bool): True if the emergency broadcast is currently active.
-        last_emergency_id (str | None): The UUID of the most recent emergency session started by this node.
-        acknowledgements (dict): Stores acknowledgements received for emergencies initiated by this node.
-                                  Format: { emergency_id: {acked_node_num: timestamp} }
-        active_emergency_info (dict): Stores info about *active* emergencies received from *other* nodes.
-                                      Format: { sender_node_num: {message_id, timestamp, message, gps, battery} }
+        last_emergency_id (str | None): The ID (uuid4 or short hex) of the most recent emergency session started by this node.
+        acknowledgements (AckStore): Stores acknowledgements received for emergencies initiated by this node,
+                                     bounded by session count and age. Reads like { emergency_id: {acked_node_num: timestamp} }
+        active_emergency_info (EmergencyTable): Stores info about *active* emergencies received from *other* nodes.
+                                                Format: { sender_node_num: ReceivedEmergency }
         my_node_num (int | None): The Meshtastic node number of this device.
         my_node_id (str): The formatted node ID string (e.g., "!aabbccdd") of this device.
+        proximity (ProximityEngine): Last known positions of other nodes, used for batch distance queries.
+        self_position (SelfPositionCache): Cached position of this node.
+        ingest (IngestQueue): Queue between the radio callback and `handle_incoming`.
+        scheduler (TaskScheduler): Single thread running broadcasts, cleanup, ACK retries and status snapshots.
+        status_snapshot (StatusSnapshot | None): Most recent periodic status snapshot (see `status`).
     """
     def __init__(self, interface, config_manager: ConfigManager):
         """
@@ -73,25 +98,54 @@ class AERP:
         self.interface = interface
         self.config = config_manager
         self.emergency_active = False
-        self._emergency_thread = None # Internal thread reference
+        self._broadcast_task = None # Scheduled broadcast task of the active session
+        self._broadcast_state = {} # Per-session broadcast state (ID, seq, delta and adaptive state)
+        self._broadcast_send_lock = threading.Lock() # Orders the last broadcast before the CLEAR
         self._emergency_lock = threading.Lock() # Protects access to emergency_active and related state
         self.last_emergency_id = None
         self.last_sent_emergency_id = None
-        self.acknowledgements = {}
-        self.active_emergency_info = {}
+        self.acknowledgements = AckStore(max_sessions=self.config.get(CONFIG_MAX_ACK_SESSIONS))
+        self.active_emergency_info = EmergencyTable()
+        self.duplicates = DuplicateCache(capacity=DEDUP_CACHE_SIZE, ttl=DEDUP_TTL) # Recently handled (from, packet id) keys
+        self.ack_policy = AckPolicy(reack_interval=self.config.get(CONFIG_REACK_INTERVAL), min_gap=REACK_MIN_GAP,
+                                    max_jitter=ACK_JITTER_MAX) # When received emergencies are (re-)acknowledged
         self.my_node_num = None
         self.my_node_id = "Unknown"
+        # Size grid cells to the alert radius so a radius query touches ~9 cells
+        self.proximity = ProximityEngine(cell_size_m=self.config.get(CONFIG_RADIUS) or 1000)
+        self.self_position = SelfPositionCache(interface)
+        self.proximity_alerts = ProximityAlertTracker(hysteresis=ALERT_HYSTERESIS, cooldown=self.config.get(CONFIG_ALERT_COOLDOWN))
+        self.ingest = self._create_ingest()
+        self.scheduler = self._create_scheduler()
+        self._expiry = ExpiryIndex() # Deadlines of tracked ACKs, ACK sessions and received emergencies
+        self.status_snapshot = None # Last periodic status() result, see _status_snapshot_tick
+        self._status = None # (change key, monotonic build time, StatusSnapshot) served by status()
+        self._status_lock = threading.Lock() # Serializes snapshot rebuilds
+        self._rendered_status = None # (StatusSnapshot, formatted dict) served by get_status()
 
         # Attempt to get initial node info
         self._update_node_info()
         if not self.my_node_num:
              logger.warning("Could not get initial node info. Will retry on connection.")
 
-        # Start background task for cleaning up stale data
-        # Use daemon=True so this thread doesn't prevent program exit
-        self._cleanup_thread = threading.Thread(target=self._background_cleanup, daemon=True, name="AERPCleanupThread")
-        self._cleanup_thread.start()
-        logger.debug("AERP background cleanup thread started.")
+        # Periodic housekeeping runs on the shared scheduler thread (daemon, won't block exit)
+        self._cleanup_task = self.scheduler.schedule("cleanup", self._background_cleanup, delay=self._cleanup_interval())
+        self.scheduler.schedule("proximity_prune", self._prune_positions, delay=self._cleanup_interval())
+        self.scheduler.schedule("status_snapshot", self._status_snapshot_tick, delay=STATUS_SNAPSHOT_INTERVAL, interval=STATUS_SNAPSHOT_INTERVAL)
+        self.scheduler.start()
+        logger.debug("AERP scheduler started (cleanup, status snapshots).")
+
+        # Start the worker that drains received packets off the radio thread
+        self.ingest.start()
+
+    def _create_ingest(self):
+        """Creates the queue between the radio callback and `handle_incoming` (overridden by AsyncAERP)."""
+        return IngestQueue(self.handle_incoming, self._classify_packet, maxsize=self.config.get(CONFIG_INGEST_QUEUE_SIZE),
+                           drop_policy=self.config.get(CONFIG_INGEST_DROP_POLICY))
+
+    def _create_scheduler(self):
+        """Creates the scheduler for broadcasts and housekeeping tasks (overridden by AsyncAERP)."""
+        return TaskScheduler()
 
     def _update_node_info(self):
         """Attempts to update my_node_num and my_node_id from the interface."""
@@ -121,8 +175,8 @@ class AERP:
         """
         Initiates the emergency broadcast state for this node.
 
-        Generates a new unique ID for this emergency session and starts the
-        broadcast thread.
+        Generates a new unique ID for this emergency session and schedules the
+        first broadcast immediately.
 
         Returns:
             bool: True if the emergency state was successfully started, False otherwise.
@@ -139,22 +193,29 @@ class AERP:
                 if not self._update_node_info():
                      return False
 
-            # Generate a unique ID for this specific emergency event
-            self.last_emergency_id = str(uuid.uuid4())
+            # Generate a unique ID for this specific emergency event (uuid4 or short, per config).
+            # IDs we already hold ACKs for, or track from other nodes, are never reused.
+            known_ids = set(self.acknowledgements)
+            known_ids.update(info.message_id for info in self.active_emergency_info.values())
+            self.last_emergency_id = generate_emergency_id(self.config.get(CONFIG_EMERGENCY_ID_MODE), known_ids)
             self.emergency_active = True
             # Initialize the acknowledgement dictionary for this new emergency ID
-            self.acknowledgements[self.last_emergency_id] = {}
+            self.acknowledgements.open_session(self.last_emergency_id)
+            self._track_expiry(("session", self.last_emergency_id), time.time() + self.config.get(CONFIG_ACK_SESSION_MAX_AGE))
             self.last_sent_emergency_id = self.last_emergency_id
 
             logger.warning(f"--- EMERGENCY BROADCAST STARTED (ID: {self.last_emergency_id}) ---")
             logger.info(f"Broadcasting on port {self.config.get(CONFIG_PORT)} every {self.config.get(CONFIG_INTERVAL)} seconds.")
 
-            # Start the broadcast thread
-            if self._emergency_thread is None or not self._emergency_thread.is_alive():
-                self._emergency_thread = threading.Thread(target=self._send_emergency_broadcast_loop, name="AERPBroadcastThread")
-                self._emergency_thread.start()
-            else:
-                 logger.warning("Emergency thread already running? This shouldn't happen.")
+            # Schedule the broadcasts (the first one goes out right away)
+            self.scheduler.cancel(self._broadcast_task)
+            self._broadcast_state = {
+                "emergency_id": self.last_emergency_id,
+                "seq": 0,                 # Broadcast sequence number (only sent in delta mode)
+                "last_sent_fields": None, # DELTA_FIELDS values of the previous broadcast
+                "adaptive": None,         # AdaptiveInterval, when enabled
+            }
+            self._broadcast_task = self.scheduler.schedule("broadcast", self._broadcast_tick)
 
             return True
 
@@ -177,7 +238,7 @@ class AERP:
         with self._emergency_lock:
             if self.emergency_active:
                 was_active = True
-                self.emergency_active = False # Signal the thread to stop
+                self.emergency_active = False # Signal the broadcast task to stop
                 emergency_id_to_clear = self.last_emergency_id # Store ID before clearing
                 self.last_emergency_id = None # Clear the active ID immediately
                 logger.warning(f"--- EMERGENCY BROADCAST STOPPING (Last ID: {emergency_id_to_clear}) ---")
@@ -185,17 +246,13 @@ class AERP:
                 logger.info("Emergency broadcast is not currently active.")
                 return False # Nothing to stop
 
-        # Wait for the broadcast thread to finish its current loop and exit
-        if self._emergency_thread and self._emergency_thread.is_alive():
-            logger.debug("Waiting for broadcast thread to finish...")
-            # Calculate a reasonable timeout based on interval
-            timeout_duration = self.config.get(CONFIG_INTERVAL, 10) + 2 # Interval + buffer
-            self._emergency_thread.join(timeout=timeout_duration)
-            if self._emergency_thread.is_alive():
-                logger.warning("Emergency broadcast thread did not stop gracefully within timeout.")
-            else:
-                 logger.debug("Broadcast thread finished.")
-            self._emergency_thread = None
+        # Cancel pending broadcasts, then wait out a broadcast that is being sent right now
+        self.scheduler.cancel(self._broadcast_task)
+        self._broadcast_task = None
+        if self._broadcast_send_lock.acquire(timeout=BROADCAST_STOP_TIMEOUT):
+            self._broadcast_send_lock.release()
+        else:
+            logger.warning("In-flight emergency broadcast did not finish within timeout.")
 
         # Send the clear message if requested and possible
         if was_active and send_clear and emergency_id_to_clear:
@@ -207,11 +264,10 @@ class AERP:
              logger.warning("Wanted to send CLEAR, but no emergency ID was recorded.")
 
 
-        # Optional: Clear acknowledgements for the stopped session? Or keep for review?
-        # Decision: Keep them for review via status command until they time out naturally.
-        # if emergency_id_to_clear in self.acknowledgements:
-        #     logger.debug(f"Clearing acknowledgements for stopped emergency ID {emergency_id_to_clear}")
-        #     del self.acknowledgements[emergency_id_to_clear]
+        # Keep the stopped session's acknowledgements for review; the ACK store evicts
+        # it later by age or when newer sessions need the room.
+        if emergency_id_to_clear:
+            self.acknowledgements.close_session(emergency_id_to_clear)
 
         return was_active
 
@@ -240,177 +296,332 @@ class AERP:
         port_num = self.config.get(CONFIG_PORT)
 
         logger.info(f"Sending ALL CLEAR for emergency ID {emergency_id} on port {port_num}")
-        logger.debug(f"Clear Payload: {message_payload}")
+        logger.debug("Clear Payload: %s", message_payload)
+
+        # Send as a broadcast message on the designated AERP port
+        # Clear messages are typically fire-and-forget
+        self._send_message(message_payload, "CLEAR", wantAck=False)
+
+    def _encode_payload(self, message_payload, label):
+        """
+        Encodes an outgoing message according to the configured wire format.
+
+        Args:
+            message_payload (dict): The AERP message.
+            label (str): Message label for logging (e.g. "ACK").
+
+        Returns:
+            bytes | dict: Binary-encoded bytes in 'binary' mode, otherwise the dict itself
+                          (meshtastic-python serializes it). Falls back to the dict if the
+                          message cannot be binary encoded.
+        """
+        if self.config.get(CONFIG_WIRE_FORMAT) == WIRE_FORMAT_BINARY:
+            try:
+                return encode_message(message_payload)
+            except WireFormatError as e:
+                logger.warning(f"Cannot send {label} in binary wire format ({e}). Falling back to JSON.")
+        return message_payload
+
+    def _send_message(self, message_payload, label, **send_kwargs):
+        """
+        Sends an AERP message on the AERP port using the configured wire format.
+
+        Args:
+            message_payload (dict): The AERP message.
+            label (str): Message label for logging (e.g. "EMERGENCY").
+            **send_kwargs: Extra arguments for interface.sendData (destinationId, wantAck, ...).
 
+        Returns:
+            bool: True if the message was handed to the interface, False otherwise.
+                  (AsyncAERP returns a future of it; pass the result to `_when_sent`.)
+        """
+        port_num = self.config.get(CONFIG_PORT)
+        payload = self._encode_payload(message_payload, label)
         try:
-            # Send as a broadcast message on the designated AERP port
-            self.interface.sendData(
-                payload=message_payload,
-                portNum=port_num,
-                wantAck=False # Clear messages are typically fire-and-forget
-                # destinationId="^all" # Default broadcast behavior
-            )
+            self.interface.sendData(payload=payload, portNum=port_num, **send_kwargs)
+            return True
         except TypeError as e:
-             logger.error(f"TypeError sending CLEAR message (check meshtastic library version?): {e}")
-             # Try sending as bytes (JSON encoded)
-             try:
-                  self.interface.sendData(
-                       payload=json.dumps(message_payload).encode('utf-8'),
-                       portNum=port_num,
-                       wantAck=False
-                  )
-             except Exception as inner_e:
-                  logger.error(f"Retry sending CLEAR as bytes also failed: {inner_e}")
+             logger.error(f"TypeError sending {label} message (check meshtastic library version?): {e}")
+             if isinstance(payload, dict):
+                 # Try sending as bytes (JSON encoded)
+                 try:
+                      self.interface.sendData(payload=json.dumps(payload).encode('utf-8'), portNum=port_num, **send_kwargs)
+                      return True
+                 except Exception as inner_e:
+                      logger.error(f"Retry sending {label} as bytes also failed: {inner_e}")
         except AttributeError as e:
-             logger.error(f"Meshtastic interface error sending CLEAR: {e}. Is it connected?")
+             logger.error(f"Meshtastic interface error sending {label}: {e}. Is it connected?")
         except Exception as e:
             # Catch other potential errors during send
-            logger.exception(f"Failed to send CLEAR message: {e}")
+            logger.exception(f"Failed to send {label} message: {e}")
+        return False
+
+    def _when_sent(self, sent, callback):
+        """
+        Calls callback(ok) once the outcome of a `_send_message` call is known.
+
+        Sends complete synchronously here, so the callback runs right away; AsyncAERP
+        overrides this to wait for its off-loop send without blocking the event loop.
 
-    def _send_emergency_broadcast_loop(self):
+        Args:
+            sent: The value returned by `_send_message`.
+            callback (callable): Called with True if the message was handed to the interface.
+
+        Returns:
+            The callback's return value.
         """
-        Internal method run in a dedicated thread.
-        Periodically gathers data (GPS, battery) and sends the emergency broadcast message
-        as long as `self.emergency_active` is True.
+        return callback(sent)
+
+    def _broadcast_tick(self):
+        """
+        Scheduled task: sends one emergency broadcast for the active session.
+
+        Gathers data (GPS, battery), builds the (possibly delta-encoded) payload and
+        sends it. Configuration is re-read every run, so `reconfigure` applies to the
+        next broadcast.
+
+        Returns:
+            float | None: Seconds until the next broadcast (the configured or adaptive
+                          interval), or None if the session has ended. AsyncAERP returns
+                          an awaitable for it that completes once the broadcast is sent.
         """
+        state = self._broadcast_state
+        current_emergency_id = state["emergency_id"]
+
         interval = self.config.get(CONFIG_INTERVAL)
         port_num = self.config.get(CONFIG_PORT)
         emergency_msg_text = self.config.get(CONFIG_MESSAGE)
-        current_emergency_id = None # Store the ID for this thread's session
+        delta_enabled = self.config.get(CONFIG_DELTA_BROADCASTS)
+        adaptive = state["adaptive"]
+        if not self.config.get(CONFIG_ADAPTIVE_INTERVAL):
+            adaptive = None
+        elif adaptive is None or (adaptive.base, adaptive.floor, adaptive.ceiling) != (interval, self.config.get(CONFIG_MIN_INTERVAL), self.config.get(CONFIG_MAX_INTERVAL)):
+            adaptive = AdaptiveInterval(interval, self.config.get(CONFIG_MIN_INTERVAL), self.config.get(CONFIG_MAX_INTERVAL))
+        state["adaptive"] = adaptive
+
+        # --- Gather Data ---
+        gps_info = {} # Default to empty dict
+        battery_level = None # Default to None
+        channel_utilization = None # Percent, if the device reports it
+
+        # Position comes from the cache (refreshed on position events or at a bounded rate)
+        my_position = self.self_position.get()
+        if my_position:
+            gps_info = my_position.as_gps_dict()
+        else:
+             logger.warning("Could not get valid GPS position for emergency message.")
 
-        with self._emergency_lock:
-             current_emergency_id = self.last_emergency_id # Get ID safely
+        try:
+            # Attempt to get battery level from node info
+            if self.interface and hasattr(self.interface, 'myInfo') and self.interface.myInfo:
+                metrics = self.interface.myInfo.device_metrics
+                if metrics and isinstance(metrics, dict) and 'batteryLevel' in metrics:
+                    battery_level = metrics['batteryLevel']
+                if metrics and isinstance(metrics, dict):
+                    channel_utilization = metrics.get('channelUtilization')
+
+            if battery_level is None:
+                 # Optional: Direct call fallback
+                 # battery_level = self.interface.localNode.getDeviceMetrics().batteryLevel
+                 logger.warning("Could not get battery level for emergency message.")
+
+        except AttributeError:
+             logger.warning("Could not access interface.myInfo.device_metrics. Is node info available?")
+        except Exception as e:
+            logger.error(f"Error getting battery level: {e}")
 
-        if not current_emergency_id:
-             logger.error("Broadcast thread started without a valid emergency ID. Exiting.")
-             return
 
-        logger.debug(f"Broadcast thread started for emergency ID: {current_emergency_id}")
+        # --- Construct and Send Payload ---
+        message_payload = {
+            "type": MSG_TYPE_EMERGENCY,
+            "user_node_num": self.my_node_num, # Include sender node number for identification
+            "emergency_id": current_emergency_id, # Include the unique ID for this session
+            "message": emergency_msg_text,
+            "gps": gps_info, # Send collected GPS data (or empty dict)
+            "battery": battery_level, # Send collected battery level (or None)
+            "timestamp": time.time(), # System time of sending
+            # Which nodes' ACKs we hold, so listeners only re-ACK if theirs was lost
+            "ack_filter": build_ack_filter(self.acknowledgements.acks_snapshot(current_emergency_id)),
+        }
+
+        if delta_enabled:
+            sent_fields = {key: message_payload[key] for key in DELTA_FIELDS}
+            message_payload = self._build_delta_payload(message_payload, state["last_sent_fields"], state["seq"])
+            state["last_sent_fields"] = sent_fields
+            state["seq"] += 1
 
-        while True:
-            # Check if emergency should stop *before* doing work
+        # Check the active flag right before sending, under the send lock, so a broadcast
+        # can never go out after stop_emergency has sent the CLEAR.
+        with self._broadcast_send_lock:
             with self._emergency_lock:
                 if not self.emergency_active or self.last_emergency_id != current_emergency_id:
-                    logger.debug(f"Emergency state changed (active={self.emergency_active}, id={self.last_emergency_id}). Broadcast thread exiting.")
-                    break # Exit loop if emergency stopped or ID changed
+                    logger.debug(f"Emergency state changed (active={self.emergency_active}, id={self.last_emergency_id}). Broadcast task ending.")
+                    return None
+
+            logger.info("Sending emergency broadcast (ID: %s) on port %s", current_emergency_id, port_num)
+            logger.debug("Emergency Payload: %s", message_payload)
+
+            # Send the data using the Meshtastic interface
+            # (wantAck left at its default; ACKs are handled by the plugin logic)
+            sent = self._send_message(message_payload, "EMERGENCY")
+
+        # Delay until the next broadcast: configured or adaptive interval
+        next_delay = interval
+        if adaptive:
+            ack_count = len(self.acknowledgements.get(current_emergency_id, {}))
+            position = (my_position.lat, my_position.lon) if my_position else None
+            next_delay = adaptive.next_interval(ack_count, position, channel_utilization)
+            logger.debug("Next emergency broadcast in %ss (%d ACKs so far).", next_delay, ack_count)
+        return self._when_sent(sent, lambda ok: next_delay)
+
+    @staticmethod
+    def _build_delta_payload(full_payload, previous_fields, seq):
+        """
+        Reduces an emergency broadcast to the fields that changed since the previous one.
 
-            # --- Gather Data ---
-            gps_info = {} # Default to empty dict
-            battery_level = None # Default to None
+        The first broadcast of a session and every DELTA_FULL_EVERY-th one are sent in
+        full so receivers that missed earlier packets can resync. A broadcast in which a
+        field was cleared (GPS fix or battery reading lost) is also sent in full, because
+        the binary format cannot express an absent field in a delta. A delta with no
+        changed fields is a heartbeat (ID, sequence number and timestamp only).
 
-            try:
-                # Attempt to get current position from node info (less blocking)
-                # Ensure interface and myInfo are valid
-                if self.interface and hasattr(self.interface, 'myInfo') and self.interface.myInfo:
-                    my_pos = self.interface.myInfo.position
-                    if my_pos and isinstance(my_pos, dict):
-                         # Check for standard integer lat/lon first
-                         if 'latitudeI' in my_pos and 'longitudeI' in my_pos:
-                              lat = my_pos['latitudeI'] / 1e7
-                              lon = my_pos['longitudeI'] / 1e7
-                              # Add other available fields if they exist
-                              gps_info = {
-                                   "latitude": lat,
-                                   "longitude": lon,
-                                   "altitude": my_pos.get('altitude'),
-                                   "time": my_pos.get('time'), # GPS timestamp
-                              }
-                         # Fallback check for float lat/lon (less common now)
-                         elif 'latitude' in my_pos and 'longitude' in my_pos:
-                              gps_info = {
-                                   "latitude": my_pos['latitude'],
-                                   "longitude": my_pos['longitude'],
-                                   "altitude": my_pos.get('altitude'),
-                                   "time": my_pos.get('time'),
-                              }
-
-                if not gps_info: # If position wasn't found in myInfo
-                     # Optional: Could try a more direct/blocking call if essential,
-                     # but prefer non-blocking info for responsiveness.
-                     # gps_data = self.interface.localNode.getGps() # Requires localNode setup
-                     logger.warning("Could not get valid GPS position for emergency message.")
-
-            except AttributeError:
-                 logger.warning("Could not access interface.myInfo.position. Is node info available?")
-            except Exception as e:
-                # Catch unexpected errors during GPS fetch
-                logger.error(f"Error getting GPS data: {e}")
+        Args:
+            full_payload (dict): The complete emergency message.
+            previous_fields (dict | None): DELTA_FIELDS values of the previous broadcast.
+            seq (int): Sequence number of this broadcast within the session.
 
-            try:
-                # Attempt to get battery level from node info
-                if self.interface and hasattr(self.interface, 'myInfo') and self.interface.myInfo:
-                    metrics = self.interface.myInfo.device_metrics
-                    if metrics and isinstance(metrics, dict) and 'batteryLevel' in metrics:
-                        battery_level = metrics['batteryLevel']
-
-                if battery_level is None:
-                     # Optional: Direct call fallback
-                     # battery_level = self.interface.localNode.getDeviceMetrics().batteryLevel
-                     logger.warning("Could not get battery level for emergency message.")
-
-            except AttributeError:
-                 logger.warning("Could not access interface.myInfo.device_metrics. Is node info available?")
-            except Exception as e:
-                logger.error(f"Error getting battery level: {e}")
-
-
-            # --- Construct and Send Payload ---
-            message_payload = {
-                "type": MSG_TYPE_EMERGENCY,
-                "user_node_num": self.my_node_num, # Include sender node number for identification
-                "emergency_id": current_emergency_id, # Include the unique ID for this session
-                "message": emergency_msg_text,
-                "gps": gps_info, # Send collected GPS data (or empty dict)
-                "battery": battery_level, # Send collected battery level (or None)
-                "timestamp": time.time() # System time of sending
-            }
+        Returns:
+            dict: The payload to send (the full payload with 'seq', or a delta).
+        """
+        full_payload["seq"] = seq
+        if previous_fields is None or seq % DELTA_FULL_EVERY == 0:
+            return full_payload
+
+        delta_payload = {
+            key: full_payload[key] for key in ("type", "user_node_num", "emergency_id", "timestamp", "seq")
+        }
+        delta_payload["delta"] = True
+        if "ack_filter" in full_payload:
+            delta_payload["ack_filter"] = full_payload["ack_filter"] # Always current, never part of the delta
+        for key in DELTA_FIELDS:
+            value, previous = full_payload[key], previous_fields.get(key)
+            if key == "gps" and isinstance(value, dict) and isinstance(previous, dict):
+                # A new GPS fix time alone is not a change worth sending
+                changed = any(value.get(k) != previous.get(k) for k in ("latitude", "longitude", "altitude"))
+            else:
+                changed = value != previous
+            if changed:
+                if value is None or value == {}:
+                    return full_payload # Receivers keep the previous value for keys missing from a delta
+                delta_payload[key] = value
+        return delta_payload
 
-            logger.info(f"Sending emergency broadcast (ID: {current_emergency_id}) on port {port_num}")
-            logger.debug(f"Emergency Payload: {message_payload}")
 
-            try:
-                # Send the data using the Meshtastic interface
-                self.interface.sendData(
-                    payload=message_payload,
-                    portNum=port_num,
-                    # wantAck=False # Default, ACKs are handled by the plugin logic
-                    # channelIndex=0 # Specify channel if needed
-                )
-            except TypeError as e:
-                 logger.error(f"TypeError sending EMERGENCY message: {e}")
-                 # Try sending as bytes
-                 try:
-                      self.interface.sendData(payload=json.dumps(message_payload).encode('utf-8'), portNum=port_num)
-                 except Exception as inner_e:
-                      logger.error(f"Retry sending EMERGENCY as bytes also failed: {inner_e}")
-            except AttributeError as e:
-                 logger.error(f"Meshtastic interface error sending EMERGENCY: {e}. Is it connected?")
-            except Exception as e:
-                logger.exception(f"Failed to send emergency broadcast: {e}")
-
-            # --- Wait for Interval ---
-            # Check the active flag *again* immediately before sleeping
-            # to handle rapid start/stop commands gracefully.
-            with self._emergency_lock:
-                if not self.emergency_active or self.last_emergency_id != current_emergency_id:
-                    logger.debug("Emergency state changed during send cycle. Exiting loop.")
-                    break
-            # Wait for the configured interval before the next broadcast
-            time.sleep(interval)
+    def send_now(self):
+        """
+        Sends the next emergency broadcast immediately instead of at the end of the current wait.
+
+        Returns:
+            bool: True if an emergency is active and its next broadcast was moved to now.
+        """
+        with self._emergency_lock:
+            if not self.emergency_active:
+                logger.info("Emergency broadcast is not currently active.")
+                return False
+        return self.scheduler.run_now(self._broadcast_task)
+
+    def reconfigure(self):
+        """
+        Reloads the configuration file and applies it without restarting.
 
-        logger.info(f"Emergency broadcast thread finished for ID: {current_emergency_id}.")
+        The broadcast task re-reads interval, message and pacing settings on every
+        run, so an active broadcast is rescheduled to pick up the new values right away.
+        """
+        self.config.load_config()
+        self.acknowledgements.set_max_sessions(self.config.get(CONFIG_MAX_ACK_SESSIONS))
+        self.proximity_alerts.cooldown = self.config.get(CONFIG_ALERT_COOLDOWN)
+        self.ack_policy.reack_interval = self.config.get(CONFIG_REACK_INTERVAL)
+        logger.info("Configuration reloaded.")
+        with self._emergency_lock:
+            active = self.emergency_active
+        if active:
+            self.scheduler.run_now(self._broadcast_task)
 
 
     # --- Incoming Message Handling ---
+    # Per-packet code logs with %-style arguments instead of f-strings, so nothing
+    # is formatted for disabled log levels.
+
+    def submit_incoming(self, packet, interface):
+        """
+        Queues a received packet for processing on the ingest worker thread.
+
+        This is what the Meshtastic receive callback should call: it returns in O(1)
+        so the radio reader thread is never blocked by packet handling.
+
+        Args:
+            packet (dict): The packet dictionary received from meshtastic-python.
+            interface: The Meshtastic interface instance that received the packet.
+
+        Returns:
+            bool: True if the packet was queued, False if it was dropped due to overflow.
+        """
+        return self.ingest.put(packet, interface)
+
+    def _classify_packet(self, packet):
+        """
+        Assigns a received packet to an ingest priority class without fully decoding it.
+
+        Emergencies and all-clears go first, then ACKs, then other AERP-port traffic;
+        everything else (e.g. POSITION_APP) is bulk and may be dropped on overflow.
+        Runs on the radio thread, so it only peeks at the payload.
+
+        Args:
+            packet (dict): The received packet.
+
+        Returns:
+            int: One of the ingest PRIORITY_* classes.
+        """
+        try:
+            decoded_part = packet['decoded']
+            if decoded_part.get('portNum') != self.config.get(CONFIG_PORT):
+                return PRIORITY_BULK
+            payload = decoded_part.get('payload')
+        except (KeyError, TypeError, AttributeError):
+            return PRIORITY_BULK
+
+        if isinstance(payload, dict):
+            message_type = payload.get("type")
+            if message_type == MSG_TYPE_EMERGENCY or message_type == MSG_TYPE_CLEAR:
+                return PRIORITY_EMERGENCY
+            if message_type == MSG_TYPE_ACK:
+                return PRIORITY_ACK
+        elif is_binary_message(payload):
+            message_type = peek_message_type(payload)
+            if message_type == MSG_TYPE_EMERGENCY or message_type == MSG_TYPE_CLEAR:
+                return PRIORITY_EMERGENCY
+            if message_type == MSG_TYPE_ACK:
+                return PRIORITY_ACK
+        elif isinstance(payload, bytes):
+            # Substring checks are far cheaper than a JSON decode on the radio thread
+            if _EMERGENCY_TAG in payload or _CLEAR_TAG in payload:
+                return PRIORITY_EMERGENCY
+            if _ACK_TAG in payload:
+                return PRIORITY_ACK
+        return PRIORITY_AERP
 
     def handle_incoming(self, packet, interface):
         """
         Processes incoming packets received from the Meshtastic network.
 
         This method is intended to be called by the Meshtastic receive callback.
-        It decodes the packet, determines the message type, and routes it to
-        the appropriate handler (_handle_emergency_message, _handle_ack_message, etc.).
-        It also checks packets for location data to trigger proximity alerts.
+        Copies of an already handled packet (same sender and packet ID, e.g. mesh
+        rebroadcasts) are dropped first. The packet is parsed once (`parse_packet`): traffic for other applications
+        costs only a few dictionary lookups, since its payload is never decoded,
+        while AERP messages (JSON or binary) are decoded and routed to the
+        appropriate handler (_handle_emergency_message, _handle_ack_message, etc.).
+        Any location in the packet (position reports, or the 'gps' of an AERP
+        message) feeds proximity tracking and alerts.
 
         Args:
             packet (dict): The packet dictionary received from meshtastic-python.
@@ -418,65 +629,54 @@ class AERP:
                        (Note: Often the same as self.interface, but passed for context).
         """
         try:
-            # Basic packet validation
-            if not isinstance(packet, dict) or 'decoded' not in packet or 'payload' not in packet['decoded']:
+            # Drop copies of a packet we already handled (mesh rebroadcasts via other hops),
+            # before any parsing, state update or ACK
+            packet_id = packet.get('id') if isinstance(packet, dict) else None
+            if packet_id and self.duplicates.check_and_add((packet.get('from'), packet_id)):
+                return
+
+            target_port = self.config.get(CONFIG_PORT)
+            parsed = parse_packet(packet, target_port, self.my_node_num)
+            if parsed is None:
                 # logger.debug("Packet missing decoded payload, ignoring.")
                 return
 
-            decoded_part = packet['decoded']
-            port_num = decoded_part.get('portNum') # Can be int or string ('UNKNOWN_APP', 'TEXT_MESSAGE_APP', etc.)
-            payload = decoded_part.get('payload') # Can be bytes, dict (if auto-decoded JSON), string etc.
-            from_node_num = packet.get('from')
-            to_node_num = packet.get('to') # Useful for checking if message was direct or broadcast
+            from_node_num = parsed.from_node_num
 
-            # Ignore packets sent by ourselves
+            # Ignore packets sent by ourselves (but use our own position reports to refresh the cache)
             if from_node_num == self.my_node_num:
-                # logger.debug(f"Ignoring packet from self ({format_node_id(from_node_num)})")
+                if parsed.is_position and parsed.has_location:
+                    self.self_position.update_from_dict(parsed.payload)
                 return
 
-            from_node_id_fmt = format_node_id(from_node_num) # Formatted ID for logging
-
-            # --- Attempt to Decode Payload if Bytes ---
-            # Meshtastic library sometimes provides payload as bytes, try decoding as JSON
-            decoded_payload = None
-            if isinstance(payload, bytes):
-                try:
-                    decoded_payload = json.loads(payload.decode('utf-8'))
-                    logger.debug(f"Successfully decoded JSON payload from bytes from {from_node_id_fmt}")
-                except (UnicodeDecodeError, json.JSONDecodeError):
-                    # Not valid JSON or not UTF-8 text, treat as raw bytes or ignore
-                    logger.debug(f"Payload from {from_node_id_fmt} on port {port_num} is bytes but not valid JSON/UTF-8.")
-                    # We might still want to process based on portnum below, even if payload isn't JSON
-            elif isinstance(payload, dict):
-                 decoded_payload = payload # Already a dictionary
-            # Add handling for other payload types (like plain text) if needed
-
-            # --- Route based on Port Number and Message Type ---
-            target_port = self.config.get(CONFIG_PORT)
+            from_node_id_fmt = None # Formatted ID for logging, only built when needed
 
-            # 1. Check if it's on the AERP Port
-            if port_num == target_port:
-                if isinstance(decoded_payload, dict):
-                    message_type = decoded_payload.get("type")
+            # --- Route AERP messages based on Message Type ---
+            if parsed.is_aerp:
+                from_node_id_fmt = format_node_id(from_node_num)
+                message = parsed.message
+                if message is not None:
+                    message_type = message.get("type")
                     if message_type == MSG_TYPE_EMERGENCY:
-                        self._handle_emergency_message(packet, decoded_payload, from_node_num, from_node_id_fmt)
+                        self._handle_emergency_message(packet, message, from_node_num, from_node_id_fmt)
                     elif message_type == MSG_TYPE_ACK:
-                        self._handle_ack_message(packet, decoded_payload, from_node_num, from_node_id_fmt)
+                        self._handle_ack_message(packet, message, from_node_num, from_node_id_fmt)
                     elif message_type == MSG_TYPE_CLEAR:
-                        self._handle_clear_message(packet, decoded_payload, from_node_num, from_node_id_fmt)
+                        self._handle_clear_message(packet, message, from_node_num, from_node_id_fmt)
                     # Add handlers for other AERP message types here
                     else:
-                        logger.debug(f"Received message with unknown type '{message_type}' on AERP port {target_port} from {from_node_id_fmt}.")
+                        logger.debug("Received message with unknown type '%s' on AERP port %s from %s.", message_type, target_port, from_node_id_fmt)
                 else:
                     # Received something on AERP port, but it's not a recognized AERP JSON structure
-                    logger.info(f"Received non-AERP (or non-JSON) data on AERP port {target_port} from {from_node_id_fmt}. Payload: {payload}")
+                    logger.info("Received non-AERP (or non-JSON) data on AERP port %s from %s. Payload: %r", target_port, from_node_id_fmt, parsed.payload)
 
-            # 2. Check *any* packet for Position Data (for Proximity Alert)
+            # --- Proximity Alert from any packet carrying a location ---
             # This allows alerts even if nodes aren't running AERP but are sending standard position updates.
-            lat, lon = get_location_from_packet(packet) # Util function checks POSITION_APP and embedded 'gps'
-            if lat is not None and lon is not None:
-                 # We already ignored packets from self earlier
-                 self.check_alert_radius(packet, lat, lon, from_node_num, from_node_id_fmt)
+            if parsed.has_location:
+                if from_node_id_fmt is None:
+                    from_node_id_fmt = format_node_id(from_node_num)
+                self.proximity.update(from_node_num, parsed.lat, parsed.lon)
+                self.check_alert_radius(packet, parsed.lat, parsed.lon, from_node_num, from_node_id_fmt)
 
         except Exception as e:
             # Catch-all for unexpected errors during packet processing
@@ -491,35 +691,36 @@ class AERP:
         battery_level = payload.get("battery") # Integer or None
         timestamp = payload.get("timestamp", time.time()) # Use receive time if sender didn't include
 
-        # Log the emergency prominently
-        logger.warning(f"*** EMERGENCY MESSAGE RECEIVED from {from_node_id_fmt} (ID: {emergency_id}) ***")
-        logger.warning(f"    Message: {message_text}")
-        if isinstance(gps_info, dict) and 'latitude' in gps_info and 'longitude' in gps_info:
-             logger.warning(f"    GPS: Lat {gps_info['latitude']:.5f}, Lon {gps_info['longitude']:.5f} (Alt: {gps_info.get('altitude', 'N/A')})")
-        else:
-             logger.warning(f"    GPS: Not Available or Invalid Format")
-        logger.warning(f"    Battery: {battery_level if battery_level is not None else 'N/A'}%")
-        try:
-            # Format timestamp for readability
-            log_time = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S %Z')
-            logger.warning(f"    Timestamp: {log_time}")
-        except Exception:
-             logger.warning(f"    Timestamp: {timestamp} (Could not format)")
+        # Delta broadcasts only carry changed fields: fill the rest from what we already track
+        if payload.get("delta"):
+            previous = self.active_emergency_info.get(from_node_num)
+            if previous and previous.message_id == emergency_id:
+                message_text = payload.get("message", previous.message)
+                gps_info = payload.get("gps", previous.gps)
+                battery_level = payload.get("battery", previous.battery)
+            else:
+                logger.debug("Delta emergency from %s without a full broadcast to build on. Fields fill in at the next full broadcast.", from_node_id_fmt)
 
+        # Log the emergency prominently: one multi-line record, formatted only if emitted
+        log_emergency_report(logger, EmergencyReport(node_id=from_node_id_fmt, emergency_id=emergency_id, message=message_text,
+                                                     gps=gps_info, battery=battery_level, timestamp=timestamp))
 
         # Store info about this active emergency (overwrite if already present for this node)
-        self.active_emergency_info[from_node_num] = {
-            "message_id": emergency_id,
-            "timestamp": timestamp, # Store the original timestamp
-            "message": message_text,
-            "gps": gps_info,
-            "battery": battery_level,
-            "last_seen": time.time() # Track when we last heard from them
-        }
-
-        # Send acknowledgement back to the sender
+        # (last_seen defaults to now: when we last heard from them)
+        info = ReceivedEmergency(emergency_id, timestamp, message_text, gps_info, battery_level,
+                                 seq=payload.get("seq")) # Broadcast sequence number (delta mode), else None
+        self.active_emergency_info[from_node_num] = info
+        self._track_expiry(("rx", from_node_num), info.last_seen + self._received_emergency_timeout())
+
+        # Send acknowledgement back to the sender: once per emergency, then only when the
+        # sender shows it lacks our ACK or reack_interval has passed (see AckPolicy)
         if emergency_id:
-            self.send_acknowledgement(from_node_num, emergency_id)
+            reason = self.ack_policy.decide(from_node_num, emergency_id, self.my_node_num, payload.get("ack_filter"))
+            if reason is not None:
+                logger.debug("Acknowledging Emergency ID %s from %s (%s).", emergency_id, from_node_id_fmt, reason)
+                self._schedule_acknowledgement(from_node_num, emergency_id)
+            else:
+                logger.debug("ACK for Emergency ID %s from %s suppressed (already acknowledged).", emergency_id, from_node_id_fmt)
         else:
             logger.warning("Received emergency message without an ID, cannot acknowledge specifically.")
 
@@ -532,43 +733,45 @@ class AERP:
 
         # Check if this ACK is for an emergency *we* initiated
         if original_emergency_id and original_emergency_id in self.acknowledgements:
-            # Record the ACK with the sender's node ID and timestamp
-            # Check if we already have an ACK from this node for this ID
-            if ack_sender_node_num not in self.acknowledgements[original_emergency_id]:
-                logger.info(f"Acknowledgement RECEIVED for My Emergency ID {original_emergency_id} from Node {from_node_id_fmt}")
-            else:
+            # Record the ACK with the sender's node ID and the timestamp of when it was *sent*
+            is_new = self.acknowledgements.record(original_emergency_id, ack_sender_node_num, ack_timestamp)
+            if is_new:
+                logger.info("Acknowledgement RECEIVED for My Emergency ID %s from Node %s", original_emergency_id, from_node_id_fmt)
+            elif is_new is False:
                 # We received another ACK from the same node for the same emergency
                 # Update the timestamp (they might have restarted or resent)
-                logger.debug(f"Acknowledgement REFRESHED for My Emergency ID {original_emergency_id} from Node {from_node_id_fmt}")
-
-            # Store the timestamp of when the ACK was *sent* by the acknowledging node
-            self.acknowledgements[original_emergency_id][ack_sender_node_num] = ack_timestamp
+                logger.debug("Acknowledgement REFRESHED for My Emergency ID %s from Node %s", original_emergency_id, from_node_id_fmt)
+            if is_new is not None:
+                self._track_expiry(("ack", original_emergency_id, ack_sender_node_num), ack_timestamp + self.config.get(CONFIG_ACK_TIMEOUT))
+                self._track_expiry(("session", original_emergency_id), time.time() + self.config.get(CONFIG_ACK_SESSION_MAX_AGE))
         else:
             # This could be an ACK for another node's emergency, or an old/invalid ID.
-            logger.debug(f"Received ACK from {from_node_id_fmt} for emergency {original_emergency_id}, which is not mine or is unknown/stale.")
+            logger.debug("Received ACK from %s for emergency %s, which is not mine or is unknown/stale.", from_node_id_fmt, original_emergency_id)
 
     def _handle_clear_message(self, packet, payload, from_node_num, from_node_id_fmt):
         """Handles a received AERP_CLEAR message."""
         emergency_id = payload.get("emergency_id")
         timestamp = payload.get("timestamp", time.time()) # Time the clear was sent
 
-        logger.info(f"--- ALL CLEAR RECEIVED from {from_node_id_fmt} for Emergency ID: {emergency_id} ---")
+        logger.info("--- ALL CLEAR RECEIVED from %s for Emergency ID: %s ---", from_node_id_fmt, emergency_id)
 
         # Remove the emergency info we were tracking for this sender node
-        if from_node_num in self.active_emergency_info:
+        # (a single pop, so a concurrent cleanup cannot remove it between check and delete)
+        removed = self.active_emergency_info.pop(from_node_num)
+        self.ack_policy.forget(from_node_num)
+        if removed is not None:
+            self._expiry.discard(("rx", from_node_num))
             # Optional: Check if the emergency_id matches the one we stored for this node
-            stored_id = self.active_emergency_info[from_node_num].get("message_id")
+            stored_id = removed.message_id
             if stored_id == emergency_id:
-                logger.debug(f"Removing tracked emergency info for node {from_node_id_fmt} matching CLEAR ID.")
+                logger.debug("Removing tracked emergency info for node %s matching CLEAR ID.", from_node_id_fmt)
             elif stored_id:
-                 logger.warning(f"Received CLEAR from {from_node_id_fmt} with ID {emergency_id}, but tracked ID was {stored_id}. Removing tracked info anyway.")
+                 logger.warning("Received CLEAR from %s with ID %s, but tracked ID was %s. Removing tracked info anyway.", from_node_id_fmt, emergency_id, stored_id)
             else:
-                 logger.debug(f"Received CLEAR from {from_node_id_fmt} (ID: {emergency_id}). Removing tracked info (which had no ID).")
-
-            del self.active_emergency_info[from_node_num]
+                 logger.debug("Received CLEAR from %s (ID: %s). Removing tracked info (which had no ID).", from_node_id_fmt, emergency_id)
         else:
             # We received a clear, but weren't tracking an active emergency from them.
-            logger.info(f"Received CLEAR for node {from_node_id_fmt} (ID: {emergency_id}), but no active emergency was tracked for them.")
+            logger.info("Received CLEAR for node %s (ID: %s), but no active emergency was tracked for them.", from_node_id_fmt, emergency_id)
 
         # Do NOT clear acknowledgements here. ACKs relate to emergencies *we* sent.
         # Clearing is only relevant for `active_emergency_info` which tracks emergencies *from others*.
@@ -602,44 +805,100 @@ class AERP:
         port_num = self.config.get(CONFIG_PORT)
         dest_node_id_fmt = format_node_id(destination_node_num)
 
-        logger.info(f"Sending ACK to {dest_node_id_fmt} for Emergency ID {emergency_id} on port {port_num}")
-        logger.debug(f"ACK Payload: {ack_payload}")
+        logger.info("Sending ACK to %s for Emergency ID %s on port %s", dest_node_id_fmt, emergency_id, port_num)
+        logger.debug("ACK Payload: %s", ack_payload)
 
-        try:
-            # Send directly to the node that sent the emergency
-            # Format destination ID string correctly for sendData
-            destination_id_str = f"!{destination_node_num:08x}"
-
-            self.interface.sendData(
-                payload=ack_payload,
-                destinationId=destination_id_str,
-                portNum=port_num,
-                wantAck=False # ACKs usually don't need their own ACK (prevents ACK loops)
-            )
-        except TypeError as e:
-             logger.error(f"TypeError sending ACK message to {dest_node_id_fmt}: {e}")
-             # Try sending as bytes
-             try:
-                  self.interface.sendData(
-                       payload=json.dumps(ack_payload).encode('utf-8'),
-                       destinationId=destination_id_str,
-                       portNum=port_num,
-                       wantAck=False
-                  )
-             except Exception as inner_e:
-                  logger.error(f"Retry sending ACK as bytes also failed: {inner_e}")
-        except AttributeError as e:
-             logger.error(f"Meshtastic interface error sending ACK: {e}. Is it connected?")
-        except Exception as e:
-            logger.exception(f"Failed to send ACK to {dest_node_id_fmt}: {e}")
+        # Send directly to the node that sent the emergency
+        # Format destination ID string correctly for sendData
+        destination_id_str = f"!{destination_node_num:08x}"
+        # ACKs usually don't need their own ACK (prevents ACK loops)
+        sent = self._send_message(ack_payload, f"ACK to {dest_node_id_fmt}", destinationId=destination_id_str, wantAck=False)
+        self._when_sent(sent, lambda ok: self._schedule_ack_retry(destination_node_num, emergency_id, 1) if not ok else None)
+
+    def _schedule_acknowledgement(self, destination_node_num, emergency_id):
+        """
+        Sends an ACK after a random delay of up to ACK_JITTER_MAX seconds.
+
+        Every listener hears a broadcast at the same moment; the jitter spreads their
+        ACKs so they do not collide on the channel. The ACK is dropped if the
+        emergency is cleared in the meantime. For packets that came through the
+        ingest queue, the receipt-to-dispatch latency is recorded when the ACK is sent.
+
+        Args:
+            destination_node_num (int): The node number to send the ACK to.
+            emergency_id (str): The emergency being acknowledged.
+        """
+        received_at = self.ingest.dispatching_since # None when handle_incoming is called directly
+        decided_at = time.monotonic()
+        delay = self.ack_policy.jitter()
+        if delay <= 0:
+            self.send_acknowledgement(destination_node_num, emergency_id)
+            if received_at is not None:
+                self.ingest.record_ack_sent(received_at, decided_at)
+            return
+
+        def send():
+            info = self.active_emergency_info.get(destination_node_num)
+            if not info or info.message_id != emergency_id:
+                logger.debug("Dropping delayed ACK for Emergency ID %s: no longer active.", emergency_id)
+                return
+            self.send_acknowledgement(destination_node_num, emergency_id)
+            if received_at is not None:
+                self.ingest.record_ack_sent(received_at, decided_at)
+
+        self.scheduler.schedule("ack_send", send, delay=delay)
+
+    def _schedule_ack_retry(self, destination_node_num, emergency_id, attempt):
+        """
+        Schedules another attempt to send an ACK whose send failed (e.g. radio busy or reconnecting).
+
+        Args:
+            destination_node_num (int): The node number to send the ACK to.
+            emergency_id (str): The emergency being acknowledged.
+            attempt (int): Number of the retry being scheduled (1-based).
+        """
+        if attempt > ACK_MAX_RETRIES:
+            logger.warning(f"Giving up on ACK to {format_node_id(destination_node_num)} for Emergency ID {emergency_id} after {ACK_MAX_RETRIES} retries.")
+            return
+
+        def retry():
+            # Skip the retry if the emergency was cleared in the meantime
+            info = self.active_emergency_info.get(destination_node_num)
+            if not info or info.message_id != emergency_id:
+                logger.debug(f"Dropping ACK retry for Emergency ID {emergency_id}: no longer active.")
+                return
+            ack_payload = {"type": MSG_TYPE_ACK, "emergency_id": emergency_id, "timestamp": time.time()}
+            dest_node_id_fmt = format_node_id(destination_node_num)
+            logger.info(f"Retrying ACK to {dest_node_id_fmt} for Emergency ID {emergency_id} (attempt {attempt}/{ACK_MAX_RETRIES})")
+            sent = self._send_message(ack_payload, f"ACK to {dest_node_id_fmt}", destinationId=f"!{destination_node_num:08x}", wantAck=False)
+            return self._when_sent(sent, lambda ok: self._schedule_ack_retry(destination_node_num, emergency_id, attempt + 1) if not ok else None)
+
+        self.scheduler.schedule("ack_retry", retry, delay=ACK_RETRY_DELAY * attempt)
 
 
     # --- Proximity Alert ---
 
+    def _get_my_position(self):
+        """
+        Returns this node's current position from the self-position cache.
+
+        Returns:
+            tuple: (latitude, longitude) in decimal degrees, or (None, None) if unavailable.
+        """
+        my_position = self.self_position.get()
+        if my_position is None:
+            return None, None
+        return my_position.lat, my_position.lon
+
     def check_alert_radius(self, packet, lat, lon, from_node_num, from_node_id_fmt):
         """
         Checks if the node identified in the packet, located at (lat, lon),
-        is within the configured alert radius of this node. Logs a warning if true.
+        is within the configured alert radius of this node.
+
+        The distance feeds the node's alert state machine (`self.proximity_alerts`):
+        a warning is logged when the node enters the radius (at most once per
+        alert cooldown) and an info message when it leaves, instead of one
+        warning per position packet.
 
         Args:
             packet (dict): The received packet (used for context, maybe packet ID).
@@ -653,173 +912,231 @@ class AERP:
         if alert_radius <= 0:
             return
 
-        my_lat, my_lon = None, None
-        try:
-            # Get my current position
-            if self.interface and hasattr(self.interface, 'myInfo') and self.interface.myInfo:
-                my_pos = self.interface.myInfo.position
-                if my_pos and isinstance(my_pos, dict):
-                    if 'latitudeI' in my_pos and 'longitudeI' in my_pos:
-                        my_lat = my_pos['latitudeI'] / 1e7
-                        my_lon = my_pos['longitudeI'] / 1e7
-                    elif 'latitude' in my_pos and 'longitude' in my_pos: # Fallback
-                        my_lat = my_pos['latitude']
-                        my_lon = my_pos['longitude']
-
-            if my_lat is None or my_lon is None:
-                logger.debug("Cannot check alert radius: My current location is unknown.")
-                return
+        my_lat, my_lon = self._get_my_position()
+        if my_lat is None or my_lon is None:
+            logger.debug("Cannot check alert radius: My current location is unknown.")
+            return
 
-        except AttributeError:
-             logger.warning("Could not access my position (interface.myInfo.position) for alert check.")
-             return
-        except Exception as e:
-            logger.error(f"Could not get my own position for alert radius check: {e}")
-            return # Cannot check distance without own position
+        # Single-sender check: the fast path rejects distant nodes before doing any exact trig.
+        # (Batch queries over every tracked node go through self.proximity instead.)
+        # Nodes already inside are only considered gone beyond the hysteresis band.
+        distance = calculate_distance_fast(my_lat, my_lon, lat, lon, self.proximity_alerts.exit_radius(alert_radius))
+        if distance != float('inf'):
+            logger.debug("Calculated distance to node %s: %.2fm", from_node_id_fmt, distance)
+
+        event = self.proximity_alerts.update(from_node_num, distance, alert_radius)
+        if event == ALERT_ENTER:
+            logger.warning("*** PROXIMITY ALERT: Node %s is within alert radius (%.1fm <= %sm) ***", from_node_id_fmt, distance, alert_radius)
+            # Trigger further actions if needed (e.g., sound alarm, display notification via another mechanism)
+        elif event == ALERT_EXIT:
+            logger.info("Node %s has left the alert radius (%sm).", from_node_id_fmt, alert_radius)
 
-        # Calculate distance using the utility function
-        distance = calculate_distance(my_lat, my_lon, lat, lon)
 
-        if distance == float('inf'):
-             logger.debug(f"Distance calculation failed for node {from_node_id_fmt}.")
-             return # Calculation failed
+    def nodes_within_radius(self, radius, lat=None, lon=None):
+        """
+        Returns the tracked nodes within a radius of a point.
 
-        logger.debug(f"Calculated distance to node {from_node_id_fmt}: {distance:.2f}m")
+        Uses the spatial grid index to limit exact distance checks to nodes in
+        nearby cells instead of scanning every tracked node.
 
-        # Check if within radius and log alert
-        if distance <= alert_radius:
-            # Potential enhancement: Keep track of nodes already alerted recently
-            # to avoid spamming logs for nodes lingering on the edge.
-            # e.g., self.recently_alerted[from_node_num] = time.time()
-            logger.warning(f"*** PROXIMITY ALERT: Node {from_node_id_fmt} is within alert radius ({distance:.1f}m <= {alert_radius}m) ***")
-            # Trigger further actions if needed (e.g., sound alarm, display notification via another mechanism)
-        # else:
-            # Optional: Log when a node moves *out* of the radius if tracking state
-            # logger.info(f"Node {from_node_id_fmt} is outside alert radius ({distance:.2f}m > {alert_radius}m)")
+        Args:
+            radius (float): Search radius in meters.
+            lat (float, optional): Latitude of the query point. Defaults to my position.
+            lon (float, optional): Longitude of the query point. Defaults to my position.
+
+        Returns:
+            list: (node_num, distance_m) tuples sorted by ascending distance. Empty if
+                  no query point was given and my position is unknown.
+        """
+        if lat is None or lon is None:
+            lat, lon = self._get_my_position()
+            if lat is None or lon is None:
+                logger.debug("Cannot query nodes within radius: My current location is unknown.")
+                return []
+        return self.proximity.nodes_within(lat, lon, radius)
 
 
     # --- Background Cleanup ---
 
+    def _cleanup_interval(self):
+        """Seconds between proximity prunes (and the idle cleanup check): roughly twice per ACK timeout period, but not too frequently."""
+        return max(30, self.config.get(CONFIG_ACK_TIMEOUT) // 2)
+
+    def _received_emergency_timeout(self):
+        """Seconds after which a received emergency we stopped hearing about is forgotten."""
+        # Use a potentially longer timeout for inactive received emergencies
+        return max(self.config.get(CONFIG_ACK_TIMEOUT) * 3, 600) # At least 10 minutes
+
+    def _track_expiry(self, key, deadline):
+        """
+        Sets the expiry deadline of a tracked entry and wakes the cleanup task if it
+        is now the earliest deadline, so the entry is removed on time.
+
+        Args:
+            key (tuple): ("ack", emergency_id, node_num), ("session", emergency_id) or ("rx", node_num).
+            deadline (float): Expiry time (epoch seconds).
+        """
+        earliest = self._expiry.next_deadline()
+        self._expiry.touch(key, deadline)
+        if earliest is None or deadline < earliest:
+            self.scheduler.run_now(self._cleanup_task)
+
     def _background_cleanup(self):
         """
-        Internal method run in a dedicated thread.
-        Periodically cleans up stale data:
-        - Acknowledgements for *our* old/inactive emergencies.
+        Scheduled task that removes stale data at its deadline:
+        - Acknowledgements for *our* emergencies older than the ACK timeout.
+        - ACK records of *our* sessions idle for longer than the session max age.
         - Information about *received* emergencies that haven't been updated recently.
+
+        Deadlines are kept in an expiry index, so a run only touches the entries
+        that actually expired.
+
+        Returns:
+            float: Seconds until the next deadline (or the idle check interval if nothing is tracked).
         """
-        logger.info("AERP Cleanup thread starting.")
-        while True:
-            ack_timeout = self.config.get(CONFIG_ACK_TIMEOUT)
-            # Use a potentially longer timeout for inactive received emergencies
-            # Consider making this configurable as well?
-            received_emergency_timeout = max(ack_timeout * 3, 600) # At least 10 minutes
+        current_time = time.time()
+        try:
+            for key in self._expiry.pop_expired(current_time):
+                if key[0] == "ack":
+                    _, emergency_id, node_num = key
+                    if self.acknowledgements.remove_ack(emergency_id, node_num):
+                        logger.debug(f"Removed stale ACK from {format_node_id(node_num)} for Emergency ID {emergency_id}")
+                    # The session itself is kept (an empty ACK list) until the ACK store evicts it
+                elif key[0] == "session":
+                    _, emergency_id = key
+                    max_age = self.config.get(CONFIG_ACK_SESSION_MAX_AGE)
+                    for evicted_id in self.acknowledgements.evict_older_than(current_time - max_age):
+                        logger.info(f"Evicted ACK record of emergency session {evicted_id} (idle for over {max_age}s).")
+                    if emergency_id in self.acknowledgements:
+                        # Still the active session: check again one max age from now
+                        self._expiry.touch(key, current_time + max_age)
+                else:
+                    _, node_num = key
+                    self.ack_policy.forget(node_num)
+                    if self.active_emergency_info.pop(node_num, None) is not None:
+                        logger.info(f"Removed stale tracked emergency info for node {format_node_id(node_num)}")
+        except Exception as e:
+            # Log errors in the cleanup task but keep it scheduled
+            logger.exception("Error during AERP background cleanup task.")
 
-            # --- Wait first before cleaning ---
-            # Sleep interval: Check roughly twice per ACK timeout period, but not too frequently.
-            sleep_duration = max(30, ack_timeout // 2)
-            time.sleep(sleep_duration)
+        next_deadline = self._expiry.next_deadline()
+        if next_deadline is None:
+            return self._cleanup_interval()
+        return max(0.0, next_deadline - time.time())
 
-            logger.debug(f"Running background cleanup (ACK Timeout: {ack_timeout}s, Received Timeout: {received_emergency_timeout}s)")
-            current_time = time.time()
+    def _prune_positions(self):
+        """
+        Scheduled task: forgets positions of nodes we have not heard from recently.
 
-            try:
-                # --- Clean stale acknowledgements for *our* emergencies ---
-                # Use list() to avoid issues modifying dict during iteration
-                stale_acks_found = False
-                for emergency_id, nodes in list(self.acknowledgements.items()):
-                    # Also remove ACK lists for emergencies that are no longer active *and* old
-                    # (Requires knowing which IDs are truly old, not just inactive)
-                    # Simpler: Just remove stale ACKs within each list based on timestamp.
-                    acks_to_remove = []
-                    for node_num, timestamp in list(nodes.items()):
-                        if current_time - timestamp > ack_timeout:
-                            acks_to_remove.append(node_num)
-                            stale_acks_found = True
-
-                    if acks_to_remove:
-                        logger.debug(f"Cleaning stale ACKs for Emergency ID {emergency_id}...")
-                        for node_num in acks_to_remove:
-                            if emergency_id in self.acknowledgements and node_num in self.acknowledgements[emergency_id]:
-                                del self.acknowledgements[emergency_id][node_num]
-                                logger.debug(f" - Removed stale ACK from {format_node_id(node_num)}")
-                        # Optional: Remove the emergency_id key itself if no ACKs remain?
-                        # if not self.acknowledgements[emergency_id]:
-                        #     logger.debug(f"Removing empty ACK list for Emergency ID {emergency_id}")
-                        #     del self.acknowledgements[emergency_id]
-
-
-                # --- Clean stale *received* emergency info ---
-                stale_emergencies_found = False
-                nodes_to_remove = []
-                for node_num, info in list(self.active_emergency_info.items()):
-                    # Check based on when we last saw *any* message from them related to this
-                    last_seen_time = info.get("last_seen", info.get("timestamp", 0)) # Use 'last_seen' if available
-                    if current_time - last_seen_time > received_emergency_timeout:
-                        nodes_to_remove.append(node_num)
-                        stale_emergencies_found = True
-
-                if nodes_to_remove:
-                    logger.debug(f"Cleaning stale received emergency info (timeout: {received_emergency_timeout}s)...")
-                    for node_num in nodes_to_remove:
-                        if node_num in self.active_emergency_info:
-                            del self.active_emergency_info[node_num]
-                            logger.info(f"Removed stale tracked emergency info for node {format_node_id(node_num)}")
-
-                if not stale_acks_found and not stale_emergencies_found:
-                    logger.debug("Background cleanup ran, no stale data found.")
-
-            except Exception as e:
-                # Log errors in the cleanup thread but keep the thread running
-                logger.exception("Error during AERP background cleanup task.")
-
-        # This part of the loop should ideally not be reached if daemon=True
-        # logger.info("AERP Cleanup thread stopping.")
+        Returns:
+            float: Seconds until the next prune.
+        """
+        pruned_positions = self.proximity.prune(time.time() - self._received_emergency_timeout())
+        for node_num in pruned_positions:
+            self.proximity_alerts.remove(node_num)
+        if pruned_positions:
+            logger.debug(f"Pruned {len(pruned_positions)} stale node positions from proximity tracking.")
+        return self._cleanup_interval()
+
+    def _status_snapshot_tick(self):
+        """
+        Scheduled task: stores a periodic status() snapshot in `self.status_snapshot`
+        and logs a one-line summary, so a long-running gateway leaves a status trail.
+        """
+        status = self.status()
+        self.status_snapshot = status
+        logger.debug(f"Status: emergency_active={status.emergency_active}, "
+                     f"received_emergencies={len(status.received_emergencies)}, "
+                     f"tracked_nodes={len(status.tracked_node_distances)}, queued={status.ingest['queued']}")
 
 
     # --- Status and Connection Handling ---
 
+    def status(self):
+        """
+        Returns the structured status of the AERP plugin.
+
+        The result is a shared, immutable `StatusSnapshot` with typed records and raw
+        epoch timestamps (no formatting). It is rebuilt only when the emergency or
+        ACK tables change, or when it is older than STATUS_SNAPSHOT_MAX_AGE
+        (counters, distances). Otherwise this is O(1) and takes no lock shared with
+        packet handling.
+
+        Returns:
+            StatusSnapshot: The current status.
+        """
+        snapshot = self._status # (key, built_at, StatusSnapshot), swapped atomically
+        if snapshot is not None and snapshot[0] == self._status_key() and time.monotonic() - snapshot[1] < STATUS_SNAPSHOT_MAX_AGE:
+            return snapshot[2]
+        with self._status_lock: # One rebuild at a time; concurrent pollers reuse its result
+            snapshot = self._status
+            key = self._status_key()
+            if snapshot is not None and snapshot[0] == key and time.monotonic() - snapshot[1] < STATUS_SNAPSHOT_MAX_AGE:
+                return snapshot[2]
+            status = self._build_status()
+            self._status = (key, time.monotonic(), status)
+            return status
+
     def get_status(self):
         """
         Returns a dictionary containing the current status of the AERP plugin.
 
         Includes active state, last emergency ID, received acknowledgements,
-        and information about active emergencies received from others.
+        and information about active emergencies received from others, with node
+        IDs and timestamps formatted for display. Rendered from `status()` (and
+        cached with it); use `status()` for machine-readable data.
 
         Returns:
-            dict: A dictionary summarizing the plugin's status.
+            dict: A dictionary summarizing the plugin's status. Do not modify it.
         """
-        # Create copies or format data to avoid returning internal mutable state directly
-        formatted_acks = {}
+        snapshot = self.status()
+        rendered = self._rendered_status
+        if rendered is None or rendered[0] is not snapshot:
+            rendered = (snapshot, render_status(snapshot))
+            self._rendered_status = rendered
+        return rendered[1]
+
+    def _status_key(self):
+        """Returns a cheap tuple that changes whenever the tracked emergency/ACK state changes."""
+        return (self.emergency_active, self.last_emergency_id, self.my_node_id,
+                self.active_emergency_info.version, self.acknowledgements.version)
+
+    def _build_status(self):
+        """Builds a new status snapshot (see `status`)."""
         current_active_id = self.last_emergency_id # Get potentially active ID
 
-        # Format acknowledgements for the *currently active* emergency ID if one exists
-        if current_active_id and current_active_id in self.acknowledgements:
-             formatted_acks[current_active_id] = {
-                  format_node_id(n): datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
-                  for n, ts in self.acknowledgements[current_active_id].items()
-             }
-        # Optionally include ACKs for past IDs? For now, focus on current.
-
-        formatted_received_emergencies = {}
-        for node_num, info in self.active_emergency_info.items():
-            formatted_received_emergencies[format_node_id(node_num)] = {
-                "emergency_id": info.get("message_id"),
-                "message": info.get("message"),
-                "gps": info.get("gps"),
-                "battery": info.get("battery"),
-                "received_at": datetime.fromtimestamp(info.get("timestamp", 0)).strftime('%Y-%m-%d %H:%M:%S'),
-                "last_seen": datetime.fromtimestamp(info.get("last_seen", 0)).strftime('%Y-%m-%d %H:%M:%S')
-            }
-
-        status = {
-            "my_node_id": self.my_node_id,
-            "emergency_active": self.emergency_active,
-            "last_emergency_id": current_active_id,
-            "active_acknowledgements": formatted_acks.get(current_active_id, {}), # Show ACKs for current ID
-            "active_received_emergencies": formatted_received_emergencies,
-            "config": self.config.config # Show current config (might be verbose)
-        }
-        return status
+        # Distances to every tracked node, computed in one vectorized batch against our own position
+        tracked_node_distances = []
+        my_lat, my_lon = self._get_my_position()
+        if my_lat is not None and my_lon is not None and len(self.proximity):
+            node_nums, distances = self.proximity.distances_to(my_lat, my_lon)
+            tracked_node_distances = [(int(node_nums[i]), float(distances[i])) for i in distances.argsort()]
+
+        return StatusSnapshot(
+            my_node_num=self.my_node_num,
+            my_node_id=self.my_node_id,
+            emergency_active=self.emergency_active,
+            last_emergency_id=current_active_id,
+            # ACKs for the *currently active* emergency ID only
+            acknowledgements=self.acknowledgements.acks_snapshot(current_active_id) if current_active_id else {},
+            received_emergencies=dict(self.active_emergency_info.items()), # Records are never mutated once stored
+            tracked_node_distances=tracked_node_distances, # (node_num, meters), nearest first
+            ingest=dict(self.ingest.stats, queued=len(self.ingest)),
+            ingest_latency=self.ingest.latency_stats(), # Per priority class, plus 'ack_sent' (receipt to ACK dispatch, after jitter)
+            scheduler=self.scheduler.stats(), # Per task: runs and how late they started (jitter)
+            ack_store=self.acknowledgements.memory_usage(), # Sessions/ACKs held, evictions, approx bytes
+            proximity_alerts=self.proximity_alerts.stats(), # Nodes inside the radius, alerts raised and suppressed
+            dedup=self.duplicates.stats(), # Duplicate packets dropped (lookups, hits, hit rate)
+            ack_policy=self.ack_policy.stats(), # ACKs sent per reason, and suppressed
+            config=self.config.config, # Current config (might be verbose)
+            snapshot_time=time.time(), # When this snapshot was built
+        )
+
+    def shutdown(self):
+        """Stops the ingest worker and the scheduler. Call once when the application exits."""
+        self.ingest.stop()
+        self.scheduler.stop()
+        logger.debug("AERP ingest worker and scheduler stopped.")
 
     def on_connection_change(self, interface, connected):
         """
@@ -834,9 +1151,13 @@ class AERP:
         """
         if connected:
             logger.info("Meshtastic device connected.")
-            # Attempt to update node info, especially if it was unknown
-            time.sleep(2) # Give the interface a moment to populate info after connect event
-            self._update_node_info()
+            # Attempt to update node info, especially if it was unknown.
+            # Give the interface a moment to populate info after the connect event,
+            # without blocking the callback thread.
+            def refresh_node_info():
+                self._update_node_info()
+                self.self_position.refresh()
+            self.scheduler.schedule("connect_refresh", refresh_node_info, delay=2)
         else:
             logger.warning("Meshtastic device disconnected.")
             # Stop emergency broadcast if it was active, but don't try to send clear
@@ -844,5 +1165,22 @@ class AERP:
             # Reset node info as it's no longer valid
             self.my_node_num = None
             self.my_node_id = "Unknown"
+            self.self_position.invalidate()
             logger.info("AERP node info reset due to disconnection.")
 
+    def on_node_updated(self, node):
+        """
+        Handles Meshtastic node database updates.
+
+        Intended to be called by the 'meshtastic.node.updated' callback. When the
+        update is for this node and carries a position, the self-position cache is
+        refreshed immediately instead of waiting for its next timed read.
+
+        Args:
+            node (dict): The updated node entry from the interface's node database.
+        """
+        if not isinstance(node, dict) or self.my_node_num is None or node.get('num') != self.my_node_num:
+            return
+        if self.self_position.update_from_dict(node.get('position')):
+            logger.debug("Own position updated from node database event.")
+
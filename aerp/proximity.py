@@ -0,0 +1,586 @@
+# aerp/proximity.py
+# Copyright (C) 2025 Akita Engineering / www.akitaengineering.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Proximity tracking for the Akita Emergency Response Plugin (AERP).
+
+Keeps the last known position of every node heard on the mesh in NumPy
+arrays so distances to the whole set can be evaluated in a single
+vectorized Haversine pass instead of one scalar calculation per packet.
+A uniform lat/lon grid index narrows radius queries down to the few
+buckets that overlap the search area, and SelfPositionCache keeps this
+node's own position as a ready-made snapshot so the hot path never parses myInfo.
+ProximityAlertTracker turns per-packet distances into enter/exit alerts.
+"""
+
+import logging
+import math
+import threading
+import time
+
+import numpy as np
+
+from .constants import EARTH_RADIUS_METERS, METERS_PER_DEGREE
+
+# Get a logger specific to this module
+logger = logging.getLogger(__name__)
+
+
+class SpatialGrid:
+    """
+    Uniform lat/lon grid that buckets node numbers by position.
+
+    Each cell spans `cell_size_m` meters of latitude and the same number of degrees
+    of longitude. A radius query converts the radius into a degree bounding box,
+    visits only the cells overlapping it, and returns the nodes in those cells as
+    candidates for an exact distance check. The grid is not thread-safe on its own;
+    ProximityEngine guards it with its lock.
+
+    Attributes:
+        cell_size_m (float): Approximate cell edge length in meters.
+        cell_deg (float): Cell edge length in degrees, rounded down so that it divides 360.
+    """
+
+    def __init__(self, cell_size_m=1000):
+        """
+        Initializes an empty grid.
+
+        Args:
+            cell_size_m (float): Cell edge length in meters. Choosing a value close to
+                                 the typical query radius keeps queries to ~9 cells.
+                                 Defaults to 1000.
+        """
+        self.cell_size_m = float(cell_size_m) if cell_size_m and cell_size_m > 0 else 1000.0
+        # Round the cell size so a whole number of cells spans 360 degrees; otherwise the
+        # last longitude cell is partial and index wrap-around at the antimeridian is wrong
+        self._lon_cells = max(1, math.ceil(360.0 * METERS_PER_DEGREE / self.cell_size_m))
+        self.cell_deg = 360.0 / self._lon_cells
+        self._lat_cells = max(1, math.ceil(180.0 / self.cell_deg))
+        self._buckets = {} # (lat_idx, lon_idx) -> set of node_nums
+        self._cell_of = {} # node_num -> (lat_idx, lon_idx)
+
+    def __len__(self):
+        return len(self._cell_of)
+
+    def _cell(self, lat, lon):
+        """Returns the (lat_idx, lon_idx) cell containing a point."""
+        lat_idx = min(int((lat + 90.0) // self.cell_deg), self._lat_cells - 1)
+        lon_idx = int((lon + 180.0) // self.cell_deg) % self._lon_cells
+        return lat_idx, lon_idx
+
+    def update(self, node_num, lat, lon):
+        """
+        Moves a node into the cell for its new position.
+
+        Args:
+            node_num (int): The node number.
+            lat (float): Latitude in decimal degrees.
+            lon (float): Longitude in decimal degrees.
+        """
+        cell = self._cell(lat, lon)
+        old_cell = self._cell_of.get(node_num)
+        if old_cell == cell:
+            return
+        if old_cell is not None:
+            self._discard(node_num, old_cell)
+        self._buckets.setdefault(cell, set()).add(node_num)
+        self._cell_of[node_num] = cell
+
+    def remove(self, node_num):
+        """
+        Removes a node from the grid.
+
+        Args:
+            node_num (int): The node number to remove.
+        """
+        cell = self._cell_of.pop(node_num, None)
+        if cell is not None:
+            self._discard(node_num, cell)
+
+    def _discard(self, node_num, cell):
+        """Removes a node from a bucket, dropping the bucket once it is empty."""
+        bucket = self._buckets.get(cell)
+        if bucket is not None:
+            bucket.discard(node_num)
+            if not bucket:
+                del self._buckets[cell]
+
+    def candidates(self, lat, lon, radius):
+        """
+        Returns the nodes in every cell overlapping the bounding box of a radius query.
+
+        Args:
+            lat (float): Latitude of the query point in decimal degrees.
+            lon (float): Longitude of the query point in decimal degrees.
+            radius (float): Search radius in meters.
+
+        Returns:
+            list: Candidate node numbers. Every node within `radius` is included;
+                  nodes outside it may be included too.
+        """
+        dlat = radius / METERS_PER_DEGREE
+        cos_lat = math.cos(math.radians(min(89.999, abs(lat) + dlat)))
+        dlon = dlat / cos_lat if cos_lat > 1e-9 else 360.0
+
+        lat_lo, _ = self._cell(max(-90.0, lat - dlat), lon)
+        lat_hi, _ = self._cell(min(90.0, lat + dlat), lon)
+        lat_span = lat_hi - lat_lo + 1
+        lon_span = self._lon_cells if dlon >= 180.0 else min(self._lon_cells, int(2 * dlon // self.cell_deg) + 2)
+
+        # If the box covers more cells than are occupied, walking the buckets is cheaper
+        if lat_span * lon_span >= len(self._buckets):
+            result = []
+            for (lat_idx, lon_idx), bucket in self._buckets.items():
+                if lat_lo <= lat_idx <= lat_hi:
+                    result.extend(bucket)
+            return result
+
+        _, lon_lo = self._cell(lat, lon - dlon) if lon_span < self._lon_cells else (0, 0)
+        result = []
+        for lat_idx in range(lat_lo, lat_hi + 1):
+            for step in range(lon_span):
+                bucket = self._buckets.get((lat_idx, (lon_lo + step) % self._lon_cells))
+                if bucket:
+                    result.extend(bucket)
+        return result
+
+
+class ProximityEngine:
+    """
+    Stores node positions in parallel NumPy arrays and answers batch distance queries.
+
+    Positions are stored pre-converted to radians (plus the cosine of the latitude)
+    so a distance query only performs the trigonometry that depends on the query point.
+    Rows are kept dense: removing a node moves the last row into the freed slot.
+
+    Attributes:
+        capacity (int): Current number of rows allocated in the backing arrays.
+        grid (SpatialGrid): Grid index over the same nodes, used to prefilter radius queries.
+    """
+
+    def __init__(self, initial_capacity=64, cell_size_m=1000):
+        """
+        Initializes an empty ProximityEngine.
+
+        Args:
+            initial_capacity (int): Number of rows to pre-allocate. The arrays
+                                    grow automatically when full. Defaults to 64.
+            cell_size_m (float): Cell size of the spatial grid index in meters. Defaults to 1000.
+        """
+        self.capacity = max(1, int(initial_capacity))
+        self._lock = threading.Lock() # Updates arrive on the receive thread, queries from the CLI
+        self._rows = {} # node_num -> row index
+        self._count = 0
+        self._node_nums = np.zeros(self.capacity, dtype=np.int64)
+        self._lat_rad = np.zeros(self.capacity, dtype=np.float64)
+        self._lon_rad = np.zeros(self.capacity, dtype=np.float64)
+        self._cos_lat = np.zeros(self.capacity, dtype=np.float64)
+        self._last_seen = np.zeros(self.capacity, dtype=np.float64)
+        self.grid = SpatialGrid(cell_size_m)
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, node_num):
+        return node_num in self._rows
+
+    def _grow(self):
+        """Doubles the capacity of the backing arrays. Caller must hold the lock."""
+        new_capacity = self.capacity * 2
+        for name in ("_node_nums", "_lat_rad", "_lon_rad", "_cos_lat", "_last_seen"):
+            old = getattr(self, name)
+            new = np.zeros(new_capacity, dtype=old.dtype)
+            new[:self._count] = old[:self._count]
+            setattr(self, name, new)
+        logger.debug(f"ProximityEngine grown from {self.capacity} to {new_capacity} rows.")
+        self.capacity = new_capacity
+
+    def update(self, node_num, lat, lon, timestamp=None):
+        """
+        Records (or replaces) the last known position of a node.
+
+        Args:
+            node_num (int): The node number the position belongs to.
+            lat (float): Latitude in decimal degrees.
+            lon (float): Longitude in decimal degrees.
+            timestamp (float, optional): When the position was heard. Defaults to now.
+        """
+        if node_num is None or lat is None or lon is None:
+            return
+        lat_rad = np.radians(lat)
+        with self._lock:
+            row = self._rows.get(node_num)
+            if row is None:
+                if self._count == self.capacity:
+                    self._grow()
+                row = self._count
+                self._rows[node_num] = row
+                self._node_nums[row] = node_num
+                self._count += 1
+            self._lat_rad[row] = lat_rad
+            self._lon_rad[row] = np.radians(lon)
+            self._cos_lat[row] = np.cos(lat_rad)
+            self._last_seen[row] = timestamp if timestamp is not None else time.time()
+            self.grid.update(node_num, lat, lon)
+
+    def remove(self, node_num):
+        """
+        Stops tracking a node.
+
+        Args:
+            node_num (int): The node number to remove.
+
+        Returns:
+            bool: True if the node was tracked and has been removed, False otherwise.
+        """
+        with self._lock:
+            return self._remove_locked(node_num)
+
+    def _remove_locked(self, node_num):
+        """Removes a node by moving the last row into its slot. Caller must hold the lock."""
+        row = self._rows.pop(node_num, None)
+        if row is None:
+            return False
+        self.grid.remove(node_num)
+        last = self._count - 1
+        if row != last:
+            for arr in (self._node_nums, self._lat_rad, self._lon_rad, self._cos_lat, self._last_seen):
+                arr[row] = arr[last]
+            self._rows[int(self._node_nums[row])] = row
+        self._count = last
+        return True
+
+    def prune(self, older_than):
+        """
+        Removes every node whose last position is older than the given time.
+
+        Args:
+            older_than (float): Epoch timestamp; nodes last seen before it are removed.
+
+        Returns:
+            list: Node numbers that were removed.
+        """
+        with self._lock:
+            stale = self._node_nums[:self._count][self._last_seen[:self._count] < older_than].tolist()
+            for node_num in stale:
+                self._remove_locked(node_num)
+        return stale
+
+    def _snapshot(self, node_nums=None):
+        """
+        Copies the position columns for all (or selected) nodes under the lock.
+
+        Returns:
+            tuple: (node_nums, lat_rad, lon_rad, cos_lat, missing) where `missing` is a
+                   boolean mask of requested nodes that are not tracked, or None.
+        """
+        with self._lock:
+            if node_nums is None:
+                rows = slice(0, self._count)
+                nums = self._node_nums[rows].copy()
+                missing = None
+            else:
+                node_nums = list(node_nums)
+                requested = [self._rows.get(n, -1) for n in node_nums]
+                rows = np.array([r if r >= 0 else 0 for r in requested], dtype=np.intp)
+                nums = np.array(node_nums, dtype=np.int64)
+                missing = np.array([r < 0 for r in requested], dtype=bool)
+            return nums, self._lat_rad[rows].copy(), self._lon_rad[rows].copy(), self._cos_lat[rows].copy(), missing
+
+    @staticmethod
+    def _haversine(lat, lon, lat_rad, lon_rad, cos_lat):
+        """Vectorized Haversine from a point in degrees to pre-converted rows."""
+        q_lat = np.radians(lat)
+        q_lon = np.radians(lon)
+        a = np.sin((lat_rad - q_lat) / 2.0) ** 2 + np.cos(q_lat) * cos_lat * np.sin((lon_rad - q_lon) / 2.0) ** 2
+        return 2.0 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+    def distances_to(self, lat, lon, node_nums=None):
+        """
+        Computes the Haversine distance from a point to tracked nodes in one vectorized pass.
+
+        Args:
+            lat (float): Latitude of the query point in decimal degrees.
+            lon (float): Longitude of the query point in decimal degrees.
+            node_nums (iterable, optional): Restrict the query to these nodes. Unknown
+                                            nodes yield `inf`. Defaults to all tracked nodes.
+
+        Returns:
+            tuple: (node_nums, distances) as aligned NumPy arrays, taken from one snapshot:
+                   every tracked node in row order, or the requested `node_nums` in order.
+                   Distances are in meters.
+        """
+        nums, lat_rad, lon_rad, cos_lat, missing = self._snapshot(node_nums)
+        distances = self._haversine(lat, lon, lat_rad, lon_rad, cos_lat)
+        if missing is not None and missing.any():
+            distances[missing] = np.inf
+        return nums, distances
+
+    def nodes_within(self, lat, lon, radius):
+        """
+        Returns the tracked nodes within a radius of a point, nearest first.
+
+        Args:
+            lat (float): Latitude of the query point in decimal degrees.
+            lon (float): Longitude of the query point in decimal degrees.
+            radius (float): Search radius in meters.
+
+        Returns:
+            list: (node_num, distance_m) tuples sorted by ascending distance.
+        """
+        if math.isinf(radius):
+            nums, distances = self.distances_to(lat, lon)
+        else:
+            # Only the nodes in grid cells overlapping the search area need an exact check
+            with self._lock:
+                nums = np.array(self.grid.candidates(lat, lon, radius), dtype=np.int64)
+                rows = np.array([self._rows[n] for n in nums.tolist()], dtype=np.intp)
+                lat_rad, lon_rad, cos_lat = self._lat_rad[rows], self._lon_rad[rows], self._cos_lat[rows]
+            distances = self._haversine(lat, lon, lat_rad, lon_rad, cos_lat)
+        inside = np.nonzero(distances <= radius)[0]
+        order = inside[np.argsort(distances[inside])]
+        return [(int(nums[i]), float(distances[i])) for i in order]
+
+
+ALERT_ENTER = "enter" # A node came within the alert radius
+ALERT_EXIT = "exit"   # A node inside the alert radius moved beyond the exit radius
+
+
+class _NodeAlertState:
+    """Alert state of one node (see ProximityAlertTracker)."""
+    __slots__ = ("inside", "entered_at", "last_alert", "enters")
+
+    def __init__(self):
+        self.inside = False
+        self.entered_at = None
+        self.last_alert = float('-inf')
+        self.enters = 0
+
+
+class ProximityAlertTracker:
+    """
+    Per-node enter/exit state machine for proximity alerts.
+
+    A node is "inside" once it comes within the alert radius, and only leaves
+    after moving beyond the radius plus a hysteresis band, so a node lingering on
+    the edge does not flap. Only state changes produce events: repeated position
+    reports from a node that is already inside are counted, not alerted. An enter
+    is alerted at most once per cooldown per node; earlier re-entries are counted
+    as suppressed. Alert emission is therefore O(state changes), not O(packets).
+    All methods are thread-safe.
+
+    Attributes:
+        hysteresis (float): Exit band as a fraction of the alert radius.
+        cooldown (float): Minimum seconds between enter alerts for the same node.
+    """
+
+    def __init__(self, hysteresis=0.1, cooldown=300):
+        """
+        Initializes the tracker with no nodes.
+
+        Args:
+            hysteresis (float): Exit band as a fraction of the alert radius. Defaults to 0.1.
+            cooldown (float): Minimum seconds between enter alerts for the same node. Defaults to 300.
+        """
+        self.hysteresis = hysteresis
+        self.cooldown = cooldown
+        self._states = {} # node_num -> _NodeAlertState
+        self._lock = threading.Lock()
+        self.counts = {"alerts": 0, "exits": 0, "suppressed_repeats": 0, "suppressed_reentries": 0}
+
+    def exit_radius(self, radius):
+        """Returns the distance beyond which a node inside `radius` is considered to have left."""
+        return radius * (1 + self.hysteresis)
+
+    def update(self, node_num, distance, radius, now=None):
+        """
+        Feeds a node's latest distance into its state machine.
+
+        Args:
+            node_num (int): The node.
+            distance (float): Its distance in meters (float('inf') if known to be beyond the exit radius).
+            radius (float): The alert radius in meters.
+            now (float, optional): Current time.time(). Defaults to now.
+
+        Returns:
+            str | None: ALERT_ENTER if an alert should be raised, ALERT_EXIT if the node
+                        left the radius, or None if nothing should be reported.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            state = self._states.get(node_num)
+            if state is None:
+                if distance > radius:
+                    return None # Nothing to track for a node that has never been inside
+                state = self._states[node_num] = _NodeAlertState()
+            if state.inside:
+                if distance > self.exit_radius(radius):
+                    state.inside = False
+                    self.counts["exits"] += 1
+                    return ALERT_EXIT
+                self.counts["suppressed_repeats"] += 1
+                return None
+            if distance > radius:
+                return None
+            state.inside = True
+            state.entered_at = now
+            state.enters += 1
+            if now - state.last_alert < self.cooldown:
+                self.counts["suppressed_reentries"] += 1
+                return None
+            state.last_alert = now
+            self.counts["alerts"] += 1
+            return ALERT_ENTER
+
+    def remove(self, node_num):
+        """Forgets a node's state (e.g. when its position is pruned). No-op if unknown."""
+        with self._lock:
+            self._states.pop(node_num, None)
+
+    def stats(self):
+        """
+        Returns alert summary counts.
+
+        Returns:
+            dict: {tracked, inside, alerts, exits, suppressed_repeats, suppressed_reentries}
+        """
+        with self._lock:
+            inside = sum(1 for state in self._states.values() if state.inside)
+            return dict(self.counts, tracked=len(self._states), inside=inside)
+
+
+class SelfPosition:
+    """
+    Immutable snapshot of this node's position.
+
+    Attributes:
+        lat (float): Latitude in decimal degrees.
+        lon (float): Longitude in decimal degrees.
+        altitude (int | None): Altitude in meters, if reported.
+        gps_time (int | None): GPS timestamp of the fix, if reported.
+        updated_at (float): Epoch time the snapshot was taken.
+    """
+    __slots__ = ("lat", "lon", "altitude", "gps_time", "updated_at")
+
+    def __init__(self, lat, lon, altitude=None, gps_time=None, updated_at=None):
+        self.lat = lat
+        self.lon = lon
+        self.altitude = altitude
+        self.gps_time = gps_time
+        self.updated_at = updated_at if updated_at is not None else time.time()
+
+    def as_gps_dict(self):
+        """Returns the position in the 'gps' dictionary format used by AERP messages."""
+        return {
+            "latitude": self.lat,
+            "longitude": self.lon,
+            "altitude": self.altitude,
+            "time": self.gps_time,
+        }
+
+
+class SelfPositionCache:
+    """
+    Caches this node's position so the per-packet path never parses interface.myInfo.
+
+    The cache is refreshed from `interface.myInfo.position` at most once every
+    `refresh_interval` seconds, and immediately whenever a position-change event
+    is pushed in via `update_from_dict` (e.g. a node-updated event for this node).
+    Readers get a `SelfPosition` snapshot, which is replaced atomically.
+
+    Attributes:
+        interface: The Meshtastic interface object to read the position from.
+        refresh_interval (float): Minimum seconds between reads of interface.myInfo.
+    """
+
+    def __init__(self, interface, refresh_interval=5.0):
+        """
+        Initializes the cache. No position is read until the first `get`.
+
+        Args:
+            interface: The Meshtastic interface object.
+            refresh_interval (float): Minimum seconds between interface reads. Defaults to 5.
+        """
+        self.interface = interface
+        self.refresh_interval = refresh_interval
+        self._position = None
+        self._next_refresh = 0.0 # monotonic time of the next allowed interface read
+
+    def get(self):
+        """
+        Returns the cached position, re-reading the interface if the refresh interval elapsed.
+
+        Returns:
+            SelfPosition | None: The current position snapshot, or None if unknown.
+        """
+        if time.monotonic() >= self._next_refresh:
+            self.refresh()
+        return self._position
+
+    def refresh(self):
+        """
+        Re-reads the position from interface.myInfo.position.
+
+        Returns:
+            SelfPosition | None: The new snapshot, or the previous one if no valid position was found.
+        """
+        self._next_refresh = time.monotonic() + self.refresh_interval
+        try:
+            if self.interface and hasattr(self.interface, 'myInfo') and self.interface.myInfo:
+                self.update_from_dict(self.interface.myInfo.position)
+        except AttributeError:
+             logger.warning("Could not access my position (interface.myInfo.position).")
+        except Exception as e:
+            logger.error(f"Could not get my own position: {e}")
+        return self._position
+
+    def update_from_dict(self, position):
+        """
+        Replaces the cached position from a Meshtastic position dictionary.
+
+        Accepts either the integer (`latitudeI`/`longitudeI`, degrees * 1e7) or
+        float (`latitude`/`longitude`) form. Invalid input leaves the cache unchanged.
+
+        Args:
+            position (dict): The position dictionary.
+
+        Returns:
+            bool: True if the cache was updated.
+        """
+        if not position or not isinstance(position, dict):
+            return False
+        try:
+            if 'latitudeI' in position and 'longitudeI' in position:
+                lat = position['latitudeI'] / 1e7
+                lon = position['longitudeI'] / 1e7
+            elif 'latitude' in position and 'longitude' in position: # Fallback
+                lat = float(position['latitude'])
+                lon = float(position['longitude'])
+            else:
+                return False
+        except (TypeError, ValueError) as e:
+            logger.debug(f"Ignoring invalid own position {position}: {e}")
+            return False
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            logger.debug(f"Ignoring out-of-range own position: lat={lat}, lon={lon}")
+            return False
+        self._position = SelfPosition(lat, lon, position.get('altitude'), position.get('time'))
+        return True
+
+    def invalidate(self):
+        """Forgets the cached position (e.g. after a disconnect)."""
+        self._position = None
+        self._next_refresh = 0.0
@@ -0,0 +1,309 @@
+# aerp/scheduling.py
+# Copyright (C) 2025 Akita Engineering / www.akitaengineering.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Timing policies for the Akita Emergency Response Plugin (AERP).
+
+Contains the adaptive broadcast interval used to pace emergency broadcasts and
+the single-threaded task scheduler that runs broadcasts, cleanup, ACK retries
+and status snapshots.
+"""
+
+import heapq
+import logging
+import threading
+import time
+
+from .constants import (
+    ADAPTIVE_FAST_BROADCASTS, ADAPTIVE_MOVE_THRESHOLD_METERS, ADAPTIVE_BUSY_CHANNEL_PERCENT
+)
+from .utils import calculate_distance
+
+# Get a logger specific to this module
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveInterval:
+    """
+    Chooses the delay before the next emergency broadcast.
+
+    - The first few broadcasts of a session go out at the floor interval so the
+      first ACK arrives quickly.
+    - Without ACKs, the cadence then settles at the base (configured) interval.
+    - Once ACKs arrive, the interval doubles after each broadcast, up to the ceiling.
+    - Moving more than a threshold distance since the previous broadcast resets the
+      cadence to the floor, so rescuers get the new position promptly.
+    - A busy channel (high channel utilization) doubles the chosen interval.
+
+    Attributes:
+        base (float): The configured broadcast interval in seconds.
+        floor (float): Shortest allowed interval in seconds.
+        ceiling (float): Longest allowed interval in seconds.
+        current (float): The most recently chosen interval.
+    """
+
+    def __init__(self, base, floor, ceiling):
+        """
+        Initializes the policy for a new emergency session.
+
+        Args:
+            base (float): The configured broadcast interval in seconds.
+            floor (float): Shortest allowed interval in seconds.
+            ceiling (float): Longest allowed interval in seconds.
+        """
+        self.floor = min(floor, ceiling)
+        self.ceiling = max(floor, ceiling)
+        self.base = max(self.floor, min(base, self.ceiling))
+        self.current = self.floor
+        self._broadcasts = 0
+        self._last_position = None # (lat, lon) at the previous broadcast
+
+    def next_interval(self, ack_count, position=None, channel_utilization=None):
+        """
+        Records a broadcast and returns the delay before the next one.
+
+        Args:
+            ack_count (int): ACKs received so far for the current emergency.
+            position (tuple, optional): (lat, lon) included in the broadcast just sent.
+            channel_utilization (float, optional): Channel utilization percentage reported by the device.
+
+        Returns:
+            float: Seconds to wait before the next broadcast.
+        """
+        self._broadcasts += 1
+
+        moved = False
+        if position is not None and self._last_position is not None:
+            moved = calculate_distance(*self._last_position, *position) > ADAPTIVE_MOVE_THRESHOLD_METERS
+        if position is not None:
+            self._last_position = position
+
+        if moved:
+            logger.debug("Position changed significantly; broadcasting at the fast cadence again.")
+            self.current = self.floor
+        elif ack_count > 0:
+            self.current = min(max(self.current, self.base) * 2, self.ceiling) # Exponential back-off
+        elif self._broadcasts < ADAPTIVE_FAST_BROADCASTS:
+            self.current = self.floor
+        else:
+            self.current = self.base
+
+        interval = self.current
+        if channel_utilization is not None and channel_utilization >= ADAPTIVE_BUSY_CHANNEL_PERCENT:
+            interval = min(interval * 2, self.ceiling)
+            logger.debug(f"Channel busy ({channel_utilization:.1f}%); stretching broadcast interval to {interval}s.")
+        return interval
+
+
+class _TaskTiming:
+    """Run count and start lateness (seconds) for all tasks sharing a name."""
+    __slots__ = ("runs", "lateness_total", "lateness_max")
+
+    def __init__(self):
+        self.runs = 0
+        self.lateness_total = 0.0
+        self.lateness_max = 0.0
+
+    def record(self, lateness):
+        self.runs += 1
+        self.lateness_total += lateness
+        if lateness > self.lateness_max:
+            self.lateness_max = lateness
+
+    def as_dict(self):
+        runs = self.runs or 1
+        return {
+            "runs": self.runs,
+            "avg_late_ms": round(self.lateness_total / runs * 1000, 3),
+            "max_late_ms": round(self.lateness_max * 1000, 3),
+        }
+
+
+class ScheduledTask:
+    """
+    A callback registered with a `TaskScheduler`.
+
+    Attributes:
+        name (str): Task name, used in logs and stats.
+        interval (float | None): Default delay between runs in seconds; None for a one-shot task.
+        due (float): time.monotonic() value of the next run.
+        cancelled (bool): True once the task has been cancelled (it will not run again).
+    """
+    __slots__ = ("name", "callback", "interval", "due", "cancelled", "timing")
+
+    def __init__(self, name, callback, interval, timing):
+        self.name = name
+        self.callback = callback
+        self.interval = interval
+        self.due = 0.0
+        self.cancelled = False
+        self.timing = timing
+
+
+class TaskScheduler:
+    """
+    Runs periodic and one-shot tasks on a single thread, ordered by a min-heap of due times.
+
+    Replaces one sleeping thread per activity: the thread only wakes when the
+    earliest task is due (or the heap changes). A task callback may return a
+    number to choose its next delay (e.g. an adaptive interval); returning None
+    uses the task's `interval`, and one-shot tasks never repeat. Rescheduling a
+    task pushes a new heap entry; stale entries are skipped when popped.
+
+    Tasks run one at a time, so a slow callback delays the others. Each run's
+    lateness (start time minus due time) is recorded per task, see `stats()`.
+    """
+
+    def __init__(self, name="AERPSchedulerThread"):
+        """
+        Initializes the scheduler. Call `start()` to launch its thread.
+
+        Args:
+            name (str): Scheduler thread name.
+        """
+        self._name = name
+        self._heap = [] # (due, counter, task) entries; counter breaks ties in FIFO order
+        self._counter = 0
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+        self._timing = {} # task name -> _TaskTiming
+
+    def start(self):
+        """Starts the scheduler thread (no-op if already running)."""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True, name=self._name)
+        self._thread.start()
+        logger.debug(f"{self._name} started.")
+
+    def stop(self, timeout=2.0):
+        """
+        Stops the scheduler after the task it is currently running. Pending tasks are discarded.
+
+        Args:
+            timeout (float): Seconds to wait for the thread to exit.
+        """
+        with self._cond:
+            self._running = False
+            self._heap.clear()
+            self._cond.notify_all()
+        if self._thread and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def schedule(self, name, callback, delay=0.0, interval=None):
+        """
+        Registers a task.
+
+        Args:
+            name (str): Task name. Stats are aggregated over all tasks with the same name.
+            callback (callable): Called with no arguments on the scheduler thread.
+            delay (float): Seconds until the first run. Defaults to 0 (as soon as possible).
+            interval (float, optional): Default seconds between runs; None for a one-shot task.
+
+        Returns:
+            ScheduledTask: Handle for `cancel` and `run_now`.
+        """
+        with self._cond:
+            timing = self._timing.get(name)
+            if timing is None:
+                timing = self._timing[name] = _TaskTiming()
+            task = ScheduledTask(name, callback, interval, timing)
+            self._push(task, time.monotonic() + max(0.0, delay))
+        return task
+
+    def cancel(self, task):
+        """Cancels a task. A run already in progress finishes; no further runs happen."""
+        if task is None:
+            return
+        with self._cond:
+            task.cancelled = True
+            self._cond.notify()
+
+    def run_now(self, task):
+        """
+        Moves a pending task's next run to now.
+
+        Returns:
+            bool: True if the task was rescheduled, False if it was cancelled or already finished.
+        """
+        with self._cond:
+            if task is None or task.cancelled or not self._running:
+                return False
+            self._push(task, time.monotonic())
+            return True
+
+    def stats(self):
+        """
+        Returns per-task run counts and jitter (how late each run started).
+
+        Returns:
+            dict: {task_name: {runs, avg_late_ms, max_late_ms}}
+        """
+        with self._cond:
+            return {name: timing.as_dict() for name, timing in self._timing.items()}
+
+    def _push(self, task, due):
+        """Adds a heap entry for `task` due at `due` (caller holds the lock)."""
+        task.due = due
+        self._counter += 1
+        heapq.heappush(self._heap, (due, self._counter, task))
+        self._cond.notify()
+
+    def _run(self):
+        """Scheduler loop: sleeps until the earliest task is due, then runs it."""
+        while True:
+            with self._cond:
+                task = None
+                while self._running:
+                    # Drop cancelled tasks and entries superseded by a later reschedule
+                    while self._heap and (self._heap[0][2].cancelled or self._heap[0][0] != self._heap[0][2].due):
+                        heapq.heappop(self._heap)
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    due = self._heap[0][0]
+                    now = time.monotonic()
+                    if due > now:
+                        self._cond.wait(due - now)
+                        continue
+                    task = heapq.heappop(self._heap)[2]
+                    break
+                if not self._running:
+                    break
+                task.due = float("inf") # Running; not pending until rescheduled
+            started = time.monotonic()
+            lateness = started - due
+            try:
+                next_delay = task.callback()
+            except Exception as e:
+                # Keep the scheduler alive no matter what a single task does
+                next_delay = None
+                logger.exception(f"Error in scheduled task '{task.name}': {e}")
+            with self._cond:
+                task.timing.record(lateness)
+                if task.cancelled or task.due != float("inf"):
+                    continue # Cancelled, or run_now() was called while it ran
+                if next_delay is None:
+                    next_delay = task.interval
+                if next_delay is None:
+                    task.cancelled = True # One-shot task finished
+                else:
+                    self._push(task, time.monotonic() + max(0.0, next_delay))
+        logger.debug(f"{self._name} stopped.")
@@ -0,0 +1,139 @@
+# aerp/status.py
+# Copyright (C) 2025 Akita Engineering / www.akitaengineering.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Structured status for the Akita Emergency Response Plugin (AERP).
+
+`AERP.status()` returns a `StatusSnapshot`: typed records, node numbers and raw
+epoch timestamps, with no string formatting. Presentation happens only where
+it is needed: `cli.print_status` formats for the console, and `render_status`
+produces the legacy formatted dictionary returned by `AERP.get_status()`.
+"""
+
+from datetime import datetime
+
+from .utils import format_node_id
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def format_timestamp(epoch):
+    """Formats epoch seconds as local time ('N/A' if missing or invalid)."""
+    try:
+        return datetime.fromtimestamp(epoch).strftime(TIMESTAMP_FORMAT)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return "N/A"
+
+
+class StatusSnapshot:
+    """
+    Immutable point-in-time status of an AERP instance.
+
+    Shared between callers: treat every attribute as read-only.
+
+    Attributes:
+        my_node_num (int | None): This node's number.
+        my_node_id (str): This node's formatted ID.
+        emergency_active (bool): True while our emergency broadcast is active.
+        last_emergency_id (str | None): ID of our active emergency session.
+        acknowledgements (dict): {acked_node_num: ack epoch} for the active session.
+        received_emergencies (dict): {sender_node_num: ReceivedEmergency} from other nodes.
+        tracked_node_distances (list): (node_num, meters) tuples, nearest first.
+        ingest (dict): Ingest queue counters, including 'queued'.
+        ingest_latency (dict): Per priority class latency metrics.
+        scheduler (dict): Per task run counts and start lateness.
+        ack_store (dict): ACK store memory accounting.
+        proximity_alerts (dict): Proximity alert summary counts.
+        dedup (dict): Duplicate packet cache counters.
+        ack_policy (dict): ACK decisions per reason, and suppressed ACKs.
+        config (dict): The configuration in effect.
+        snapshot_time (float): Epoch time the snapshot was built.
+    """
+    __slots__ = ("my_node_num", "my_node_id", "emergency_active", "last_emergency_id", "acknowledgements",
+                 "received_emergencies", "tracked_node_distances", "ingest", "ingest_latency", "scheduler",
+                 "ack_store", "proximity_alerts", "dedup", "ack_policy", "config", "snapshot_time")
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            object.__setattr__(self, name, fields.get(name))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("StatusSnapshot is immutable")
+
+    def as_dict(self):
+        """
+        Returns the snapshot as plain, JSON-serializable data (raw epochs and node numbers).
+
+        Returns:
+            dict: The status, with received emergencies converted to dictionaries.
+        """
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data["acknowledgements"] = dict(self.acknowledgements)
+        data["received_emergencies"] = {
+            node_num: {
+                "emergency_id": info.message_id,
+                "message": info.message,
+                "gps": info.gps,
+                "battery": info.battery,
+                "seq": info.seq,
+                "timestamp": info.timestamp,
+                "last_seen": info.last_seen,
+            }
+            for node_num, info in self.received_emergencies.items()
+        }
+        data["tracked_node_distances"] = [[node_num, distance] for node_num, distance in self.tracked_node_distances]
+        return data
+
+
+def render_status(snapshot):
+    """
+    Renders a snapshot into the formatted dictionary of `AERP.get_status()`.
+
+    Node numbers become "!aabbccdd" IDs and epochs become local time strings.
+
+    Args:
+        snapshot (StatusSnapshot): The structured status.
+
+    Returns:
+        dict: The formatted status.
+    """
+    received = {}
+    for node_num, info in snapshot.received_emergencies.items():
+        received[format_node_id(node_num)] = {
+            "emergency_id": info.message_id,
+            "message": info.message,
+            "gps": info.gps,
+            "battery": info.battery,
+            "received_at": format_timestamp(info.timestamp or 0),
+            "last_seen": format_timestamp(info.last_seen or 0),
+        }
+    return {
+        "my_node_id": snapshot.my_node_id,
+        "emergency_active": snapshot.emergency_active,
+        "last_emergency_id": snapshot.last_emergency_id,
+        "active_acknowledgements": {format_node_id(n): format_timestamp(ts) for n, ts in snapshot.acknowledgements.items()},
+        "active_received_emergencies": received,
+        "tracked_node_distances": {format_node_id(n): round(d, 1) for n, d in snapshot.tracked_node_distances},
+        "ingest": snapshot.ingest,
+        "ingest_latency": snapshot.ingest_latency,
+        "scheduler": snapshot.scheduler,
+        "ack_store": snapshot.ack_store,
+        "proximity_alerts": snapshot.proximity_alerts,
+        "dedup": snapshot.dedup,
+        "ack_policy": snapshot.ack_policy,
+        "config": snapshot.config,
+        "snapshot_time": snapshot.snapshot_time,
+    }
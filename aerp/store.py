@@ -0,0 +1,518 @@
+# aerp/store.py
+# Copyright (C) 2025 Akita Engineering / www.akitaengineering.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Bounded state containers for the Akita Emergency Response Plugin (AERP).
+
+A gateway may run for weeks and start many emergency sessions (including
+drills). `AckStore` keeps the acknowledgements received for this node's own
+sessions in a bounded LRU so memory stays constant over time.
+
+Tracked state uses slotted record types instead of per-entry dicts:
+`ReceivedEmergency` for emergencies heard from other nodes, and `AckRecord`,
+which packs one session's ACKs into two parallel arrays. `DuplicateCache`
+remembers recently seen packets so mesh rebroadcasts are handled once.
+"""
+
+import array
+import collections
+import itertools
+import logging
+import sys
+import threading
+import time
+
+# Get a logger specific to this module
+logger = logging.getLogger(__name__)
+
+
+class ReceivedEmergency:
+    """
+    An active emergency received from another node.
+
+    GPS fields are stored flat instead of as a nested dict; `gps` rebuilds the
+    dictionary form used in messages and status output.
+
+    Attributes:
+        message_id (str | None): The sender's emergency ID.
+        timestamp (float): Sender's timestamp of the emergency message.
+        message (str): The emergency text.
+        latitude, longitude (float | None): Sender position in decimal degrees.
+        altitude (float | None): Sender altitude in meters.
+        gps_time (int | None): Sender GPS fix time.
+        battery (int | None): Sender battery level in percent.
+        seq (int | None): Broadcast sequence number (delta mode), else None.
+        last_seen (float): time.time() when we last heard from the sender.
+    """
+    __slots__ = ("message_id", "timestamp", "message", "latitude", "longitude", "altitude",
+                 "gps_time", "battery", "seq", "last_seen")
+
+    def __init__(self, message_id, timestamp, message, gps=None, battery=None, seq=None, last_seen=None):
+        """
+        Initializes the record.
+
+        Args:
+            message_id (str | None): The sender's emergency ID.
+            timestamp (float): Sender's timestamp of the emergency message.
+            message (str): The emergency text.
+            gps (dict, optional): GPS dictionary ('latitude', 'longitude', 'altitude', 'time').
+            battery (int, optional): Battery level in percent.
+            seq (int, optional): Broadcast sequence number.
+            last_seen (float, optional): When we last heard from the sender. Defaults to time.time().
+        """
+        self.message_id = message_id
+        self.timestamp = timestamp
+        self.message = message
+        if isinstance(gps, dict) and gps.get("latitude") is not None and gps.get("longitude") is not None:
+            self.latitude = gps["latitude"]
+            self.longitude = gps["longitude"]
+            self.altitude = gps.get("altitude")
+            self.gps_time = gps.get("time")
+        else:
+            self.latitude = self.longitude = self.altitude = self.gps_time = None
+        self.battery = battery
+        self.seq = seq
+        self.last_seen = time.time() if last_seen is None else last_seen
+
+    @property
+    def gps(self):
+        """The GPS dictionary form ({} if the sender sent no position)."""
+        if self.latitude is None or self.longitude is None:
+            return {}
+        return {"latitude": self.latitude, "longitude": self.longitude, "altitude": self.altitude, "time": self.gps_time}
+
+
+class AckRecord:
+    """
+    The ACKs received for one emergency session.
+
+    Node numbers and ACK timestamps are kept in two parallel arrays (12 bytes per
+    ACK) rather than a dict of boxed ints and floats. Lookups are linear, which is
+    fast for the tens of nodes that acknowledge a single emergency. Supports the
+    read side of a {node_num: timestamp} dict: `in`, `len`, `get` and `items`.
+
+    Attributes:
+        last_used (float): time.time() of the session's last start or ACK (for LRU/age eviction).
+    """
+    __slots__ = ("_nodes", "_timestamps", "last_used")
+
+    def __init__(self, last_used=None):
+        self._nodes = array.array("I") # Meshtastic node numbers are unsigned 32-bit
+        self._timestamps = array.array("d")
+        self.last_used = time.time() if last_used is None else last_used
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __contains__(self, node_num):
+        return self._index(node_num) is not None
+
+    def __iter__(self):
+        return iter(self._nodes.tolist())
+
+    def get(self, node_num, default=None):
+        """Returns the ACK timestamp of a node, or `default`."""
+        index = self._index(node_num)
+        return default if index is None else self._timestamps[index]
+
+    def items(self):
+        """Returns a list of (node_num, timestamp) pairs."""
+        return list(zip(self._nodes.tolist(), self._timestamps.tolist()))
+
+    def set(self, node_num, timestamp):
+        """
+        Stores or refreshes a node's ACK.
+
+        Returns:
+            bool: True if this is the node's first ACK.
+        """
+        index = self._index(node_num)
+        if index is None:
+            self._nodes.append(node_num)
+            self._timestamps.append(timestamp)
+            return True
+        self._timestamps[index] = timestamp
+        return False
+
+    def remove(self, node_num):
+        """Removes a node's ACK. Returns True if it was present."""
+        index = self._index(node_num)
+        if index is None:
+            return False
+        del self._nodes[index]
+        del self._timestamps[index]
+        return True
+
+    def nbytes(self):
+        """Returns the memory used by this record and its arrays, in bytes."""
+        return sys.getsizeof(self) + sys.getsizeof(self._nodes) + sys.getsizeof(self._timestamps) + sys.getsizeof(self.last_used)
+
+    def _index(self, node_num):
+        try:
+            return self._nodes.index(node_num)
+        except (ValueError, TypeError, OverflowError):
+            return None
+
+
+class AckStore:
+    """
+    Acknowledgements for this node's emergency sessions, bounded by count and age.
+
+    Maps emergency_id -> AckRecord (read like {acked_node_num: ack_timestamp}), like
+    the plain dict it replaces (`in`, `[]`, `get`, iteration and `len` work the same).
+    Sessions are kept in least-recently-used order: opening a session or recording
+    an ACK for it marks it as used. When more than `max_sessions` are held, the
+    least recently used ones are evicted; `evict_older_than` removes sessions idle
+    for too long. The current (active) session is never evicted. All methods are
+    thread-safe; use `acks_snapshot` to read a session's ACKs while they may change.
+
+    Attributes:
+        max_sessions (int): Maximum number of sessions kept.
+        current (str | None): The active session's emergency ID.
+        evicted (int): Number of sessions evicted so far.
+        version (int): Incremented on every change (for cheap change detection).
+    """
+
+    def __init__(self, max_sessions=16):
+        """
+        Initializes an empty store.
+
+        Args:
+            max_sessions (int): Maximum number of sessions kept. Defaults to 16.
+        """
+        self.max_sessions = max(1, int(max_sessions))
+        self.current = None
+        self.evicted = 0
+        self.version = 0
+        self._sessions = collections.OrderedDict() # emergency_id -> AckRecord, least recently used first
+        self._lock = threading.Lock()
+
+    def __contains__(self, emergency_id):
+        return emergency_id in self._sessions
+
+    def __getitem__(self, emergency_id):
+        return self._sessions[emergency_id]
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._sessions))
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def get(self, emergency_id, default=None):
+        """Returns the AckRecord of a session, or `default`."""
+        return self._sessions.get(emergency_id, default)
+
+    def acks_snapshot(self, emergency_id):
+        """
+        Returns a consistent copy of a session's ACKs.
+
+        Returns:
+            dict: {node_num: timestamp} (empty if the session is unknown).
+        """
+        with self._lock:
+            acks = self._sessions.get(emergency_id)
+            return dict(acks.items()) if acks is not None else {}
+
+    def open_session(self, emergency_id, now=None):
+        """
+        Starts tracking ACKs for a new session and makes it the current one.
+
+        Args:
+            emergency_id (str): The new session's emergency ID.
+            now (float, optional): Current time. Defaults to time.time().
+        """
+        with self._lock:
+            self._sessions[emergency_id] = AckRecord()
+            self._touch(emergency_id, now)
+            self.current = emergency_id
+            self.version += 1
+            self._enforce_bound()
+
+    def close_session(self, emergency_id):
+        """Marks a session as no longer current, so it becomes evictable. Its ACKs are kept."""
+        with self._lock:
+            if self.current == emergency_id:
+                self.current = None
+                self.version += 1
+
+    def record(self, emergency_id, node_num, timestamp, now=None):
+        """
+        Records an ACK for a known session.
+
+        Args:
+            emergency_id (str): The acknowledged emergency ID.
+            node_num (int): The acknowledging node.
+            timestamp (float): When the ACK was sent.
+            now (float, optional): Current time. Defaults to time.time().
+
+        Returns:
+            bool | None: True for a first ACK from this node, False for a refresh,
+                         None if the session is unknown (not ours, or evicted).
+        """
+        with self._lock:
+            acks = self._sessions.get(emergency_id)
+            if acks is None:
+                return None
+            is_new = acks.set(node_num, timestamp)
+            self._touch(emergency_id, now)
+            self.version += 1
+            return is_new
+
+    def remove_ack(self, emergency_id, node_num):
+        """
+        Removes one ACK (e.g. when it goes stale). The session itself is kept.
+
+        Returns:
+            bool: True if the ACK was present.
+        """
+        with self._lock:
+            acks = self._sessions.get(emergency_id)
+            if acks is None or not acks.remove(node_num):
+                return False
+            self.version += 1
+            return True
+
+    def evict_older_than(self, cutoff):
+        """
+        Evicts sessions (other than the current one) not used since `cutoff`.
+
+        Args:
+            cutoff (float): time.time() value; sessions last used before it are evicted.
+
+        Returns:
+            list: The evicted emergency IDs.
+        """
+        with self._lock:
+            stale = [eid for eid, acks in self._sessions.items() if acks.last_used < cutoff and eid != self.current]
+            for emergency_id in stale:
+                self._evict(emergency_id)
+            return stale
+
+    def set_max_sessions(self, max_sessions):
+        """Changes the session bound, evicting least recently used sessions if needed."""
+        with self._lock:
+            self.max_sessions = max(1, int(max_sessions))
+            self._enforce_bound()
+
+    def memory_usage(self):
+        """
+        Returns a memory accounting of the store.
+
+        `approx_bytes` is the size (sys.getsizeof) of the session dict, its keys and
+        the AckRecords with their arrays.
+
+        Returns:
+            dict: {sessions, acks, max_sessions, evicted, approx_bytes}
+        """
+        with self._lock:
+            size = sys.getsizeof(self._sessions)
+            acks = 0
+            for emergency_id, record in self._sessions.items():
+                acks += len(record)
+                size += sys.getsizeof(emergency_id) + record.nbytes()
+            return {
+                "sessions": len(self._sessions),
+                "acks": acks,
+                "max_sessions": self.max_sessions,
+                "evicted": self.evicted,
+                "approx_bytes": size,
+            }
+
+    def _touch(self, emergency_id, now):
+        """Marks a session as most recently used (caller holds the lock)."""
+        self._sessions.move_to_end(emergency_id)
+        self._sessions[emergency_id].last_used = time.time() if now is None else now
+
+    def _enforce_bound(self):
+        """Evicts least recently used sessions beyond max_sessions (caller holds the lock)."""
+        while len(self._sessions) > self.max_sessions:
+            victim = next((eid for eid in self._sessions if eid != self.current), None)
+            if victim is None:
+                break
+            self._evict(victim)
+
+    def _evict(self, emergency_id):
+        """Removes a session (caller holds the lock)."""
+        nodes = self._sessions.pop(emergency_id, None)
+        self.evicted += 1
+        self.version += 1
+        logger.debug(f"Evicted ACK record of emergency session {emergency_id} ({len(nodes or ())} ACKs).")
+
+
+class EmergencyTable:
+    """
+    Concurrent map of sender node_num -> ReceivedEmergency.
+
+    Entries are spread over lock stripes by node number, so a write only locks
+    its own stripe and readers copy one stripe at a time: the ingest worker never
+    waits for a status reader walking the whole table. Records are replaced, not
+    mutated, once stored, so snapshots can share them safely. Supports the dict
+    operations AERP uses; `items`, `values` and iteration return snapshots.
+
+    Attributes:
+        version (int): Changes on every write (for cheap change detection).
+    """
+
+    def __init__(self, stripes=8):
+        """
+        Initializes an empty table.
+
+        Args:
+            stripes (int): Number of lock stripes. Defaults to 8.
+        """
+        self._stripes = [({}, threading.Lock()) for _ in range(max(1, int(stripes)))]
+        self._versions = itertools.count(1) # next() is atomic, unlike += across stripes
+        self.version = 0
+
+    def _stripe(self, node_num):
+        return self._stripes[hash(node_num) % len(self._stripes)]
+
+    def __contains__(self, node_num):
+        entries, _ = self._stripe(node_num)
+        return node_num in entries
+
+    def __getitem__(self, node_num):
+        entries, _ = self._stripe(node_num)
+        return entries[node_num]
+
+    def __setitem__(self, node_num, record):
+        entries, lock = self._stripe(node_num)
+        with lock:
+            entries[node_num] = record
+            self.version = next(self._versions)
+
+    def __delitem__(self, node_num):
+        if self.pop(node_num, None) is None:
+            raise KeyError(node_num)
+
+    def __len__(self):
+        return sum(len(entries) for entries, _ in self._stripes)
+
+    def __iter__(self):
+        return iter([node_num for node_num, _ in self.items()])
+
+    def get(self, node_num, default=None):
+        """Returns the record of a sender, or `default`."""
+        entries, _ = self._stripe(node_num)
+        return entries.get(node_num, default)
+
+    def pop(self, node_num, default=None):
+        """Removes and returns the record of a sender, or `default` if absent."""
+        entries, lock = self._stripe(node_num)
+        with lock:
+            record = entries.pop(node_num, None)
+            if record is None:
+                return default
+            self.version = next(self._versions)
+            return record
+
+    def items(self):
+        """Returns a snapshot list of (node_num, ReceivedEmergency) pairs."""
+        snapshot = []
+        for entries, lock in self._stripes:
+            with lock:
+                snapshot.extend(entries.items())
+        return snapshot
+
+    def values(self):
+        """Returns a snapshot list of the records."""
+        return [record for _, record in self.items()]
+
+
+class DuplicateCache:
+    """
+    Fixed-size, time-bounded set of recently seen packet keys.
+
+    Mesh rebroadcasts deliver the same packet several times over different hops.
+    Keys (e.g. (from, packet id)) are written into a preallocated ring buffer that
+    overwrites the oldest slot when full, with a dict from key to slot for O(1)
+    lookups. A key only counts as a duplicate within `ttl` seconds of its first
+    sighting, so a packet ID reused after a long time is not suppressed; expired
+    entries are simply overwritten as the ring wraps. Thread-safe.
+
+    Attributes:
+        capacity (int): Maximum number of keys remembered.
+        ttl (float): Seconds a key is remembered.
+    """
+
+    def __init__(self, capacity=1024, ttl=600):
+        """
+        Initializes an empty cache.
+
+        Args:
+            capacity (int): Maximum number of keys remembered. Defaults to 1024.
+            ttl (float): Seconds a key is remembered. Defaults to 600.
+        """
+        self.capacity = max(1, int(capacity))
+        self.ttl = ttl
+        self._keys = [None] * self.capacity # Ring buffer of keys
+        self._first_seen = [0.0] * self.capacity # time.monotonic() of each slot's key
+        self._next = 0 # Slot overwritten by the next new key
+        self._slot_of = {} # key -> slot
+        self._lock = threading.Lock()
+        self._lookups = 0
+        self._hits = 0
+
+    def __len__(self):
+        return len(self._slot_of)
+
+    def check_and_add(self, key, now=None):
+        """
+        Records a key and reports whether it was already seen within the TTL.
+
+        Args:
+            key: Any hashable key.
+            now (float, optional): Current time.monotonic(). Defaults to now.
+
+        Returns:
+            bool: True if the key is a duplicate (seen within `ttl`), False if it is new.
+        """
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            self._lookups += 1
+            slot_of = self._slot_of
+            slot = slot_of.get(key)
+            if slot is not None and now - self._first_seen[slot] <= self.ttl:
+                self._hits += 1
+                return True
+            slot = self._next
+            old_key = self._keys[slot]
+            if old_key is not None and slot_of.get(old_key) == slot:
+                del slot_of[old_key] # Evict the oldest key
+            self._keys[slot] = key
+            self._first_seen[slot] = now
+            slot_of[key] = slot
+            self._next = slot + 1 if slot + 1 < self.capacity else 0
+            return False
+
+    def stats(self):
+        """
+        Returns lookup counters.
+
+        Returns:
+            dict: {size, capacity, lookups, duplicates, hit_rate}
+        """
+        with self._lock:
+            return {
+                "size": len(self._slot_of),
+                "capacity": self.capacity,
+                "lookups": self._lookups,
+                "duplicates": self._hits,
+                "hit_rate": self._hits / self._lookups if self._lookups else 0.0,
+            }
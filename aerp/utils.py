@@ -21,9 +21,15 @@ Includes distance calculation, location extraction, and formatting helpers.
 
 import math
 import logging
+import os
+import uuid
 import meshtastic.util # For POSITION_APP constant if needed, though direct check is fine
 
-from .constants import EARTH_RADIUS_METERS
+from .constants import (
+    EARTH_RADIUS_METERS, METERS_PER_DEGREE,
+    FAST_DISTANCE_MAX_APPROX_METERS, FAST_DISTANCE_EXACT_BAND,
+    EMERGENCY_ID_MODE_SHORT, SHORT_ID_BYTES
+)
 
 # Get a logger specific to this module
 logger = logging.getLogger(__name__)
@@ -76,6 +82,55 @@ def calculate_distance(lat1, lon1, lat2, lon2):
          return float('inf')
 
 
+def calculate_distance_fast(lat1, lon1, lat2, lon2, max_distance):
+    """
+    Fast-path distance for "is this point within max_distance" checks.
+
+    Skips the input validation of `calculate_distance` (callers must pass valid
+    decimal-degree floats) and avoids trigonometry for clearly distant points:
+    1. Points whose latitude delta alone exceeds `max_distance` are rejected with
+       no trig at all (a degree of latitude is a fixed distance).
+    2. For short thresholds, the equirectangular approximation is used.
+    3. Only approximations close to the threshold (or thresholds too long for the
+       approximation) fall back to the exact Haversine formula.
+
+    Args:
+        lat1 (float): Latitude of point 1.
+        lon1 (float): Longitude of point 1.
+        lat2 (float): Latitude of point 2.
+        lon2 (float): Longitude of point 2.
+        max_distance (float): The threshold of interest in meters (e.g. alert radius).
+
+    Returns:
+        float: Distance in meters, or float('inf') if the point is certainly
+               farther than `max_distance`.
+    """
+    # 1. Latitude bounding box: the great-circle distance is never shorter than the latitude delta
+    dlat = lat2 - lat1
+    if abs(dlat) * METERS_PER_DEGREE > max_distance:
+        return float('inf')
+
+    if max_distance > FAST_DISTANCE_MAX_APPROX_METERS:
+        # Approximation error grows with range; use the exact formula for long thresholds
+        distance = calculate_distance(lat1, lon1, lat2, lon2)
+        return distance if distance <= max_distance else float('inf')
+
+    # 2. Equirectangular approximation (one cosine, one square root)
+    dlon = abs(lon2 - lon1)
+    if dlon > 180:
+        dlon = 360 - dlon # Shortest way around the antimeridian
+    x = dlon * math.cos(math.radians((lat1 + lat2) / 2))
+    distance = math.sqrt(x * x + dlat * dlat) * METERS_PER_DEGREE
+
+    # 3. Refine with Haversine only when the approximation is too close to call
+    if distance > max_distance * (1 + FAST_DISTANCE_EXACT_BAND):
+        return float('inf')
+    if distance >= max_distance * (1 - FAST_DISTANCE_EXACT_BAND):
+        distance = calculate_distance(lat1, lon1, lat2, lon2)
+        return distance if distance <= max_distance else float('inf')
+    return distance
+
+
 def get_location_from_packet(packet):
     """
     Extracts latitude and longitude from a Meshtastic packet's decoded payload.
@@ -98,38 +153,63 @@ def get_location_from_packet(packet):
          logger.debug("Packet missing 'decoded' dictionary.")
          return None, None
 
-    payload = decoded_part.get('payload')
-    portnum = decoded_part.get('portNum') # Can be int or string depending on source
+    return get_location_from_payload(decoded_part.get('payload'), is_position_port(decoded_part.get('portNum')))
 
-    # --- Check Standard Position App Packet ---
+def is_position_port(portnum):
+    """
+    Returns True if a packet port number is POSITION_APP.
+
+    Args:
+        portnum (int | str): The packet's port number; int or string depending on source.
+
+    Returns:
+        bool: True for POSITION_APP.
+    """
     # meshtastic.util.PortNum.POSITION_APP == 1
-    if portnum == 1 or str(portnum) == 'POSITION_APP':
-        if isinstance(payload, dict):
-            # Meshtastic position payloads use integer representations (degrees * 1e7)
-            if 'latitudeI' in payload and 'longitudeI' in payload:
-                try:
-                    lat = float(payload['latitudeI']) / 1e7
-                    lon = float(payload['longitudeI']) / 1e7
-                    # Basic validation for range
-                    if -90 <= lat <= 90 and -180 <= lon <= 180:
-                        return lat, lon
-                    else:
-                        logger.debug(f"Position packet coordinates out of range: lat={lat}, lon={lon}")
-                except (TypeError, ValueError) as e:
-                    logger.warning(f"Error converting position packet coordinates: {e}, payload: {payload}")
-            # Older versions might have used float directly? Less common now.
-            elif 'latitude' in payload and 'longitude' in payload:
-                 try:
-                     lat = float(payload['latitude'])
-                     lon = float(payload['longitude'])
-                     if -90 <= lat <= 90 and -180 <= lon <= 180:
-                         return lat, lon
-                 except (TypeError, ValueError):
-                     pass # Ignore if conversion fails
+    return portnum == 1 or portnum == 'POSITION_APP'
+
+def get_location_from_payload(payload, is_position=False):
+    """
+    Extracts latitude and longitude from an already-decoded packet payload.
+
+    Args:
+        payload: The decoded payload. Only dictionaries can carry a location.
+        is_position (bool): True if the payload is a POSITION_APP position report.
+
+    Returns:
+        tuple: (latitude, longitude) as floats if found, otherwise (None, None).
+               Coordinates are in decimal degrees.
+    """
+    if not isinstance(payload, dict):
+        return None, None
+
+    # --- Check Standard Position App Packet ---
+    if is_position:
+        # Meshtastic position payloads use integer representations (degrees * 1e7)
+        if 'latitudeI' in payload and 'longitudeI' in payload:
+            try:
+                lat = float(payload['latitudeI']) / 1e7
+                lon = float(payload['longitudeI']) / 1e7
+                # Basic validation for range
+                if -90 <= lat <= 90 and -180 <= lon <= 180:
+                    return lat, lon
+                else:
+                    logger.debug("Position packet coordinates out of range: lat=%s, lon=%s", lat, lon)
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Error converting position packet coordinates: {e}, payload: {payload}")
+        # Older versions might have used float directly? Less common now.
+        elif 'latitude' in payload and 'longitude' in payload:
+             try:
+                 lat = float(payload['latitude'])
+                 lon = float(payload['longitude'])
+                 if -90 <= lat <= 90 and -180 <= lon <= 180:
+                     return lat, lon
+             except (TypeError, ValueError):
+                 pass # Ignore if conversion fails
 
     # --- Check for Embedded 'gps' Dictionary (e.g., in AERP messages) ---
-    if isinstance(payload, dict) and 'gps' in payload and isinstance(payload['gps'], dict):
-        gps_data = payload['gps']
+    gps_data = payload.get('gps')
+    if isinstance(gps_data, dict):
         # Prefer precise integer format if available
         if 'latitudeI' in gps_data and 'longitudeI' in gps_data:
             try:
@@ -150,7 +230,6 @@ def get_location_from_packet(packet):
                  pass # Ignore conversion errors
 
     # If no location found after checking both possibilities
-    # logger.debug(f"Could not extract valid location from packet ID: {packet.get('id', 'N/A')}, Port: {portnum}")
     return None, None
 
 def format_node_id(node_num):
@@ -174,3 +253,24 @@ def format_node_id(node_num):
         logger.warning(f"Could not format invalid node number: {node_num}")
         return "Unknown"
 
+def generate_emergency_id(mode, existing_ids=()):
+    """
+    Generates a new emergency ID.
+
+    Args:
+        mode (str): EMERGENCY_ID_MODE_SHORT for a 16-hex-character ID (8 random bytes),
+                    anything else for a uuid4 string.
+        existing_ids (container): IDs already in use locally. A generated ID that
+                                  collides with one of them is discarded and redrawn.
+
+    Returns:
+        str: The new emergency ID.
+    """
+    while True:
+        if mode == EMERGENCY_ID_MODE_SHORT:
+            emergency_id = os.urandom(SHORT_ID_BYTES).hex()
+        else:
+            emergency_id = str(uuid.uuid4())
+        if emergency_id not in existing_ids:
+            return emergency_id
+        logger.warning(f"Generated emergency ID {emergency_id} collides with a known ID. Generating another.")
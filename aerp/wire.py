@@ -0,0 +1,311 @@
+# aerp/wire.py
+# Copyright (C) 2025 Akita Engineering / www.akitaengineering.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Compact binary wire format for AERP messages.
+
+LoRa airtime is the scarcest resource on the mesh, so AERP messages can be
+sent as struct-packed binary instead of JSON. Every binary message starts with
+a magic byte (never the first byte of a JSON object) followed by a byte holding
+the format version and message kind, so receivers can tell the two forms apart
+and decode both.
+
+Layout (all integers big-endian):
+
+    header     uint8 magic (0xAE), uint8 (version << 4 | kind [| SHORT_ID_BIT])
+    id         16 raw UUID bytes, or 8 bytes when SHORT_ID_BIT is set (short IDs)
+    EMERGENCY  uint32 node_num, id emergency_id, uint32 timestamp, uint8 flags,
+               [int32 lat*1e7, int32 lon*1e7]  (flags & HAS_GPS)
+               [int32 altitude]                (flags & HAS_ALTITUDE)
+               [uint32 gps_time]               (flags & HAS_GPS_TIME)
+               [uint8 battery]                 (flags & HAS_BATTERY)
+               [uint16 seq]                    (flags & HAS_SEQ)
+               [uint32 ack_filter]             (flags & HAS_ACK_FILTER)
+               message text (UTF-8, rest of packet; in a delta only if flags & HAS_MESSAGE)
+
+A delta EMERGENCY (flags & IS_DELTA) only carries the fields that changed since
+the previous broadcast; absent fields are left out of the decoded dictionary.
+A delta therefore cannot clear a field: senders fall back to a full broadcast
+when the GPS fix or battery reading is lost.
+    ACK        id emergency_id, uint32 timestamp
+    CLEAR      uint32 node_num, id emergency_id, uint32 timestamp
+"""
+
+import logging
+import struct
+import uuid
+
+from .constants import MSG_TYPE_EMERGENCY, MSG_TYPE_ACK, MSG_TYPE_CLEAR, SHORT_ID_BYTES
+
+# Get a logger specific to this module
+logger = logging.getLogger(__name__)
+
+WIRE_MAGIC = 0xAE
+WIRE_VERSION = 1
+
+# Message kinds (low three bits of the second header byte)
+KIND_EMERGENCY = 1
+KIND_ACK = 2
+KIND_CLEAR = 3
+_KIND_TO_TYPE = {KIND_EMERGENCY: MSG_TYPE_EMERGENCY, KIND_ACK: MSG_TYPE_ACK, KIND_CLEAR: MSG_TYPE_CLEAR}
+_TYPE_TO_KIND = {v: k for k, v in _KIND_TO_TYPE.items()}
+SHORT_ID_BIT = 0x08 # Set in the kind nibble when the emergency ID is a short (8-byte) ID
+
+# EMERGENCY flag bits
+HAS_GPS = 0x01
+HAS_ALTITUDE = 0x02
+HAS_GPS_TIME = 0x04
+HAS_BATTERY = 0x08
+IS_DELTA = 0x10
+HAS_SEQ = 0x20
+HAS_MESSAGE = 0x40
+HAS_ACK_FILTER = 0x80
+
+_HEADER = struct.Struct("!BB")
+_EMERGENCY_TAIL = struct.Struct("!IB") # timestamp, flags (after node_num and id)
+_LATLON = struct.Struct("!ii")
+_INT32 = struct.Struct("!i")
+_UINT32 = struct.Struct("!I")
+_UINT16 = struct.Struct("!H")
+_UINT8 = struct.Struct("!B")
+
+
+class WireFormatError(ValueError):
+    """Raised when a message cannot be encoded to, or decoded from, the binary format."""
+
+
+def is_binary_message(payload):
+    """
+    Returns True if a payload looks like a binary AERP message (cheap prefix check).
+
+    Args:
+        payload: The raw packet payload.
+
+    Returns:
+        bool: True if the payload is bytes starting with the AERP magic byte.
+    """
+    return isinstance(payload, (bytes, bytearray)) and len(payload) >= _HEADER.size and payload[0] == WIRE_MAGIC
+
+
+def peek_message_type(payload):
+    """
+    Returns the AERP message type of a binary payload without decoding the body.
+
+    Args:
+        payload (bytes): A payload for which `is_binary_message` is True.
+
+    Returns:
+        str | None: One of the MSG_TYPE_* constants, or None if the kind is unknown.
+    """
+    return _KIND_TO_TYPE.get(payload[1] & 0x07)
+
+
+def _id_to_bytes(emergency_id):
+    """
+    Converts an emergency ID string to raw bytes.
+
+    Only canonical IDs (lowercase hex; UUIDs in hyphenated form) are accepted, because
+    the receiver decodes to the canonical form and ACKs are matched on the exact string.
+
+    Returns:
+        tuple: (id_bytes, is_short). Short IDs (hex strings of SHORT_ID_BYTES bytes)
+               become 8 bytes, UUID strings become 16 bytes.
+
+    Raises:
+        WireFormatError: If the ID would not decode back to the same string.
+    """
+    emergency_id = str(emergency_id) if emergency_id is not None else ""
+    if len(emergency_id) == SHORT_ID_BYTES * 2:
+        try:
+            id_bytes = bytes.fromhex(emergency_id)
+            if id_bytes.hex() == emergency_id: # Only canonical lowercase IDs survive a round trip
+                return id_bytes, True
+        except ValueError:
+            pass # Not hex; fall through to the UUID attempt for the error message
+    try:
+        parsed = uuid.UUID(emergency_id)
+    except (ValueError, TypeError, AttributeError) as e:
+        raise WireFormatError(f"Emergency ID {emergency_id!r} cannot be binary encoded: {e}")
+    if str(parsed) != emergency_id: # Uppercase, braced or unhyphenated forms would not survive a round trip
+        raise WireFormatError(f"Emergency ID {emergency_id!r} is not a canonical UUID and cannot be binary encoded.")
+    return parsed.bytes, False
+
+
+def _id_from_bytes(payload, offset, is_short):
+    """Reads an emergency ID at `offset`. Returns (id_string, new_offset)."""
+    size = SHORT_ID_BYTES if is_short else 16
+    id_bytes = payload[offset:offset + size]
+    if len(id_bytes) != size:
+        raise struct.error(f"need {size} ID bytes at offset {offset}")
+    return (id_bytes.hex() if is_short else str(uuid.UUID(bytes=id_bytes))), offset + size
+
+
+def _epoch(timestamp):
+    """Converts a (float) timestamp to whole uint32 epoch seconds."""
+    return max(0, min(int(timestamp or 0), 0xFFFFFFFF))
+
+
+def encode_message(message):
+    """
+    Encodes an AERP message dictionary into the binary wire format.
+
+    Args:
+        message (dict): A message as built by the AERP send methods (keys 'type',
+                        'emergency_id', 'timestamp', and per type 'user_node_num',
+                        'message', 'gps', 'battery', 'seq', 'ack_filter').
+
+    Returns:
+        bytes: The encoded message.
+
+    Raises:
+        WireFormatError: If the message type or a field cannot be represented.
+    """
+    message_type = message.get("type")
+    kind = _TYPE_TO_KIND.get(message_type)
+    if kind is None:
+        raise WireFormatError(f"Unsupported message type for binary encoding: {message_type!r}")
+
+    id_bytes, is_short = _id_to_bytes(message.get("emergency_id"))
+    header = _HEADER.pack(WIRE_MAGIC, (WIRE_VERSION << 4) | kind | (SHORT_ID_BIT if is_short else 0))
+    timestamp = _epoch(message.get("timestamp"))
+
+    try:
+        if kind == KIND_ACK:
+            return header + id_bytes + _UINT32.pack(timestamp)
+
+        node_num = _UINT32.pack(int(message.get("user_node_num") or 0))
+        if kind == KIND_CLEAR:
+            return header + node_num + id_bytes + _UINT32.pack(timestamp)
+
+        # EMERGENCY: optional fields follow the fixed part in flag-bit order
+        flags = IS_DELTA if message.get("delta") else 0
+        optional = b""
+        gps = message.get("gps")
+        if isinstance(gps, dict) and gps.get("latitude") is not None and gps.get("longitude") is not None:
+            flags |= HAS_GPS
+            optional += _LATLON.pack(round(gps["latitude"] * 1e7), round(gps["longitude"] * 1e7))
+            if gps.get("altitude") is not None:
+                flags |= HAS_ALTITUDE
+                optional += _INT32.pack(int(gps["altitude"]))
+            if gps.get("time") is not None:
+                flags |= HAS_GPS_TIME
+                optional += _UINT32.pack(_epoch(gps["time"]))
+        battery = message.get("battery")
+        if battery is not None:
+            flags |= HAS_BATTERY
+            optional += _UINT8.pack(max(0, min(int(battery), 255)))
+        if message.get("seq") is not None:
+            flags |= HAS_SEQ
+            optional += _UINT16.pack(int(message["seq"]) & 0xFFFF)
+        if message.get("ack_filter") is not None:
+            flags |= HAS_ACK_FILTER
+            optional += _UINT32.pack(int(message["ack_filter"]) & 0xFFFFFFFF)
+        text = b""
+        if "message" in message:
+            flags |= HAS_MESSAGE
+            text = (message.get("message") or "").encode("utf-8")
+        return header + node_num + id_bytes + _EMERGENCY_TAIL.pack(timestamp, flags) + optional + text
+    except (struct.error, TypeError, ValueError) as e:
+        raise WireFormatError(f"Cannot binary encode {message_type} message: {e}")
+
+
+def decode_message(payload):
+    """
+    Decodes a binary AERP message into the same dictionary shape as the JSON form.
+
+    Args:
+        payload (bytes): The raw payload (must start with the AERP magic byte).
+
+    Returns:
+        dict: The decoded message.
+
+    Raises:
+        WireFormatError: If the payload is truncated, malformed, or of an unknown version/kind.
+    """
+    if not is_binary_message(payload):
+        raise WireFormatError("Payload is not a binary AERP message.")
+    payload = bytes(payload)
+    version, kind, is_short = payload[1] >> 4, payload[1] & 0x07, bool(payload[1] & SHORT_ID_BIT)
+    if version != WIRE_VERSION:
+        raise WireFormatError(f"Unsupported binary AERP version {version}.")
+    message_type = _KIND_TO_TYPE.get(kind)
+    if message_type is None:
+        raise WireFormatError(f"Unknown binary AERP message kind {kind}.")
+
+    offset = _HEADER.size
+    try:
+        if kind == KIND_ACK:
+            emergency_id, offset = _id_from_bytes(payload, offset, is_short)
+            timestamp = _UINT32.unpack_from(payload, offset)[0]
+            return {"type": message_type, "emergency_id": emergency_id, "timestamp": float(timestamp)}
+
+        node_num = _UINT32.unpack_from(payload, offset)[0]
+        emergency_id, offset = _id_from_bytes(payload, offset + _UINT32.size, is_short)
+        if kind == KIND_CLEAR:
+            timestamp = _UINT32.unpack_from(payload, offset)[0]
+            return {"type": message_type, "user_node_num": node_num,
+                    "emergency_id": emergency_id, "timestamp": float(timestamp)}
+
+        timestamp, flags = _EMERGENCY_TAIL.unpack_from(payload, offset)
+        offset += _EMERGENCY_TAIL.size
+        is_delta = bool(flags & IS_DELTA)
+        gps = {}
+        battery = None
+        seq = None
+        ack_filter = None
+        if flags & HAS_GPS:
+            lat_i, lon_i = _LATLON.unpack_from(payload, offset)
+            offset += _LATLON.size
+            gps = {"latitude": lat_i / 1e7, "longitude": lon_i / 1e7, "altitude": None, "time": None}
+            if flags & HAS_ALTITUDE:
+                gps["altitude"] = _INT32.unpack_from(payload, offset)[0]
+                offset += _INT32.size
+            if flags & HAS_GPS_TIME:
+                gps["time"] = _UINT32.unpack_from(payload, offset)[0]
+                offset += _UINT32.size
+        if flags & HAS_BATTERY:
+            battery = _UINT8.unpack_from(payload, offset)[0]
+            offset += _UINT8.size
+        if flags & HAS_SEQ:
+            seq = _UINT16.unpack_from(payload, offset)[0]
+            offset += _UINT16.size
+        if flags & HAS_ACK_FILTER:
+            ack_filter = _UINT32.unpack_from(payload, offset)[0]
+            offset += _UINT32.size
+        message = {
+            "type": message_type,
+            "user_node_num": node_num,
+            "emergency_id": emergency_id,
+            "timestamp": float(timestamp),
+        }
+        if seq is not None:
+            message["seq"] = seq
+        if ack_filter is not None:
+            message["ack_filter"] = ack_filter
+        if not is_delta:
+            message.update(message=payload[offset:].decode("utf-8", errors="replace"), gps=gps, battery=battery)
+            return message
+        # Delta: only the fields that were actually sent
+        message["delta"] = True
+        if flags & HAS_MESSAGE:
+            message["message"] = payload[offset:].decode("utf-8", errors="replace")
+        if flags & HAS_GPS:
+            message["gps"] = gps
+        if flags & HAS_BATTERY:
+            message["battery"] = battery
+        return message
+    except struct.error as e:
+        raise WireFormatError(f"Truncated binary {message_type} message: {e}")
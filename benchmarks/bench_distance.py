@@ -0,0 +1,76 @@
+# benchmarks/bench_distance.py
+# Copyright (C) 2025 Akita Engineering / www.akitaengineering.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Compares `calculate_distance` with `calculate_distance_fast` for alert radius checks.
+
+The corpus mixes nearby nodes (inside or around the alert radius) with nodes
+tens to hundreds of kilometers away, which is what a gateway hears on a
+large mesh. Usage: python -m benchmarks.bench_distance [--calls N] [--radius M]
+"""
+
+import argparse
+import random
+import time
+
+from aerp.utils import calculate_distance, calculate_distance_fast
+
+
+def build_corpus(size, center_lat, center_lon, seed=42):
+    """Returns a list of (lat, lon) points: ~20% within a few km, the rest far away."""
+    rng = random.Random(seed)
+    points = []
+    for _ in range(size):
+        spread = 0.03 if rng.random() < 0.2 else 3.0 # ~3 km vs ~300 km
+        points.append((center_lat + rng.uniform(-spread, spread), center_lon + rng.uniform(-spread, spread)))
+    return points
+
+
+def run(func, center, points, calls, *extra):
+    """Calls func for every point until `calls` calls are made. Returns calls/sec."""
+    lat1, lon1 = center
+    n = len(points)
+    start = time.perf_counter()
+    for i in range(calls):
+        lat2, lon2 = points[i % n]
+        func(lat1, lon1, lat2, lon2, *extra)
+    return calls / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark AERP distance calculations.")
+    parser.add_argument("--calls", type=int, default=200000, help="Number of calls per variant.")
+    parser.add_argument("--radius", type=float, default=1000, help="Alert radius in meters.")
+    args = parser.parse_args()
+
+    center = (45.0, -75.0)
+    points = build_corpus(10000, *center)
+
+    # Sanity check: both variants must agree on which points are inside the radius
+    mismatches = sum(
+        (calculate_distance(*center, lat, lon) <= args.radius) != (calculate_distance_fast(*center, lat, lon, args.radius) <= args.radius)
+        for lat, lon in points
+    )
+
+    exact = run(calculate_distance, center, points, args.calls)
+    fast = run(calculate_distance_fast, center, points, args.calls, args.radius)
+    print(f"calculate_distance:      {exact:12,.0f} calls/sec")
+    print(f"calculate_distance_fast: {fast:12,.0f} calls/sec ({fast / exact:.1f}x)")
+    print(f"Inside-radius mismatches: {mismatches}")
+
+
+if __name__ == '__main__':
+    main()
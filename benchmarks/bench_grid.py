@@ -0,0 +1,87 @@
+# benchmarks/bench_grid.py
+# Copyright (C) 2025 Akita Engineering / www.akitaengineering.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Compares grid-indexed `ProximityEngine.nodes_within` with a brute-force scan.
+
+Queries are made around random points and around points on both sides of the
+antimeridian (lon ±180), where grid cells wrap around. Every query result is
+checked against `calculate_distance` over all nodes.
+Usage: python -m benchmarks.bench_grid [--nodes N] [--queries N] [--cell M]
+"""
+
+import argparse
+import random
+import time
+
+from aerp.proximity import ProximityEngine
+from aerp.utils import calculate_distance
+
+
+def build_centers(count, rng):
+    """Returns query centers: half random, half within 0.5 degrees of the antimeridian."""
+    centers = []
+    for i in range(count):
+        lat = rng.uniform(-80.0, 80.0)
+        if i % 2:
+            lon = rng.choice((-180.0, 180.0)) + rng.uniform(-0.5, 0.5)
+            lon = (lon + 180.0) % 360.0 - 180.0
+        else:
+            lon = rng.uniform(-180.0, 180.0)
+        centers.append((lat, lon))
+    return centers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark and verify the AERP spatial grid.")
+    parser.add_argument("--nodes", type=int, default=200, help="Nodes scattered around each query center.")
+    parser.add_argument("--queries", type=int, default=200, help="Number of radius queries.")
+    parser.add_argument("--cell", type=float, default=100000, help="Grid cell size in meters.")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    engine = ProximityEngine(cell_size_m=args.cell)
+    centers = build_centers(args.queries, rng)
+    points = {}
+    for lat, lon in centers:
+        for _ in range(args.nodes // 10 or 1):
+            p_lat = max(-90.0, min(90.0, lat + rng.uniform(-1.0, 1.0)))
+            p_lon = (lon + rng.uniform(-1.0, 1.0) + 180.0) % 360.0 - 180.0
+            node_num = len(points) + 1
+            points[node_num] = (p_lat, p_lon)
+            engine.update(node_num, p_lat, p_lon)
+
+    radii = [rng.uniform(0.05, 1.0) * args.cell for _ in centers]
+
+    start = time.perf_counter()
+    results = [engine.nodes_within(lat, lon, radius) for (lat, lon), radius in zip(centers, radii)]
+    grid_time = time.perf_counter() - start
+
+    mismatches = 0
+    start = time.perf_counter()
+    for (lat, lon), radius, found in zip(centers, radii, results):
+        expected = {n for n, (p_lat, p_lon) in points.items() if calculate_distance(lat, lon, p_lat, p_lon) <= radius}
+        mismatches += len(expected.symmetric_difference(n for n, _ in found))
+    brute_time = time.perf_counter() - start
+
+    print(f"Nodes: {len(points):,}  queries: {len(centers):,}  cell: {args.cell:,.0f} m")
+    print(f"nodes_within (grid): {grid_time / len(centers) * 1e3:8.3f} ms/query")
+    print(f"brute force:         {brute_time / len(centers) * 1e3:8.3f} ms/query")
+    print(f"Mismatches vs brute force: {mismatches}")
+
+
+if __name__ == '__main__':
+    main()
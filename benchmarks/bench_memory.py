@@ -0,0 +1,109 @@
+# benchmarks/bench_memory.py
+# Copyright (C) 2025 Akita Engineering / www.akitaengineering.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Measures per-entry memory of tracked emergencies and ACKs.
+
+Compares the previous representation (a 7-key dict with a nested GPS dict per
+received emergency, and a {node_num: timestamp} dict per session) with the
+slotted `ReceivedEmergency` and array-backed `AckRecord`, using tracemalloc.
+Usage: python -m benchmarks.bench_memory [--entries N] [--acks-per-session K]
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from aerp.store import AckRecord, ReceivedEmergency
+
+
+def measure(build):
+    """Returns the bytes allocated (and still held) by build()."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del held
+    return after - before
+
+
+def sample_emergencies(count, seed=42):
+    """Returns (node_num, emergency fields) tuples resembling received traffic."""
+    rng = random.Random(seed)
+    now = time.time()
+    return [(rng.getrandbits(32), (f"{rng.getrandbits(64):016x}", now - rng.random() * 600, "SOS! Emergency situation detected.",
+             {"latitude": 45 + rng.random(), "longitude": -75 + rng.random(), "altitude": float(rng.randint(0, 500)), "time": int(now)},
+             rng.randint(0, 100), rng.randint(0, 65535)))
+            for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark AERP per-entry memory.")
+    parser.add_argument("--entries", type=int, default=10000, help="Number of received emergencies / ACK sessions.")
+    parser.add_argument("--acks-per-session", type=int, default=20, help="ACKs per session.")
+    args = parser.parse_args()
+
+    emergencies = sample_emergencies(args.entries)
+    # Payload GPS dicts exist regardless; give each representation its own copy to keep
+    copies = [[(node, fields[:3] + (dict(fields[3]),) + fields[4:]) for node, fields in emergencies] for _ in range(2)]
+
+    def old_emergencies():
+        return {node: {"message_id": eid, "timestamp": ts, "message": msg, "gps": gps, "battery": batt,
+                       "seq": seq, "last_seen": time.time()}
+                for node, (eid, ts, msg, gps, batt, seq) in copies[0]}
+
+    def new_emergencies():
+        return {node: ReceivedEmergency(eid, ts, msg, gps, batt, seq=seq) for node, (eid, ts, msg, gps, batt, seq) in copies[1]}
+
+    # GPS dicts are dropped by the new representation once the record is built
+    gps_dict_bytes = measure(lambda: [dict(fields[3]) for _, fields in emergencies])
+    old_rx = measure(old_emergencies) + gps_dict_bytes
+    new_rx = measure(new_emergencies)
+
+    def ack_stream():
+        """Yields per-session lists of fresh (node_num, timestamp) objects, as received ACKs would be."""
+        rng = random.Random(7)
+        for _ in range(args.entries):
+            yield [(rng.getrandbits(32), time.time() - rng.random() * 300) for _ in range(args.acks_per_session)]
+
+    def old_acks():
+        return [{node: ts for node, ts in session} for session in ack_stream()]
+
+    def new_acks():
+        records = []
+        for session in ack_stream():
+            record = AckRecord()
+            for node, ts in session:
+                record.set(node, ts)
+            records.append(record)
+        return records
+
+    old_ack = measure(old_acks)
+    new_ack = measure(new_acks)
+    total_acks = args.entries * args.acks_per_session
+
+    print(f"Received emergencies ({args.entries}):")
+    print(f"  dict + nested GPS dict: {old_rx / args.entries:8.1f} bytes/entry")
+    print(f"  ReceivedEmergency:      {new_rx / args.entries:8.1f} bytes/entry ({(1 - new_rx / old_rx) * 100:.0f}% less)")
+    print(f"ACKs ({args.entries} sessions x {args.acks_per_session}):")
+    print(f"  {{node: timestamp}} dict: {old_ack / total_acks:8.1f} bytes/ACK")
+    print(f"  AckRecord arrays:       {new_ack / total_acks:8.1f} bytes/ACK ({(1 - new_ack / old_ack) * 100:.0f}% less)")
+
+
+if __name__ == "__main__":
+    main()
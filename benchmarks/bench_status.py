@@ -0,0 +1,100 @@
+# benchmarks/bench_status.py
+# Copyright (C) 2025 Akita Engineering / www.akitaengineering.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Measures the cost of building AERP status with many tracked nodes.
+
+Every node sends an emergency, an ACK and a position. Compares:
+- formatted: building a snapshot and rendering it to strings (what get_status
+  did eagerly on every call before the structured API),
+- structured: building the raw StatusSnapshot only,
+- cached: status() when nothing changed (served from the snapshot).
+Usage: python -m benchmarks.bench_status [--nodes N]
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+import timeit
+from types import SimpleNamespace
+
+from aerp.config import ConfigManager
+from aerp.constants import MSG_TYPE_ACK, MSG_TYPE_EMERGENCY
+from aerp.plugin import AERP
+from aerp.status import render_status
+
+
+class FakeInterface:
+    """Minimal stand-in for a Meshtastic interface that discards sent payloads."""
+
+    def __init__(self):
+        self.myInfo = SimpleNamespace(my_node_num=0x11111111,
+                                      position={"latitudeI": 450000000, "longitudeI": -750000000},
+                                      device_metrics={"batteryLevel": 80})
+
+    def sendData(self, payload, **kwargs):
+        pass
+
+
+def populate(aerp, interface, nodes):
+    """Feeds one EMERGENCY (with GPS) and one ACK per node straight into handle_incoming."""
+    port = aerp.config.get("emergency_port")
+    for n in range(nodes):
+        node_num = 0x1000 + n
+        now = time.time()
+        emergency = {"type": MSG_TYPE_EMERGENCY, "emergency_id": f"{node_num:016x}", "message": "SOS",
+                     "gps": {"latitude": 45 + n * 1e-4, "longitude": -75.0}, "battery": 50, "timestamp": now}
+        ack = {"type": MSG_TYPE_ACK, "emergency_id": aerp.last_emergency_id, "timestamp": now}
+        for payload in (emergency, ack):
+            aerp.handle_incoming({"from": node_num, "to": 0xFFFFFFFF, "id": n,
+                                  "decoded": {"portNum": port, "payload": payload}}, interface)
+
+
+def best_ms(func, number):
+    """Returns the best per-call time of func in milliseconds."""
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark AERP status building.")
+    parser.add_argument("--nodes", type=int, default=1000, help="Number of tracked nodes.")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL) # Per-packet logging is not what is measured here
+
+    with tempfile.TemporaryDirectory() as tmp:
+        interface = FakeInterface()
+        aerp = AERP(interface, ConfigManager(os.path.join(tmp, "aerp_config.json")))
+        aerp.start_emergency()
+        populate(aerp, interface, args.nodes)
+
+        formatted = best_ms(lambda: render_status(aerp._build_status()), 20)
+        structured = best_ms(aerp._build_status, 20)
+        aerp.status()
+        cached = best_ms(aerp.status, 10000)
+
+        aerp.stop_emergency(send_clear=False)
+        aerp.shutdown()
+
+    print(f"Status with {args.nodes} tracked nodes (emergency + ACK + position each):")
+    print(f"  formatted (build + render): {formatted:8.3f} ms")
+    print(f"  structured (build only):    {structured:8.3f} ms ({formatted / structured:.1f}x faster)")
+    print(f"  cached status():            {cached * 1000:8.3f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# benchmarks/bench_stop_latency.py
+# Copyright (C) 2025 Akita Engineering / www.akitaengineering.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Measures how long `stop_emergency` takes to return and send the CLEAR message.
+
+An emergency is started with a long broadcast interval against an in-memory
+interface, then stopped while the next broadcast is pending on the scheduler.
+Stopping cancels the scheduled broadcast task instead of waiting for it to
+come due, so stop-to-CLEAR latency is independent of the interval.
+Usage: python -m benchmarks.bench_stop_latency [--interval S] [--runs N]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+from aerp.config import ConfigManager
+from aerp.constants import CONFIG_INTERVAL, MSG_TYPE_CLEAR
+from aerp.plugin import AERP
+
+
+class FakeInterface:
+    """Minimal stand-in for a Meshtastic interface that records sent payloads."""
+
+    def __init__(self):
+        self.myInfo = SimpleNamespace(my_node_num=0x11111111,
+                                      position={"latitudeI": 450000000, "longitudeI": -750000000},
+                                      device_metrics={"batteryLevel": 80})
+        self.sent = []
+
+    def sendData(self, payload, **kwargs):
+        self.sent.append((time.monotonic(), payload))
+
+
+def measure(config_path, runs):
+    """Returns a list of (stop_return_seconds, stop_to_clear_seconds) per run."""
+    results = []
+    for _ in range(runs):
+        interface = FakeInterface()
+        aerp = AERP(interface, ConfigManager(config_path))
+        aerp.start_emergency()
+        time.sleep(0.2) # Let the first broadcast go out and the next one be scheduled
+        started = time.monotonic()
+        aerp.stop_emergency()
+        returned = time.monotonic()
+        clear_at = next((t for t, payload in interface.sent
+                         if isinstance(payload, dict) and payload.get("type") == MSG_TYPE_CLEAR), None)
+        results.append((returned - started, (clear_at - started) if clear_at is not None else float("nan")))
+        aerp.shutdown()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark AERP emergency stop latency.")
+    parser.add_argument("--interval", type=int, default=300, help="Broadcast interval in seconds.")
+    parser.add_argument("--runs", type=int, default=5, help="Number of start/stop cycles.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = os.path.join(tmp, "aerp_config.json")
+        config = ConfigManager(config_path).config
+        config[CONFIG_INTERVAL] = args.interval
+        with open(config_path, "w") as f:
+            json.dump(config, f)
+        results = measure(config_path, args.runs)
+
+    print(f"Broadcast interval: {args.interval}s, runs: {args.runs}")
+    for i, (stop_return, stop_to_clear) in enumerate(results, 1):
+        print(f"  run {i}: stop_emergency returned in {stop_return * 1000:.1f} ms, CLEAR sent after {stop_to_clear * 1000:.1f} ms")
+    print(f"Worst case: {max(r[0] for r in results) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
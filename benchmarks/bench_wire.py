@@ -0,0 +1,87 @@
+# benchmarks/bench_wire.py
+# Copyright (C) 2025 Akita Engineering / www.akitaengineering.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Compares JSON and binary AERP message sizes and encode/decode speed.
+
+Also checks that every emergency ID either survives a binary round trip
+unchanged (so ACKs still match the sender's records) or is rejected with
+WireFormatError (so the sender falls back to JSON). Non-canonical IDs
+(uppercase, braced or unhyphenated UUIDs, uppercase short IDs) are included.
+Usage: python -m benchmarks.bench_wire [--calls N]
+"""
+
+import argparse
+import json
+import time
+import uuid
+
+from aerp.constants import MSG_TYPE_EMERGENCY, MSG_TYPE_ACK, MSG_TYPE_CLEAR
+from aerp.wire import encode_message, decode_message, WireFormatError
+
+
+def build_messages(emergency_id):
+    """Returns one EMERGENCY, ACK and CLEAR message for an emergency ID."""
+    now = time.time()
+    return [
+        {"type": MSG_TYPE_EMERGENCY, "user_node_num": 0x12345678, "emergency_id": emergency_id, "timestamp": now,
+         "message": "SOS! Emergency situation detected.", "battery": 76,
+         "gps": {"latitude": 45.4215296, "longitude": -75.6971931, "altitude": 70, "time": int(now)}},
+        {"type": MSG_TYPE_ACK, "emergency_id": emergency_id, "timestamp": now},
+        {"type": MSG_TYPE_CLEAR, "user_node_num": 0x12345678, "emergency_id": emergency_id, "timestamp": now},
+    ]
+
+
+def check_round_trips():
+    """Returns (ids_checked, rejected, mismatches) over canonical and non-canonical IDs."""
+    canonical = str(uuid.UUID("0f8fad5b-d9cb-469f-a165-70867728950e"))
+    short = "0123456789abcdef"
+    ids = [canonical, canonical.upper(), canonical.replace("-", ""), "{" + canonical + "}",
+           "urn:uuid:" + canonical, short, short.upper(), "not-an-id"]
+    rejected = mismatches = 0
+    for emergency_id in ids:
+        for message in build_messages(emergency_id):
+            try:
+                decoded = decode_message(encode_message(message))
+            except WireFormatError:
+                rejected += 1
+                continue
+            if decoded["emergency_id"] != emergency_id:
+                mismatches += 1
+    return len(ids), rejected, mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the AERP binary wire format.")
+    parser.add_argument("--calls", type=int, default=50000, help="Encode/decode calls per message type.")
+    args = parser.parse_args()
+
+    for message in build_messages(str(uuid.uuid4())):
+        as_json = json.dumps(message).encode("utf-8")
+        as_binary = encode_message(message)
+        start = time.perf_counter()
+        for _ in range(args.calls):
+            decode_message(encode_message(message))
+        rate = args.calls / (time.perf_counter() - start)
+        print(f"{message['type']:<15} JSON {len(as_json):4d} B, binary {len(as_binary):4d} B "
+              f"({len(as_binary) / len(as_json):.0%}); {rate:10,.0f} round trips/sec")
+
+    ids, rejected, mismatches = check_round_trips()
+    print(f"ID round trips: {ids} IDs, {rejected} messages rejected (sent as JSON), {mismatches} mismatches")
+
+
+if __name__ == '__main__':
+    main()